@@ -0,0 +1,231 @@
+"""
+Benchmark harness timing each stage of the tax calculation pipeline.
+
+Usage:
+    python -m benchmarks.run_benchmarks --lines 200 --operations 500 --report bench_report.json
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.workload import generate_workload
+from src.capital_gains_cli import CapitalGainsCLI
+from src.services.audit import ExplainingTaxCalculator
+from src.services.tax_calculator import ENGINES, TaxCalculator
+from src.utils.json_codec import BACKENDS, JsonCodec
+from src.utils.json_utils import parse_operations, format_results
+
+
+def count_allocations(stage: Callable[[], object]) -> int:
+    """
+    Counts the memory blocks allocated while a stage runs, temporaries included.
+    
+    Every bytecode instruction is traced and the interpreter's allocated block
+    count is sampled before it; the increases are summed, so an object built
+    and dropped on every operation is counted just like one that is kept.
+    Objects recycled from CPython's free lists (small tuples, floats) reuse
+    memory without allocating and are not counted.
+    
+    Args:
+        stage: Function running the whole stage once
+    
+    Returns:
+        Number of blocks allocated
+    """
+    allocations = 0
+    last = sys.getallocatedblocks()
+    
+    def trace(frame, event, arg):
+        nonlocal allocations, last
+        frame.f_trace_opcodes = True
+        blocks = sys.getallocatedblocks()
+        if blocks > last:
+            allocations += blocks - last
+        last = blocks
+        return trace
+    
+    sys.settrace(trace)
+    try:
+        stage()
+    finally:
+        sys.settrace(None)
+    return allocations
+
+
+def measure(stage: Callable[[], object], operations: int, repeat: int) -> Dict[str, float]:
+    """
+    Measures a stage, keeping the best time of several runs.
+    
+    Peak memory and allocations are measured in separate runs, under
+    tracemalloc and count_allocations, so neither distorts the timings.
+    
+    Args:
+        stage: Function running the whole stage once
+        operations: Number of operations processed by one run
+        repeat: Number of timed runs
+    
+    Returns:
+        Dictionary with seconds, operations per second, peak bytes and
+        allocations per operation
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    allocations = count_allocations(stage)
+    
+    return {
+        "seconds": best,
+        "ops_per_sec": operations / best if best else float("inf"),
+        "peak_bytes": peak,
+        "allocations_per_op": allocations / operations if operations else 0.0
+    }
+
+
+def run_benchmarks(
+    lines: List[str], engine: str = "decimal", repeat: int = 3, json_backend: Optional[str] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Times parsing, calculation, formatting and the full CLI path separately.
+    
+    The explain stage runs the same calculation in explain mode; comparing it
+    with the calculate stage shows what the audit trail costs. The calculate
+    stage's allocations per operation, checked against a baseline report,
+    show the default path allocates no extra object per operation.
+    
+    Args:
+        lines: Input lines of the workload
+        engine: Arithmetic engine used by the calculator
+        repeat: Number of timed runs per stage
+        json_backend: JSON decoding backend, defaults to the fastest one installed
+    
+    Returns:
+        Measurements keyed by stage name
+    """
+    codec = JsonCodec(json_backend)
+    parsed = [parse_operations(line, codec) for line in lines]
+    operations = sum(len(line) for line in parsed)
+    calculator = TaxCalculator(engine=engine)
+    calculated = [calculator.calculate_taxes(line) for line in parsed]
+    explaining = ExplainingTaxCalculator(engine=engine)
+    cli_input = "\n".join(lines) + "\n\n"
+    
+    def run_cli():
+        stdin, stdout = sys.stdin, sys.stdout
+        sys.stdin, sys.stdout = io.StringIO(cli_input), io.StringIO()
+        try:
+            CapitalGainsCLI(engine=engine, json_backend=codec.backend).run()
+        finally:
+            sys.stdin, sys.stdout = stdin, stdout
+    
+    return {
+        "parse": measure(lambda: [parse_operations(line, codec) for line in lines], operations, repeat),
+        "calculate": measure(lambda: [calculator.calculate_taxes(line) for line in parsed], operations, repeat),
+        "explain": measure(lambda: [explaining.calculate_taxes(line) for line in parsed], operations, repeat),
+        "format": measure(lambda: [format_results(results) for results in calculated], operations, repeat),
+        "cli": measure(run_cli, operations, repeat)
+    }
+
+
+def find_regressions(stages: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """
+    Compares throughput and allocations against a baseline report.
+    
+    Args:
+        stages: Current measurements keyed by stage name
+        baseline: Stage measurements of the baseline report
+        tolerance: Accepted relative slowdown, e.g. 0.1 for 10%
+    
+    Returns:
+        Descriptions of the stages slower than the baseline allows, or
+        allocating more per operation than the baseline
+    """
+    regressions = []
+    for name, measurement in stages.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]["ops_per_sec"]
+        if measurement["ops_per_sec"] < expected * (1 - tolerance):
+            regressions.append(
+                f"{name}: {measurement['ops_per_sec']:.0f} ops/sec is below baseline {expected:.0f} ops/sec"
+            )
+        expected_allocations = baseline[name].get("allocations_per_op")
+        allocations = measurement.get("allocations_per_op")
+        # Counts are exact, but half an allocation per operation absorbs warm-up effects
+        if expected_allocations is not None and allocations is not None and allocations > expected_allocations + 0.5:
+            regressions.append(
+                f"{name}: {allocations:.2f} allocations per operation exceeds baseline {expected_allocations:.2f}"
+            )
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments of the harness."""
+    parser = argparse.ArgumentParser(description="Capital gains benchmark harness")
+    parser.add_argument("--lines", type=int, default=100, help="number of simulations")
+    parser.add_argument("--operations", type=int, default=200, help="operations per simulation")
+    parser.add_argument("--sell-ratio", type=float, default=0.5, help="probability of a sell when shares are held")
+    parser.add_argument("--threshold-ratio", type=float, default=0.5, help="probability of a sell above R$ 20,000.00")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the workload generator")
+    parser.add_argument("--engine", choices=ENGINES, default="decimal", help="arithmetic engine")
+    parser.add_argument("--json-backend", choices=BACKENDS, help="JSON decoding backend")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--report", default="bench_report.json", help="path of the JSON report")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="accepted relative slowdown")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Runs the benchmarks, writes the report and returns the exit status."""
+    args = parse_args(argv)
+    lines = generate_workload(args.lines, args.operations, args.sell_ratio, args.threshold_ratio, args.seed)
+    stages = run_benchmarks(lines, args.engine, args.repeat, args.json_backend)
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(stages, json.load(baseline_file)["stages"], args.tolerance)
+    
+    report = {
+        "config": {
+            "lines": args.lines,
+            "operations_per_line": args.operations,
+            "sell_ratio": args.sell_ratio,
+            "threshold_ratio": args.threshold_ratio,
+            "seed": args.seed,
+            "engine": args.engine,
+            "json_backend": JsonCodec(args.json_backend).backend
+        },
+        "stages": stages,
+        "regressions": regressions
+    }
+    with open(args.report, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    
+    for name, measurement in stages.items():
+        print(
+            f"{name:<10} {measurement['ops_per_sec']:>14,.0f} ops/sec {measurement['peak_bytes']:>14,} peak bytes "
+            f"{measurement['allocations_per_op']:>8.2f} allocs/op"
+        )
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
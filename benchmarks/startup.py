@@ -0,0 +1,172 @@
+"""
+Startup benchmark measuring time-to-first-output and the import cost of a default run.
+
+Each run spawns a fresh interpreter executing main.py with one simulation
+piped on standard input, exactly as short-lived batch jobs invoke the
+program. The import check runs the same command under `python -X importtime`
+and compares it with a budget file listing the maximum cumulative import time
+and the modules that must never be imported by the default path.
+
+After an intended change to the default path, or on a new machine, the limit
+is refreshed from the median of fresh measurements with --update-baseline,
+keeping the forbidden modules of the file.
+
+Usage:
+    python -m benchmarks.startup --runs 20 --budget benchmarks/import_budget.json
+    python -m benchmarks.startup --budget benchmarks/import_budget.json --update-baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+SAMPLE_LINE = b'[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]\n'
+
+
+def time_to_first_output(runs: int) -> Dict[str, float]:
+    """
+    Measures the wall time until a fresh process writes its first result.
+    
+    Args:
+        runs: Number of processes spawned
+    
+    Returns:
+        Dictionary with the median, minimum and maximum seconds
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, MAIN], cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        process.stdin.write(SAMPLE_LINE)
+        process.stdin.close()
+        process.stdout.readline()
+        samples.append(time.perf_counter() - start)
+        process.stdout.close()
+        process.wait()
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples)}
+
+
+def import_times(argv: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Collects the cumulative import time of every module loaded by a run.
+    
+    Args:
+        argv: Extra arguments for main.py, none for the default path
+    
+    Returns:
+        Dictionary mapping module names to cumulative microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN] + list(argv or []),
+        cwd=ROOT, input=SAMPLE_LINE, capture_output=True, check=True
+    )
+    times = {}
+    for line in result.stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check_budget(times: Dict[str, int], budget: dict) -> List[str]:
+    """
+    Compares import times with a budget.
+    
+    Args:
+        times: Cumulative microseconds per module, as returned by import_times
+        budget: Dictionary with 'max-microseconds' for the modules listed in
+            'measured' and a list of 'forbidden' modules
+    
+    Returns:
+        Description of each violation, empty when within budget
+    """
+    violations = []
+    for module in budget.get("forbidden", []):
+        if module in times:
+            violations.append(f"{module} is imported by the default path")
+    measured = sum(times.get(module, 0) for module in budget.get("measured", []))
+    limit = budget.get("max-microseconds")
+    if limit is not None and measured > limit:
+        violations.append(f"imports took {measured}us, budget is {limit}us")
+    return violations
+
+
+def baseline_budget(samples: List[Dict[str, int]], budget: dict, headroom: float) -> dict:
+    """
+    Builds a budget whose limit is derived from measured import times.
+    
+    Args:
+        samples: Import times of several runs, as returned by import_times
+        budget: Current budget, whose 'measured' and 'forbidden' lists are kept
+        headroom: Factor applied to the median measurement to absorb noise
+    
+    Returns:
+        Copy of the budget with an updated 'max-microseconds'
+    """
+    modules = budget.get("measured", [])
+    median = statistics.median(sum(times.get(module, 0) for module in modules) for times in samples)
+    return dict(budget, **{"max-microseconds": int(round(median * headroom, -3))})
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description="Startup benchmark of the capital gains CLI")
+    parser.add_argument("--runs", type=int, default=20, help="number of processes spawned")
+    parser.add_argument("--budget", help="import budget JSON file to check against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="rewrite the limit of the --budget file from the measured import times")
+    parser.add_argument("--headroom", type=float, default=2.0,
+                        help="factor applied to the measured import time by --update-baseline")
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.budget:
+        parser.error("--update-baseline requires --budget")
+    if args.headroom < 1:
+        parser.error("--headroom must be at least 1")
+    return args
+
+
+def main(argv=None) -> int:
+    """Runs the startup benchmark, returning 1 when the import budget is exceeded."""
+    args = parse_args(argv)
+    startup = time_to_first_output(args.runs)
+    times = import_times()
+    report = {
+        "time-to-first-output": startup,
+        "import-microseconds": {
+            module: times[module] for module in ("src.capital_gains_cli", "src.services.tax_calculator", "json")
+            if module in times
+        }
+    }
+    print(json.dumps(report, indent=2))
+    
+    if args.update_baseline:
+        with open(args.budget) as budget_file:
+            budget = json.load(budget_file)
+        samples = [times] + [import_times() for _ in range(min(args.runs, 5) - 1)]
+        budget = baseline_budget(samples, budget, args.headroom)
+        with open(args.budget, "w") as budget_file:
+            json.dump(budget, budget_file, indent=2)
+            budget_file.write("\n")
+        print(f"Import budget set to {budget['max-microseconds']}us in {args.budget}", file=sys.stderr)
+    elif args.budget:
+        with open(args.budget) as budget_file:
+            violations = check_budget(times, json.load(budget_file))
+        for violation in violations:
+            print(f"IMPORT BUDGET: {violation}", file=sys.stderr)
+        if violations:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Synthetic workload generator for the benchmark suite.
+"""
+
+import json
+import random
+from typing import List
+
+
+def generate_operations(rng: random.Random, operations: int, sell_ratio: float = 0.5, threshold_ratio: float = 0.5) -> List[dict]:
+    """
+    Generates the operations of one simulation.
+    
+    Sells never exceed the shares held, so every simulation is valid.
+    
+    Args:
+        rng: Random number generator
+        operations: Number of operations in the simulation
+        sell_ratio: Probability of an operation being a sell when shares are held
+        threshold_ratio: Probability of a sell exceeding the R$ 20,000.00 exemption
+        
+    Returns:
+        List of operation dictionaries in the input format
+    """
+    data = []
+    shares = 0
+    
+    for _ in range(operations):
+        if shares == 0 or rng.random() >= sell_ratio:
+            quantity = rng.randint(1, 10000)
+            data.append({"operation": "buy", "unit-cost": rng.randint(100, 5000) / 100, "quantity": quantity})
+            shares += quantity
+            continue
+        
+        quantity = rng.randint(1, shares)
+        if rng.random() < threshold_ratio:
+            # Smallest whole-cent price above the exemption, plus some profit or loss margin
+            minimum_cents = 2000000 // quantity + 1
+            unit_cost = rng.randint(minimum_cents, minimum_cents * 2 + 100) / 100
+        else:
+            # Even a one cent price exceeds the exemption above 2,000,000 shares
+            quantity = min(quantity, 2000000)
+            maximum_cents = 2000000 // quantity
+            unit_cost = rng.randint(1, maximum_cents) / 100
+        data.append({"operation": "sell", "unit-cost": unit_cost, "quantity": quantity})
+        shares -= quantity
+    
+    return data
+
+
+def generate_workload(
+    lines: int,
+    operations_per_line: int,
+    sell_ratio: float = 0.5,
+    threshold_ratio: float = 0.5,
+    seed: int = 0
+) -> List[str]:
+    """
+    Generates input lines for the benchmark, one simulation per line.
+    
+    Args:
+        lines: Number of simulations
+        operations_per_line: Number of operations per simulation
+        sell_ratio: Probability of an operation being a sell when shares are held
+        threshold_ratio: Probability of a sell exceeding the R$ 20,000.00 exemption
+        seed: Seed of the random number generator
+        
+    Returns:
+        List of JSON input lines
+    """
+    rng = random.Random(seed)
+    return [
+        json.dumps(generate_operations(rng, operations_per_line, sell_ratio, threshold_ratio))
+        for _ in range(lines)
+    ]
@@ -0,0 +1,401 @@
+"""
+Differential fuzzing of the tax engines against the reference TaxCalculator.
+
+Each case is a generated operation sequence run through the reference
+(TaxCalculator with the Decimal engine) and through every engine under
+test; any difference in taxes, or an error raised by only one side, is a
+mismatch. Mismatches are shrunk to a minimal reproducer before being
+reported as a JSON input line.
+
+Engines are named factories returning a function from a list of operations
+to its taxes (TaxResult objects, Decimals or integer cents). Besides the
+built-in names, any 'module:function' factory can be plugged in.
+
+Usage:
+    python -m fuzz.differential --cases 1000000 --workers 8
+    python -m fuzz.differential --engine cents --engine mypackage.engines:make_engine --seed 7
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fuzz.generator import generate_case
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator
+
+
+Engine = Callable[[List[Operation]], Sequence]
+
+
+class Unsupported(Exception):
+    """Raised by an engine for a case it is not meant to handle, which is skipped."""
+
+
+def _cents_engine() -> Engine:
+    return TaxCalculator("cents").calculate_taxes
+
+
+def _batch_engine() -> Engine:
+    calculator = TaxCalculator("cents")
+    
+    def calculate(operations: List[Operation]) -> Sequence[int]:
+        # Prices must be whole cents and every value must fit the int64 columns
+        try:
+            return calculator.calculate_batch(OperationBatch.from_operations(operations))
+        except (ValueError, OverflowError) as error:
+            raise Unsupported(str(error))
+    return calculate
+
+
+def _vectorized_engine() -> Engine:
+    from src.services.vectorized_calculator import VectorizedTaxCalculator
+    calculator = VectorizedTaxCalculator()
+    
+    def calculate(operations: List[Operation]) -> Sequence[int]:
+        try:
+            return calculator.calculate_batches([OperationBatch.from_operations(operations)])[0, :len(operations)].tolist()
+        except (ValueError, OverflowError) as error:
+            raise Unsupported(str(error))
+    return calculate
+
+
+def _prefix_cache_engine() -> Engine:
+    from src.services.prefix_cache import PrefixStateCache
+    cache = PrefixStateCache(10000)
+    calculator = TaxCalculator()
+    
+    def calculate(operations: List[Operation]) -> List[TaxResult]:
+        # Run twice so the second pass is served from the cache
+        cache.calculate_taxes(calculator, operations)
+        return cache.calculate_taxes(calculator, operations)
+    return calculate
+
+
+def _portfolio_engine() -> Engine:
+    from src.services.portfolio_calculator import PortfolioTaxCalculator
+    return PortfolioTaxCalculator().calculate_taxes
+
+
+def _explain_engine() -> Engine:
+    from src.services.audit import ExplainingTaxCalculator
+    return ExplainingTaxCalculator().calculate_taxes
+
+
+ENGINES: Dict[str, Callable[[], Engine]] = {
+    "cents": _cents_engine,
+    "batch": _batch_engine,
+    "vectorized": _vectorized_engine,
+    "prefix-cache": _prefix_cache_engine,
+    "portfolio": _portfolio_engine,
+    "explain": _explain_engine
+}
+
+
+class Mismatch:
+    """
+    Class describing an operation sequence on which an engine differs from the reference.
+    """
+    
+    __slots__ = ("engine", "case", "operations", "expected", "actual")
+    
+    def __init__(self, engine: str, case: int, operations: List[Operation], expected: str, actual: str):
+        """
+        Initializes a mismatch.
+        
+        Args:
+            engine: Name of the engine under test
+            case: Index of the generated case
+            operations: Operations reproducing the mismatch
+            expected: Outcome of the reference
+            actual: Outcome of the engine
+        """
+        self.engine = engine
+        self.case = case
+        self.operations = operations
+        self.expected = expected
+        self.actual = actual
+    
+    def reproducer(self) -> str:
+        """
+        Formats the operations as a JSON input line.
+        
+        Unit costs are written as their exact decimal literals.
+        
+        Returns:
+            Input line reproducing the mismatch
+        """
+        return "[" + ", ".join(
+            f'{{"operation": "{operation.operation_type.value}", "unit-cost": {operation.unit_cost}, "quantity": {operation.quantity}}}'
+            for operation in self.operations
+        ) + "]"
+    
+    def summary(self) -> str:
+        """
+        Describes the mismatch on a few lines.
+        
+        Returns:
+            Human readable description
+        """
+        return (
+            f"{self.engine}: case {self.case} differs after shrinking to {len(self.operations)} operations\n"
+            f"  input:    {self.reproducer()}\n"
+            f"  expected: {self.expected}\n"
+            f"  actual:   {self.actual}"
+        )
+
+
+def load_engine(name: str) -> Engine:
+    """
+    Builds an engine from a built-in name or a 'module:function' factory.
+    
+    Args:
+        name: Engine name
+    
+    Returns:
+        Function calculating the taxes of a list of operations
+    
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name in ENGINES:
+        return ENGINES[name]()
+    module, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown engine: {name}")
+    return getattr(importlib.import_module(module), attribute)()
+
+
+def outcome(engine: Engine, operations: List[Operation]) -> Optional[str]:
+    """
+    Runs an engine and normalizes its result for comparison.
+    
+    Args:
+        engine: Engine to run
+        operations: Operations of the case
+    
+    Returns:
+        Comparable description of the taxes or of the error raised, or None
+        if the engine does not support the case
+    """
+    try:
+        taxes = engine(operations)
+    except Unsupported:
+        return None
+    except Exception as error:
+        return f"error {type(error).__name__}"
+    normalized = []
+    for tax in taxes:
+        if isinstance(tax, TaxResult):
+            tax = tax.tax
+        elif not isinstance(tax, Decimal):
+            tax = Decimal(int(tax)).scaleb(-2)
+        normalized.append(tax.normalize())
+    return "[" + ", ".join(str(tax) for tax in normalized) + "]"
+
+
+def shrink(operations: List[Operation], fails: Callable[[List[Operation]], bool]) -> List[Operation]:
+    """
+    Reduces a failing operation sequence to a minimal one that still fails.
+    
+    Chunks of operations are removed, halving the chunk size down to single
+    operations, and then every remaining operation is simplified (smaller
+    quantities, rounder prices) while the failure persists.
+    
+    Args:
+        operations: Failing sequence
+        fails: Predicate telling whether a sequence still fails
+    
+    Returns:
+        Sequence no single removal or simplification can reduce further
+    """
+    operations = list(operations)
+    changed = True
+    while changed:
+        changed = False
+        size = max(len(operations) // 2, 1)
+        while size >= 1:
+            start = 0
+            while start < len(operations):
+                candidate = operations[:start] + operations[start + size:]
+                if candidate and fails(candidate):
+                    operations = candidate
+                    changed = True
+                else:
+                    start += size
+            size //= 2
+        
+        for position, operation in enumerate(operations):
+            for simpler in _simplifications(operation):
+                candidate = operations[:position] + [simpler] + operations[position + 1:]
+                if fails(candidate):
+                    operations = candidate
+                    operation = simpler
+                    changed = True
+    return operations
+
+
+def _simplifications(operation: Operation) -> List[Operation]:
+    """Returns simpler variants of an operation, simplest first."""
+    variants = []
+    quantity, unit_cost = operation.quantity, operation.unit_cost
+    for simpler_quantity in (1, quantity // 2):
+        if 0 < simpler_quantity < quantity:
+            variants.append(Operation(operation.operation_type, unit_cost, simpler_quantity))
+    for simpler_cost in (unit_cost.to_integral_value(), unit_cost.quantize(Decimal("0.1")), unit_cost.quantize(Decimal("0.01"))):
+        if simpler_cost != unit_cost and simpler_cost > 0:
+            variants.append(Operation(operation.operation_type, simpler_cost, quantity))
+    return variants
+
+
+def run_cases(names: Sequence[str], seed: int, start: int, stop: int, max_length: int = 30, max_mismatches: int = 1) -> Tuple[int, List[Mismatch]]:
+    """
+    Runs a range of cases against every engine, without shrinking.
+    
+    Args:
+        names: Engines under test
+        seed: Seed of the run
+        start: First case index
+        stop: Case index after the last one
+        max_length: Longest generated sequence
+        max_mismatches: Mismatches per engine after which the engine is no longer run
+    
+    Returns:
+        Number of comparisons made and the mismatches found
+    """
+    reference = TaxCalculator().calculate_taxes
+    engines = {name: load_engine(name) for name in names}
+    found: Dict[str, int] = dict.fromkeys(names, 0)
+    mismatches = []
+    comparisons = 0
+    
+    for index in range(start, stop):
+        operations = generate_case(seed, index, max_length)
+        expected = outcome(reference, operations)
+        for name, engine in engines.items():
+            if found[name] >= max_mismatches:
+                continue
+            actual = outcome(engine, operations)
+            if actual is None:
+                continue
+            comparisons += 1
+            if actual != expected:
+                found[name] += 1
+                mismatches.append(Mismatch(name, index, operations, expected, actual))
+    return comparisons, mismatches
+
+
+def fuzz(
+    names: Sequence[str],
+    seed: int = 0,
+    cases: int = 10000,
+    workers: int = 1,
+    max_length: int = 30,
+    chunk_cases: int = 2000,
+    max_mismatches: int = 1
+) -> Tuple[int, List[Mismatch]]:
+    """
+    Runs the differential fuzzer and shrinks every mismatch found.
+    
+    Cases are split into chunks run on a process pool when several workers
+    are requested; engines are built once per chunk.
+    
+    Args:
+        names: Engines under test
+        seed: Seed of the run
+        cases: Number of generated cases
+        workers: Number of worker processes
+        max_length: Longest generated sequence
+        chunk_cases: Number of cases per task
+        max_mismatches: Mismatches reported per engine
+    
+    Returns:
+        Number of comparisons made and the shrunk mismatches
+    """
+    ranges = [(start, min(start + chunk_cases, cases)) for start in range(0, cases, chunk_cases)]
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_cases, names, seed, start, stop, max_length, max_mismatches)
+                for start, stop in ranges
+            ]
+            chunks = [future.result() for future in futures]
+    else:
+        chunks = [run_cases(names, seed, start, stop, max_length, max_mismatches) for start, stop in ranges]
+    
+    comparisons = sum(count for count, _ in chunks)
+    reported: Dict[str, List[Mismatch]] = {}
+    for _, mismatches in chunks:
+        for mismatch in mismatches:
+            reported.setdefault(mismatch.engine, []).append(mismatch)
+    
+    reference = TaxCalculator().calculate_taxes
+    shrunk = []
+    for name, mismatches in reported.items():
+        engine = load_engine(name)
+        
+        def fails(operations: List[Operation]) -> bool:
+            actual = outcome(engine, operations)
+            return actual is not None and actual != outcome(reference, operations)
+        
+        for mismatch in sorted(mismatches, key=lambda mismatch: mismatch.case)[:max_mismatches]:
+            operations = shrink(mismatch.operations, fails)
+            shrunk.append(Mismatch(name, mismatch.case, operations, outcome(reference, operations), outcome(engine, operations)))
+    return comparisons, shrunk
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments of the fuzzer."""
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the tax engines against TaxCalculator")
+    parser.add_argument(
+        "--engine",
+        action="append",
+        help=f"engine under test, one of {', '.join(ENGINES)} or module:factory (default: all built-in)"
+    )
+    parser.add_argument("--cases", type=int, default=10000, help="number of generated cases")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--max-length", type=int, default=30, help="longest generated operation sequence")
+    parser.add_argument("--chunk-cases", type=int, default=2000, help="cases per worker task")
+    parser.add_argument("--max-mismatches", type=int, default=1, help="mismatches reported per engine")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Runs the fuzzer and returns 1 if any engine differs from the reference."""
+    args = parse_args(argv)
+    names = args.engine or [name for name in ENGINES if name != "vectorized" or _has_numpy()]
+    start = time.perf_counter()
+    comparisons, mismatches = fuzz(
+        names, args.seed, args.cases, args.workers, args.max_length, args.chunk_cases, args.max_mismatches
+    )
+    seconds = time.perf_counter() - start
+    
+    for mismatch in mismatches:
+        print(mismatch.summary())
+    print(
+        f"{args.cases} cases, {comparisons} comparisons against {len(names)} engines in {seconds:.1f}s "
+        f"({args.cases / seconds if seconds else 0:.0f} cases/s), {len(mismatches)} mismatches",
+        file=sys.stderr
+    )
+    return 1 if mismatches else 0
+
+
+def _has_numpy() -> bool:
+    """Whether NumPy is installed for the vectorized engine."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Seeded generator of operation sequences aimed at the edge cases of the tax rules.
+
+Every case is derived from (seed, index) alone, so any case found by a run
+on any number of processes can be regenerated on its own.
+"""
+
+import random
+from decimal import Decimal
+from typing import List
+
+from src.models.operation import Operation, OperationType
+from src.services.tax_calculator import TaxCalculator
+
+
+CENT = Decimal("0.01")
+EXEMPTION_LIMIT = Decimal("20000")
+
+
+def case_rng(seed: int, index: int) -> random.Random:
+    """
+    Returns the random generator of one case.
+    
+    Args:
+        seed: Seed of the whole run
+        index: Index of the case in the run
+    
+    Returns:
+        Generator seeded from both values
+    """
+    return random.Random((seed << 40) ^ index)
+
+
+def generate_case(seed: int, index: int, max_length: int = 30) -> List[Operation]:
+    """
+    Generates the operations of one case.
+    
+    Args:
+        seed: Seed of the whole run
+        index: Index of the case in the run
+        max_length: Longest sequence generated
+    
+    Returns:
+        Operations of the case
+    """
+    return generate_operations(case_rng(seed, index), max_length)
+
+
+def generate_operations(rng: random.Random, max_length: int = 30) -> List[Operation]:
+    """
+    Generates a random operation sequence biased towards the tax rule edge cases.
+    
+    A reference calculator follows the sequence as it is built, so sells can
+    target the current state: totals exactly at and around the 20000
+    exemption, profits just below, at and above the accumulated loss
+    (partial deductions), and buys whose new weighted average lands on a
+    half cent. Occasional fractional-cent prices, huge quantities and sells
+    of more shares than held (always last) exercise the engines' fallbacks.
+    
+    Args:
+        rng: Random number generator
+        max_length: Longest sequence generated
+    
+    Returns:
+        Operations of the sequence
+    """
+    calculator = TaxCalculator()
+    operations = []
+    for _ in range(rng.randint(1, max_length)):
+        shares = calculator.total_shares
+        if shares <= 0 or rng.random() < 0.45:
+            operation = _buy(rng, calculator)
+        else:
+            operation = _sell(rng, calculator)
+        operations.append(operation)
+        if operation.operation_type is OperationType.SELL and operation.quantity > shares:
+            # Nothing is well defined after an oversell, so it ends the case
+            break
+        calculator.append_operations([operation])
+    return operations
+
+
+def _buy(rng: random.Random, calculator: TaxCalculator) -> Operation:
+    """Generates a buy, often one whose weighted average is a rounding tie."""
+    roll = rng.random()
+    shares = calculator.total_shares
+    if roll < 0.25 and shares > 0:
+        # Choose a quantity and total so the new average ends in half a cent
+        quantity = rng.choice((1, 2, 4, 10, 20, 50, 100, shares))
+        total_shares = shares + quantity
+        target = Decimal(rng.randint(100, 10000)) / 100 + Decimal("0.005")
+        unit_cost = ((target * total_shares - calculator.weighted_average_price * shares) / quantity).quantize(CENT)
+        if unit_cost > 0:
+            return Operation("buy", unit_cost, quantity)
+    if roll < 0.3:
+        return Operation("buy", Decimal(rng.randint(1, 100000)) / 1000, rng.randint(1, 1000))
+    if roll < 0.33:
+        return Operation("buy", _price(rng), rng.randint(10 ** 12, 10 ** 16))
+    return Operation("buy", _price(rng), rng.choice((rng.randint(1, 100), rng.randint(1, 10000))))
+
+
+def _sell(rng: random.Random, calculator: TaxCalculator) -> Operation:
+    """Generates a sell aimed at the exemption limit, the loss deduction or a plain outcome."""
+    shares = calculator.total_shares
+    quantity = rng.randint(1, shares) if rng.random() < 0.95 else shares + rng.randint(1, 100)
+    average = calculator.weighted_average_price
+    loss = calculator.accumulated_loss
+    roll = rng.random()
+    
+    if roll < 0.3:
+        # Total value exactly at the limit, or one cent either side
+        unit_cost = (EXEMPTION_LIMIT / quantity).quantize(CENT) + CENT * rng.choice((-1, 0, 0, 1))
+        if unit_cost * quantity != EXEMPTION_LIMIT and rng.random() < 0.5:
+            quantity = rng.choice([divisor for divisor in (1, 2, 4, 5, 8, 10, 16, 20, 25, 40, 50, 80, 100, 125, 160, 200) if divisor <= shares] or [1])
+            unit_cost = EXEMPTION_LIMIT / quantity
+    elif roll < 0.6 and loss > 0:
+        # Profit just below, at or above the accumulated loss
+        unit_cost = (average + loss / quantity).quantize(CENT) + CENT * rng.choice((-1, 0, 1, 2))
+    else:
+        unit_cost = _price(rng)
+    return Operation("sell", max(unit_cost, CENT), quantity)
+
+
+def _price(rng: random.Random) -> Decimal:
+    """Generates a whole-cent unit price."""
+    return Decimal(rng.choice((rng.randint(1, 10000), rng.randint(1, 200000)))) / 100
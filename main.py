@@ -1,15 +1,376 @@
 """
 Main entry point for the capital gains tax calculation application.
+
+Plain invocations without arguments take a fast path that only imports the
+modules needed to read standard input; argument parsing and every optional
+feature are imported on demand.
 """
 
-from src.capital_gains_cli import CapitalGainsCLI
+import sys
+
+
+def parse_args(argv=None) -> 'argparse.Namespace':
+    """
+    Parses the command line arguments.
+    
+    Args:
+        argv: Argument list, defaults to sys.argv[1:]
+    
+    Returns:
+        Parsed arguments
+    """
+    import argparse
+    from src.services.tax_calculator import ENGINES
+    from src.services.portfolio_calculator import LOSS_POOLS
+    from src.services.validator import VALIDATION_MODES
+    from src.utils.binary_format import FORMATS
+    from src.utils.json_codec import BACKENDS
+    
+    parser = argparse.ArgumentParser(description="Capital gains tax calculator")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write results incrementally as they are calculated"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes used to process lines in parallel (default: 1, or the CPU count for --serve)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="number of lines sent to a worker at a time"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="decimal",
+        help="arithmetic engine used for the tax calculation"
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=BACKENDS,
+        help="JSON decoding backend (default: the fastest one installed)"
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=FORMATS,
+        default="json",
+        help="format of standard input: JSON lines or binary columnar records"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=FORMATS,
+        default="json",
+        help="format of standard output: JSON lines or binary columnar records"
+    )
+    parser.add_argument(
+        "--portfolio",
+        choices=LOSS_POOLS,
+        help="track each ticker separately, with a shared or per-asset loss pool"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="worker processes the tickers of large portfolios are sharded across (per-asset only)"
+    )
+    parser.add_argument(
+        "--validate",
+        choices=VALIDATION_MODES,
+        help="check every operation first: reject invalid simulations (strict) or skip invalid operations (lenient)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="number of results kept in the LRU result cache (0 disables it)"
+    )
+    parser.add_argument(
+        "--cache-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="maximum approximate size of the result cache in bytes"
+    )
+    parser.add_argument(
+        "--prefix-cache",
+        type=int,
+        default=0,
+        help="number of operations kept in the prefix state cache (0 disables it)"
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="print cache counters to stderr when finished"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="read stdin on a separate thread and write outputs in adaptive batches"
+    )
+    parser.add_argument(
+        "--batch-lines",
+        type=int,
+        default=1024,
+        help="largest number of output lines written at once (--batch)"
+    )
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=10.0,
+        help="longest time in milliseconds a batched output may wait (--batch)"
+    )
+    parser.add_argument(
+        "--batch-stats",
+        action="store_true",
+        help="print queue depth, batch size and latency statistics to stderr (--batch)"
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=("json", "prometheus"),
+        help="collect per-stage timers and counters and export them in this format"
+    )
+    parser.add_argument(
+        "--metrics-output",
+        help="file receiving the metrics (default: stderr)"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        help="profile the run with cProfile, saving to this file or printing to stderr"
+    )
+    parser.add_argument(
+        "--explain",
+        metavar="FILE",
+        help="write how the tax of every operation was calculated to this file (.csv for CSV, JSON lines otherwise)"
+    )
+    parser.add_argument(
+        "--state-store",
+        metavar="DB",
+        help="read account lines ({\"account\": ..., \"operations\": [...]}) and keep each account's state in this SQLite file"
+    )
+    parser.add_argument(
+        "--input",
+        nargs="+",
+        metavar="FILE",
+        help="process these files (plain or .gz) instead of reading stdin"
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="FEED",
+        help="merge feeds of timestamped operations (one JSON object per line) into one simulation"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="directory receiving one .out file per input file"
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        help="run a long-lived server on this TCP address instead of reading stdin"
+    )
+    parser.add_argument(
+        "--unix-socket",
+        help="run a long-lived server on this Unix socket instead of reading stdin"
+    )
+    parser.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        help="run a shard worker for a distributed run on this TCP address"
+    )
+    parser.add_argument(
+        "--coordinate",
+        nargs="+",
+        metavar="HOST:PORT",
+        help="process the --input files on these shard workers"
+    )
+    parser.add_argument(
+        "--shard-lines",
+        type=int,
+        default=1000,
+        help="number of simulation lines sent to a worker at a time (--coordinate)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="times a failed shard is sent again before giving up (--coordinate)"
+    )
+    args = parser.parse_args(argv)
+    workers = args.workers or 1
+    binary = args.input_format != "json" or args.output_format != "json"
+    if args.stream and workers > 1:
+        parser.error("--stream cannot be combined with --workers")
+    if args.stream and (args.cache_size > 0 or args.prefix_cache > 0):
+        parser.error("--stream cannot be combined with --cache-size or --prefix-cache")
+    if args.coordinate and not args.input:
+        parser.error("--coordinate requires --input")
+    if args.batch and (args.input or args.merge or args.state_store):
+        parser.error("--batch only applies to standard input simulations, not --input, --merge or --state-store")
+    if args.batch and (args.stream or workers > 1 or binary):
+        parser.error("--batch cannot be combined with --stream, --workers or binary formats")
+    if args.explain and (args.portfolio or args.cache_size > 0 or args.prefix_cache > 0 or workers > 1 or args.stream or binary):
+        parser.error("--explain cannot be combined with --portfolio, --cache-size, --prefix-cache, --workers, --stream or binary formats")
+    if args.portfolio and args.prefix_cache > 0:
+        parser.error("--portfolio cannot be combined with --prefix-cache")
+    if args.shards > 1 and args.portfolio != "per-asset":
+        parser.error("--shards requires --portfolio per-asset")
+    if args.metrics:
+        conflicts = metrics_conflicts(args)
+        if conflicts:
+            parser.error(f"--metrics cannot be combined with {', '.join(conflicts)}")
+    return args
 
 
-def main():
+def metrics_conflicts(args: 'argparse.Namespace') -> list:
+    """
+    Returns the options whose work --metrics would not see.
+    
+    The instrumentation wraps the per-operation stages of the decimal engine
+    in the current process, so the cents engine, lazy and columnar paths,
+    cache hits, the portfolio engine and other processes would export zero
+    or partial counters.
+    """
+    options = {
+        "--engine cents": args.engine != "decimal",
+        "--stream": args.stream,
+        "--workers": (args.workers or 1) > 1,
+        "--cache-size": args.cache_size > 0,
+        "--prefix-cache": args.prefix_cache > 0,
+        "--portfolio": args.portfolio is not None,
+        "--input-format/--output-format binary": args.input_format != "json" or args.output_format != "json",
+        "--merge": bool(args.merge),
+        "--state-store": bool(args.state_store),
+        "--serve/--unix-socket": bool(args.serve or args.unix_socket),
+        "--worker/--coordinate": bool(args.worker or args.coordinate)
+    }
+    return [option for option, conflicts in options.items() if conflicts]
+
+
+def main(argv=None):
     """Main function that starts the application."""
-    cli = CapitalGainsCLI()
-    cli.run()
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        from src.capital_gains_cli import CapitalGainsCLI
+        CapitalGainsCLI().run()
+        return
+    
+    args = parse_args(argv)
+    if args.serve or args.unix_socket:
+        run_server(args)
+        return
+    if args.worker or args.coordinate:
+        run_distributed(args)
+        return
+    
+    import json
+    from contextlib import ExitStack
+    from src.capital_gains_cli import CapitalGainsCLI
+    
+    cli = CapitalGainsCLI(
+        streaming=args.stream,
+        workers=args.workers or 1,
+        chunk_size=args.chunk_size,
+        engine=args.engine,
+        cache_size=args.cache_size,
+        cache_bytes=args.cache_bytes,
+        prefix_cache_size=args.prefix_cache,
+        json_backend=args.json_backend,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        portfolio=args.portfolio,
+        shards=args.shards,
+        validation=args.validate,
+        explain=args.explain,
+        batching=args.batch,
+        batch_lines=args.batch_lines,
+        batch_delay=args.batch_delay / 1000
+    )
+    with ExitStack() as stack:
+        if cli.audit is not None:
+            stack.callback(cli.audit.close)
+        instrumentation = None
+        if args.metrics:
+            from src.utils.instrumentation import Instrumentation
+            instrumentation = stack.enter_context(Instrumentation())
+        if args.profile:
+            from src.utils.instrumentation import profiled
+            stack.enter_context(profiled(None if args.profile == "-" else args.profile))
+        
+        if args.state_store:
+            from src.services.state_store import StateStore
+            with StateStore(args.state_store) as store:
+                cli.process_accounts(sys.stdin, store)
+        elif args.merge:
+            cli.process_feeds(args.merge)
+        elif args.input:
+            cli.process_files(args.input, args.output_dir)
+        else:
+            cli.run()
+    
+    if instrumentation is not None:
+        instrumentation.export(args.metrics, args.metrics_output)
+    if args.cache_stats:
+        stats = {}
+        if cli.cache is not None:
+            stats["result-cache"] = cli.cache.stats()
+        if cli.prefix_cache is not None:
+            stats["prefix-cache"] = cli.prefix_cache.stats()
+        print(json.dumps(stats), file=sys.stderr)
+    if args.batch_stats and cli.pipeline_stats is not None:
+        print(json.dumps(cli.pipeline_stats.to_dict()), file=sys.stderr)
+
+
+def run_server(args: 'argparse.Namespace'):
+    """Runs the asyncio server until interrupted."""
+    import asyncio
+    from src.capital_gains_server import serve
+    
+    host, port = None, 0
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        port = int(port)
+    try:
+        asyncio.run(serve(host, port, args.unix_socket, cli_options=cli_options(args), workers=args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_distributed(args: 'argparse.Namespace'):
+    """Runs a shard worker until interrupted, or coordinates a distributed run."""
+    import asyncio
+    from src.capital_gains_cluster import coordinate_files, parse_address, serve_worker
+    
+    if args.coordinate:
+        workers = [parse_address(address) for address in args.coordinate]
+        coordinate_files(args.input, workers, args.output_dir, shard_lines=args.shard_lines, max_retries=args.retries)
+        return
+    host, port = parse_address(args.worker)
+    try:
+        asyncio.run(serve_worker(host, port, cli_options=cli_options(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+def cli_options(args: 'argparse.Namespace') -> dict:
+    """Returns the CapitalGainsCLI options shared by every long-lived mode."""
+    return {
+        "engine": args.engine,
+        "cache_size": args.cache_size,
+        "cache_bytes": args.cache_bytes,
+        "prefix_cache_size": args.prefix_cache,
+        "json_backend": args.json_backend,
+        "portfolio": args.portfolio,
+        "shards": args.shards,
+        "validation": args.validate
+    }
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,10 +3,25 @@ Main module that implements the command line interface for tax calculation.
 """
 
 import sys
+from array import array
 import json
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Union
 
-from src.services.tax_calculator import TaxCalculator
-from src.utils.json_utils import parse_operations, format_results
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator, ZERO
+from src.utils.json_codec import JsonCodec, default_codec
+from src.utils.json_utils import parse_operations, iter_operations, format_results, format_cents, ResultWriter
+
+if TYPE_CHECKING:
+    from src.services.state_store import StateStore
+    from src.utils.file_utils import FileReport
+
+# Optional features (caches, file input, worker pools) import their modules on
+# first use so that short-lived invocations only pay for what they need.
 
 
 class CapitalGainsCLI:
@@ -14,9 +29,130 @@ class CapitalGainsCLI:
     Class that implements the command line interface for tax calculation.
     """
     
-    def __init__(self):
-        """Initializes the command line interface."""
-        self.calculator = TaxCalculator()
+    def __init__(
+        self,
+        streaming: bool = False,
+        workers: int = 1,
+        chunk_size: int = 64,
+        engine: str = "decimal",
+        cache_size: int = 0,
+        cache_bytes: int = 64 * 1024 * 1024,
+        prefix_cache_size: int = 0,
+        json_backend: Optional[str] = None,
+        input_format: str = "json",
+        output_format: str = "json",
+        portfolio: Optional[str] = None,
+        shards: int = 1,
+        validation: Optional[str] = None,
+        explain: Optional[str] = None,
+        batching: bool = False,
+        batch_lines: int = 1024,
+        batch_delay: float = 0.01
+    ):
+        """
+        Initializes the command line interface.
+        
+        Args:
+            streaming: Whether results are written incrementally as they are
+                calculated instead of being formatted per line first
+            workers: Number of worker processes; values above 1 process
+                independent lines in parallel
+            chunk_size: Number of lines handed to a worker at a time
+            engine: Arithmetic engine used by the tax calculator
+            cache_size: Maximum number of results kept in the result cache;
+                zero disables caching
+            cache_bytes: Maximum approximate size of the result cache
+            prefix_cache_size: Maximum number of operations kept in the
+                prefix state cache; zero disables it
+            json_backend: JSON decoding backend, defaults to the fastest
+                one installed
+            input_format: Format of standard input, 'json' or 'binary'
+            output_format: Format of standard output, 'json' or 'binary'
+            portfolio: Loss pool of the multi-asset engine, 'shared' or
+                'per-asset'; None keeps the single-asset calculator
+            shards: Number of processes the tickers of a simulation are
+                sharded across, for per-asset loss pools
+            validation: Validation pre-pass, 'strict' to reject simulations
+                with invalid operations or 'lenient' to skip those operations
+                with a warning and a zero tax; None disables it
+            explain: Path of a side file receiving how the tax of every
+                operation was calculated, CSV for paths ending in .csv and
+                JSON lines otherwise; None disables explain mode
+            batching: Whether standard input is read by a separate thread and
+                outputs are written in adaptive batches; an interactive
+                terminal flushes every line immediately
+            batch_lines: Largest number of output lines written at once
+            batch_delay: Longest time in seconds a batched output may wait
+        
+        Raises:
+            ValueError: If streaming is combined with workers or caches, the validation
+                mode is unknown, the portfolio
+                engine is combined with the prefix cache, or explain mode is
+                combined with caches, workers, streaming or binary formats,
+                or batching is combined with workers, streaming or binary
+                formats
+        """
+        if streaming and workers > 1:
+            raise ValueError("Streaming writes results from a single process and cannot use workers")
+        if streaming and (cache_size > 0 or prefix_cache_size > 0):
+            raise ValueError("Streaming calculates every line as it is read and cannot use caches")
+        if batching and (streaming or workers > 1 or input_format != "json" or output_format != "json"):
+            raise ValueError("Batching only applies to the default single-process JSON mode")
+        if explain is not None and (
+            portfolio is not None or cache_size > 0 or prefix_cache_size > 0 or workers > 1 or streaming
+            or input_format != "json" or output_format != "json"
+        ):
+            raise ValueError("Explain mode only supports the single-asset, single-process JSON mode without caches")
+        if portfolio is not None:
+            if prefix_cache_size > 0:
+                raise ValueError("The prefix cache does not support the portfolio engine")
+            from src.services.portfolio_calculator import PortfolioTaxCalculator
+            self.calculator = PortfolioTaxCalculator(engine, loss_pool=portfolio, shards=shards)
+        elif explain is not None:
+            from src.services.audit import ExplainingTaxCalculator
+            self.calculator = ExplainingTaxCalculator(engine)
+        else:
+            self.calculator = TaxCalculator(engine=engine)
+        self.audit = None
+        if explain is not None:
+            from src.services.audit import AuditWriter
+            self.audit = AuditWriter(explain)
+        self.portfolio = portfolio
+        self.engine = engine
+        self.streaming = streaming
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache = None
+        if cache_size > 0:
+            from src.utils.result_cache import ResultCache
+            self.cache = ResultCache(cache_size, cache_bytes)
+        self.prefix_cache = None
+        if prefix_cache_size > 0:
+            from src.services.prefix_cache import PrefixStateCache
+            self.prefix_cache = PrefixStateCache(prefix_cache_size)
+        self.codec = JsonCodec(json_backend) if json_backend is not None else None
+        self.input_format = input_format
+        self.output_format = output_format
+        if validation is not None:
+            from src.services.validator import VALIDATION_MODES
+            if validation not in VALIDATION_MODES:
+                raise ValueError(f"Unknown validation mode: {validation}")
+        self.validation = validation
+        self.skipped_operations = 0
+        self.batching = batching
+        self.batch_lines = batch_lines
+        self.batch_delay = batch_delay
+        self.pipeline_stats = None
+        self._worker_options = {
+            "engine": engine,
+            "cache_size": cache_size,
+            "cache_bytes": cache_bytes,
+            "prefix_cache_size": prefix_cache_size,
+            "json_backend": json_backend,
+            "portfolio": portfolio,
+            "shards": shards,
+            "validation": validation
+        }
     
     def process_input(self, input_line: str) -> str:
         """
@@ -24,31 +160,439 @@ class CapitalGainsCLI:
         
         Args:
             input_line: Input line in JSON format
-            
+        
         Returns:
             Result of the processing in JSON format
-            
+        
         Raises:
             json.JSONDecodeError: If the input is not valid JSON
         """
-        operations = parse_operations(input_line)
-        results = self.calculator.calculate_taxes(operations)
-        return format_results(results)
+        if self.audit is not None:
+            return format_results(self._calculate_explained(input_line))
+        if self.cache is not None:
+            key = self.cache.key(input_line)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        if self.validation is not None:
+            results = self._calculate_validated(input_line)
+        else:
+            results = self._calculate(parse_operations(input_line, self.codec))
+        output = format_results(results)
+        
+        # Lines with skipped operations are not cached, so their warnings are repeated
+        if self.cache is not None and not self.skipped_operations:
+            self.cache.put(key, output)
+        return output
+    
+    def _calculate(self, operations: List[Operation]) -> List[TaxResult]:
+        """Calculates the taxes of a simulation, through the prefix cache when enabled."""
+        if self.prefix_cache is not None:
+            return self.prefix_cache.calculate_taxes(self.calculator, operations)
+        return self.calculator.calculate_taxes(operations)
+    
+    def _calculate_explained(self, input_line: str) -> List[TaxResult]:
+        """Calculates a simulation in explain mode, writing its trail even when it fails."""
+        self.calculator.trail.clear()
+        try:
+            if self.validation is not None:
+                return self._calculate_validated(input_line)
+            return self.calculator.calculate_taxes(parse_operations(input_line, self.codec))
+        finally:
+            self.audit.write(self.calculator.trail)
+    
+    def _calculate_validated(self, input_line: str) -> List[TaxResult]:
+        """
+        Validates a simulation before calculating it.
+        
+        The number of operations skipped in lenient mode is kept in
+        skipped_operations.
+        
+        Raises:
+            SimulationValidationError: In strict mode, if any operation is invalid
+        """
+        from src.services.validator import SimulationValidationError, validate_records
+        
+        self.skipped_operations = 0
+        records = (self.codec or default_codec()).loads(input_line)
+        issues = validate_records(records, per_ticker=self.portfolio is not None)
+        if not issues:
+            return self._calculate([Operation.from_dict(record) for record in records])
+        if self.validation == "strict":
+            raise SimulationValidationError(issues)
+        
+        for issue in issues:
+            print(f"Warning: skipped {issue}", file=sys.stderr)
+        skipped = {issue.index for issue in issues}
+        self.skipped_operations = len(skipped)
+        kept = [index for index in range(len(records)) if index not in skipped]
+        results = iter(self._calculate([Operation.from_dict(records[index]) for index in kept]))
+        if self.audit is not None:
+            self.calculator.trail.renumber(kept)
+        return [TaxResult(ZERO) if index in skipped else next(results) for index in range(len(records))]
+    
+    def process_line(self, input_line: str) -> str:
+        """
+        Processes an input line, reporting failures as error messages.
+        
+        Args:
+            input_line: Input line in JSON format
+        
+        Returns:
+            Result of the processing in JSON format, or the error message
+        """
+        try:
+            return self.process_input(input_line)
+        except json.JSONDecodeError:
+            return "Error: Invalid JSON format"
+        except Exception as e:
+            return f"Error: {str(e)}"
     
     def run(self):
         """
         Executes the command line input/output processing.
         Reads from standard input and writes to standard output.
         """
+        if self.input_format != "json" or self.output_format != "json":
+            self._run_binary()
+            return
+        if self.streaming:
+            self._run_streaming()
+            return
+        if self.workers > 1:
+            self._run_parallel()
+            return
+        if self.batching:
+            self._run_batched()
+            return
+        
+        for line in self._read_lines():
+            print(self.process_line(line))
+    
+    def _run_binary(self):
+        """
+        Processes standard input or output in the binary columnar format.
+        
+        Binary input is read one record at a time and calculated straight
+        from its columns with calculate_batch; JSON input lines are calculated as usual.
+        Results are written as binary records or as the usual output lines.
+        Caches, streaming and workers only apply to the JSON mode.
+        """
+        from src.utils import binary_format
+        
+        if self.input_format == "binary":
+            results = map(self._calculate_batch, binary_format.read_batches(sys.stdin.buffer))
+        else:
+            results = map(self._calculate_line, self._read_lines())
+        
+        if self.output_format == "binary":
+            output = sys.stdout.buffer
+            output.write(binary_format.stream_header(binary_format.RESULTS_MAGIC))
+            for result in results:
+                if isinstance(result, str):
+                    output.write(binary_format.encode_error(result))
+                else:
+                    output.write(binary_format.encode_taxes(result))
+            output.flush()
+        else:
+            for result in results:
+                print("Error: " + result if isinstance(result, str) else format_cents(result))
+    
+    def _calculate_batch(self, batch: OperationBatch) -> Union[array, str]:
+        """Calculates the taxes in cents of a batch, or returns the error message."""
+        try:
+            if self.validation is not None:
+                return self._calculate_batch_validated(batch)
+            return self.calculator.calculate_batch(batch)
+        except Exception as e:
+            return str(e)
+    
+    def _calculate_batch_validated(self, batch: OperationBatch) -> array:
+        """Validates a batch before calculating it, like _calculate_validated."""
+        from src.services.validator import SimulationValidationError, validate_batch
+        
+        issues = validate_batch(batch)
+        if not issues:
+            return self.calculator.calculate_batch(batch)
+        if self.validation == "strict":
+            raise SimulationValidationError(issues)
+        
+        for issue in issues:
+            print(f"Warning: skipped {issue}", file=sys.stderr)
+        skipped = {issue.index for issue in issues}
+        kept = [index for index in range(len(batch)) if index not in skipped]
+        valid = OperationBatch(
+            bytearray(batch.types[index] for index in kept),
+            array('q', [batch.prices[index] for index in kept]),
+            array('q', [batch.quantities[index] for index in kept])
+        )
+        taxes = array('q', bytes(8 * len(batch)))
+        for index, tax in zip(kept, self.calculator.calculate_batch(valid)):
+            taxes[index] = tax
+        return taxes
+    
+    def _calculate_line(self, input_line: str) -> Union[array, str]:
+        """Calculates the taxes in cents of a JSON line, or returns the error message."""
+        try:
+            if self.validation is not None:
+                results = self._calculate_validated(input_line)
+            else:
+                results = self.calculator.calculate_taxes(parse_operations(input_line, self.codec))
+            return array('q', [int(result.tax.scaleb(2)) for result in results])
+        except json.JSONDecodeError:
+            return "Invalid JSON format"
+        except Exception as e:
+            return str(e)
+    
+    @staticmethod
+    def _read_lines() -> Iterator[str]:
+        """Yields stripped standard input lines until the first empty one."""
         for line in sys.stdin:
             line = line.strip()
             if not line:
                 break
+            yield line
+    
+    def process_files(self, paths: List[str], output_dir: str = ".", chunk_bytes: int = 8 * 1024 * 1024) -> List['FileReport']:
+        """
+        Processes whole files of simulation lines, one output file per input.
+        
+        Input files are memory-mapped (or decompressed when gzip) and read in
+        line-aligned chunks; each chunk is processed, on the worker pool when
+        several workers are configured, and written with a single buffered
+        write. Empty lines are skipped. A throughput summary of every file is
+        printed to standard error.
+        
+        Args:
+            paths: Paths of the input files
+            output_dir: Directory receiving the .out files
+            chunk_bytes: Approximate size of each chunk read
+        
+        Returns:
+            Throughput report of each file
+        
+        Raises:
+            ValueError: If two inputs would write the same output file, or
+                batching is configured, which only applies to standard input
+        """
+        from src.utils.file_utils import FileReport, iter_line_chunks, output_paths_for
+        
+        if self.batching:
+            raise ValueError("Batching only applies to standard input")
+        output_paths = output_paths_for(paths, output_dir)
+        reports = []
+        executor = self._create_pool() if self.workers > 1 else None
+        
+        try:
+            for path, output_path in zip(paths, output_paths):
+                start = time.perf_counter()
+                lines = 0
+                size = 0
+                
+                with open(output_path, "w", buffering=1024 * 1024) as output_file:
+                    for chunk in iter_line_chunks(path, chunk_bytes):
+                        size += sum(len(line) + 1 for line in chunk)
+                        chunk = [line for line in (line.strip() for line in chunk) if line]
+                        if not chunk:
+                            continue
+                        if executor is not None:
+                            outputs = executor.map(_process_line_in_worker, chunk, chunksize=self.chunk_size)
+                        else:
+                            outputs = map(self.process_line, chunk)
+                        output_file.write("\n".join(outputs) + "\n")
+                        lines += len(chunk)
+                
+                report = FileReport(path, output_path, lines, size, time.perf_counter() - start)
+                print(report.summary(), file=sys.stderr)
+                reports.append(report)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        return reports
+    
+    def process_feeds(self, paths: List[str]):
+        """
+        Merges time-ordered feed files into one simulation and prints its taxes.
+        
+        Each feed holds one JSON operation with a timestamp per line and is
+        read lazily; the feeds are merged in timestamp order and streamed
+        through the calculator, so memory stays bounded by the number of
+        feeds. The taxes are written as a single output line, in merged order;
+        in explain mode the trail of the merged simulation is written as well.
+        
+        Args:
+            paths: Paths of the feed files, also the order ties are broken in
+        """
+        from src.utils.stream_merge import iter_feed, merge_operations
+        
+        writer = ResultWriter(sys.stdout)
+        feeds = [iter_feed(path, self.codec) for path in paths]
+        try:
+            writer.write_line(self.calculator.iter_taxes(merge_operations(*feeds)))
+        except json.JSONDecodeError:
+            self._finish_partial_line(writer)
+            print("Error: Invalid JSON format")
+        except Exception as e:
+            self._finish_partial_line(writer)
+            print(f"Error: {str(e)}")
+        finally:
+            for feed in feeds:
+                feed.close()
+            if self.audit is not None:
+                self.audit.write(self.calculator.trail)
+    
+    def process_accounts(self, lines: Iterable[str], store: 'StateStore', chunk_lines: int = 100000):
+        """
+        Processes the operations of many accounts on top of their stored states.
+        
+        Each line is a JSON object with an 'account' identifier and the new
+        'operations' of that account. Lines are read in chunks whose accounts
+        are prefetched from the store at once; each account resumes from its
+        stored state (or from scratch when it has none) and its new state is
+        written back. One output line is printed per input line, and in
+        explain mode one simulation is written to the trail per input line.
+        
+        Args:
+            lines: Input lines; empty lines are skipped
+            store: Store holding the state of each account
+            chunk_lines: Number of lines whose accounts are prefetched together
+        
+        Raises:
+            ValueError: If the portfolio engine is configured
+        """
+        if self.portfolio is not None:
+            raise ValueError("Account states are only supported by the single-asset engine")
+        codec = self.codec or default_codec()
+        lines = (line for line in (line.strip() for line in lines) if line)
+        
+        while True:
+            chunk = list(islice(lines, chunk_lines))
+            if not chunk:
+                break
+            records = []
+            for line in chunk:
+                try:
+                    records.append(codec.loads(line))
+                except json.JSONDecodeError:
+                    records.append(None)
+            store.prefetch(str(record["account"]) for record in records if isinstance(record, dict) and "account" in record)
             
+            outputs = []
+            for record in records:
+                if self.audit is not None:
+                    self.calculator.trail.clear()
+                try:
+                    if record is None:
+                        outputs.append("Error: Invalid JSON format")
+                    else:
+                        outputs.append(self._process_account(record, store))
+                except Exception as e:
+                    outputs.append(f"Error: {str(e)}")
+                finally:
+                    if self.audit is not None:
+                        self.audit.write(self.calculator.trail)
+            print("\n".join(outputs))
+        store.flush()
+    
+    def _process_account(self, record: object, store: 'StateStore') -> str:
+        """Calculates the new operations of one account line and stores its new state."""
+        if not isinstance(record, dict) or "account" not in record or "operations" not in record:
+            raise ValueError("Account lines must be objects with 'account' and 'operations'")
+        account = str(record["account"])
+        operations = [Operation.from_dict(operation) for operation in record["operations"]]
+        
+        state = store.get(account)
+        if state is None:
+            self.calculator.reset_state()
+        results = self.calculator.append_operations(operations, state)
+        store.put(account, self.calculator.export_state())
+        return format_results(results)
+    
+    def _create_pool(self):
+        """Creates the worker process pool configured like this instance."""
+        from concurrent.futures import ProcessPoolExecutor
+        
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self._worker_options,)
+        )
+    
+    def _run_parallel(self):
+        """
+        Processes standard input lines on a pool of worker processes.
+        
+        Lines are read in bounded batches and dispatched to the pool in
+        chunks; outputs are written in input order, one write per batch.
+        """
+        lines = self._read_lines()
+        batch_size = self.workers * self.chunk_size * 4
+        
+        with self._create_pool() as executor:
+            while True:
+                batch = list(islice(lines, batch_size))
+                if not batch:
+                    break
+                outputs = executor.map(_process_line_in_worker, batch, chunksize=self.chunk_size)
+                sys.stdout.write("\n".join(outputs) + "\n")
+    
+    def _run_batched(self):
+        """
+        Processes standard input through the adaptive micro-batching pipeline.
+        
+        Reading overlaps with calculation and outputs are written in batches
+        sized by line count and elapsed time, or line by line when standard
+        input is an interactive terminal. The statistics of the run are kept
+        in pipeline_stats.
+        """
+        from src.utils.micro_batch import MicroBatchPipeline, is_interactive
+        
+        pipeline = MicroBatchPipeline(
+            self.process_line, self.batch_lines, self.batch_delay, immediate=is_interactive(sys.stdin)
+        )
+        self.pipeline_stats = pipeline.stats
+        pipeline.run(sys.stdin, sys.stdout)
+    
+    def _run_streaming(self):
+        """
+        Processes standard input writing each result as soon as it is calculated.
+        
+        Operations are decoded lazily and results are serialized straight to
+        standard output. If a line fails after part of its output was written,
+        the partial line is terminated before the error message is printed.
+        """
+        writer = ResultWriter(sys.stdout)
+        
+        for line in self._read_lines():
             try:
-                result = self.process_input(line)
-                print(result)
+                if self.validation is not None:
+                    writer.write_line(self._calculate_validated(line))
+                else:
+                    writer.write_line(self.calculator.iter_taxes(iter_operations(line, self.codec)))
             except json.JSONDecodeError:
+                self._finish_partial_line(writer)
                 print("Error: Invalid JSON format")
             except Exception as e:
+                self._finish_partial_line(writer)
                 print(f"Error: {str(e)}")
+    
+    @staticmethod
+    def _finish_partial_line(writer: ResultWriter):
+        """Terminates an incomplete output line left by a failed simulation."""
+        if writer.partial:
+            writer.stream.write("\n")
+            writer.partial = False
+
+
+_worker_cli = None
+
+
+def _init_worker(options: dict):
+    """Creates the CLI instance used by a worker process."""
+    global _worker_cli
+    _worker_cli = CapitalGainsCLI(**options)
+
+
+def _process_line_in_worker(input_line: str) -> str:
+    """Processes one line inside a worker process."""
+    return _worker_cli.process_line(input_line)
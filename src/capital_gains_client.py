@@ -0,0 +1,142 @@
+"""
+Module that implements a client for the capital gains server.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Iterable, List, Optional
+
+
+class CapitalGainsClient:
+    """
+    Class that sends simulation lines to a CapitalGainsServer.
+    
+    Lines are pipelined: they are written while earlier results are still
+    being read, and results come back in the order the lines were sent.
+    """
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Initializes the client over an open connection.
+        
+        Args:
+            reader: Stream receiving the results
+            writer: Stream receiving the lines
+        """
+        self.reader = reader
+        self.writer = writer
+    
+    # Maximum accepted length of a single result line
+    MAX_LINE_BYTES = 256 * 1024 * 1024
+    
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int) -> 'CapitalGainsClient':
+        """
+        Connects to a server listening on TCP.
+        
+        Args:
+            host: Server host
+            port: Server port
+            
+        Returns:
+            A connected client
+        """
+        reader, writer = await asyncio.open_connection(host, port, limit=cls.MAX_LINE_BYTES)
+        return cls(reader, writer)
+    
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'CapitalGainsClient':
+        """
+        Connects to a server listening on a Unix socket.
+        
+        Args:
+            path: Filesystem path of the socket
+            
+        Returns:
+            A connected client
+        """
+        reader, writer = await asyncio.open_unix_connection(path, limit=cls.MAX_LINE_BYTES)
+        return cls(reader, writer)
+    
+    async def process_lines(self, lines: Iterable[str]) -> List[str]:
+        """
+        Sends simulation lines and collects their results.
+        
+        Args:
+            lines: JSON simulation lines, without line terminators
+            
+        Returns:
+            Result or error message of each line, in order
+        """
+        lines = [line for line in (line.strip() for line in lines) if line]
+        sender = asyncio.ensure_future(self._send(lines))
+        results = []
+        
+        for _ in lines:
+            output = await self.reader.readline()
+            if not output:
+                raise ConnectionError("Server closed the connection before answering every line")
+            results.append(output.decode("utf-8").rstrip("\n"))
+        
+        await sender
+        return results
+    
+    async def close(self):
+        """Ends the session and closes the connection."""
+        self.writer.write(b"\n")
+        await self.writer.drain()
+        self.writer.close()
+        await self.writer.wait_closed()
+    
+    async def _send(self, lines: List[str]):
+        """Writes the lines, waiting for the server whenever its buffers are full."""
+        for line in lines:
+            self.writer.write(line.encode("utf-8") + b"\n")
+            await self.writer.drain()
+
+
+async def run_client(lines: Iterable[str], host: str = "127.0.0.1", port: int = 0, unix_path: Optional[str] = None) -> List[str]:
+    """
+    Connects to a server, processes the lines and disconnects.
+    
+    Args:
+        lines: JSON simulation lines
+        host: Server host for TCP
+        port: Server port for TCP
+        unix_path: Unix socket path, used instead of TCP when given
+        
+    Returns:
+        Result or error message of each line, in order
+    """
+    if unix_path is not None:
+        client = await CapitalGainsClient.connect_unix(unix_path)
+    else:
+        client = await CapitalGainsClient.connect_tcp(host, port)
+    try:
+        return await client.process_lines(lines)
+    finally:
+        await client.close()
+
+
+def main(argv=None):
+    """Sends standard input lines to a server and prints the results."""
+    parser = argparse.ArgumentParser(description="Capital gains server client")
+    parser.add_argument("--host", default="127.0.0.1", help="server host")
+    parser.add_argument("--port", type=int, default=8765, help="server port")
+    parser.add_argument("--unix-socket", help="server Unix socket path")
+    args = parser.parse_args(argv)
+    
+    lines = []
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            break
+        lines.append(line)
+    
+    for result in asyncio.run(run_client(lines, args.host, args.port, args.unix_socket)):
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+"""
+Module that implements a coordinator distributing simulation files to shard workers over sockets.
+
+Protocol between coordinator and worker, over one TCP connection per worker:
+
+    request:  {"shard": <id>, "lines": <n>} followed by n simulation lines
+    response: {"shard": <id>, "lines": <n>, "seconds": <time>} followed by n result lines
+
+Headers are single-line JSON objects and an empty line ends the session.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from src.capital_gains_cli import CapitalGainsCLI
+
+
+class ShardReport:
+    """
+    Class representing the throughput of one shard processed by a worker.
+    """
+    
+    __slots__ = ("shard", "worker", "lines", "seconds", "attempts")
+    
+    def __init__(self, shard: int, worker: str, lines: int, seconds: float, attempts: int):
+        """
+        Initializes a new report.
+        
+        Args:
+            shard: Index of the shard in the input
+            worker: Address of the worker that processed it
+            lines: Number of simulation lines in the shard
+            seconds: Processing time measured by the worker
+            attempts: Number of times the shard was sent
+        """
+        self.shard = shard
+        self.worker = worker
+        self.lines = lines
+        self.seconds = seconds
+        self.attempts = attempts
+    
+    @property
+    def lines_per_second(self) -> float:
+        """Lines processed per second by the worker."""
+        return self.lines / self.seconds if self.seconds else 0.0
+    
+    def summary(self) -> str:
+        """
+        Formats the report as a single human readable line.
+        
+        Returns:
+            Summary of the throughput
+        """
+        return (
+            f"shard {self.shard} on {self.worker}: {self.lines} lines in {self.seconds:.2f}s "
+            f"({self.lines_per_second:.0f} lines/s, {self.attempts} attempt{'s' if self.attempts > 1 else ''})"
+        )
+
+
+class ShardWorker:
+    """
+    Worker calculating the shards of simulation lines sent by coordinators.
+    
+    Every line goes through CapitalGainsCLI.process_line, so results and
+    error messages are exactly those of a local run. The time spent on each
+    shard is logged to standard error and returned to the coordinator.
+    """
+    
+    def __init__(self, cli_options: Optional[dict] = None, max_line_bytes: int = 256 * 1024 * 1024, log: Optional[TextIO] = None):
+        """
+        Initializes the worker.
+        
+        Args:
+            cli_options: Keyword arguments for the CapitalGainsCLI instance
+            max_line_bytes: Maximum accepted length of a single line
+            log: Stream receiving per-shard throughput lines, standard error by default
+        """
+        self.cli = CapitalGainsCLI(**(cli_options or {}))
+        self.max_line_bytes = max_line_bytes
+        self.log = log
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.address = "local"
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """
+        Starts listening on a TCP address.
+        
+        Args:
+            host: Interface to bind
+            port: Port to bind, zero for an ephemeral one
+        
+        Returns:
+            The listening asyncio server
+        """
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=self.max_line_bytes)
+        self.address = "%s:%d" % self.server.sockets[0].getsockname()[:2]
+        return self.server
+    
+    async def close(self):
+        """Stops listening."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the shards sent over one coordinator connection.
+        
+        Args:
+            reader: Stream of incoming shards
+            writer: Stream receiving the results
+        """
+        try:
+            while True:
+                header = (await reader.readline()).strip()
+                if not header:
+                    break
+                request = json.loads(header)
+                lines = [(await _read_line(reader)).strip() for _ in range(request["lines"])]
+                
+                start = time.perf_counter()
+                outputs = [self.cli.process_line(line) for line in lines]
+                seconds = time.perf_counter() - start
+                print(ShardReport(request["shard"], self.address, len(lines), seconds, 1).summary(), file=self.log or sys.stderr)
+                
+                response = {"shard": request["shard"], "lines": len(outputs), "seconds": seconds}
+                writer.write(_encode_block(json.dumps(response), outputs))
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class Coordinator:
+    """
+    Coordinator splitting simulation lines into shards for a set of workers.
+    
+    Shards of consecutive lines are handed to whichever worker is free, at
+    most two shards per worker ahead of the output, so memory stays bounded.
+    A shard whose worker fails, disconnects or times out is sent again, to
+    any worker, up to max_retries times; a worker that keeps failing is
+    retired. Output is written in input order as soon as the next shard in
+    sequence is complete.
+    """
+    
+    def __init__(
+        self,
+        workers: List[Tuple[str, int]],
+        shard_lines: int = 1000,
+        max_retries: int = 3,
+        timeout: Optional[float] = 300.0,
+        max_line_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initializes the coordinator.
+        
+        Args:
+            workers: Host and port of every worker
+            shard_lines: Number of lines per shard
+            max_retries: Times a shard may be resent, and consecutive
+                failures after which a worker is retired
+            timeout: Seconds a worker may take for one shard, None for no limit
+            max_line_bytes: Maximum accepted length of a single result line
+        
+        Raises:
+            ValueError: If no worker is given
+        """
+        if not workers:
+            raise ValueError("At least one worker is required")
+        self.workers = list(workers)
+        self.shard_lines = shard_lines
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_line_bytes = max_line_bytes
+    
+    async def run(self, lines: Iterable[Union[str, bytes]], output: TextIO) -> List[ShardReport]:
+        """
+        Processes simulation lines on the workers, writing results in order.
+        
+        Lines are sent as they are read, so undecodable bytes reach the
+        worker and come back as an error line, as in a local run.
+        
+        Args:
+            lines: JSON simulation lines, as text or raw bytes; empty lines are skipped
+            output: Text stream receiving one result line per input line
+        
+        Returns:
+            Report of every shard, in shard order
+        
+        Raises:
+            RuntimeError: If a shard fails more than max_retries times or
+                every worker is retired
+            Exception: Whatever reading the lines raised
+        """
+        lines = (line for line in (line.strip() for line in lines) if line)
+        job = _Job(output, window=2 * len(self.workers), max_retries=self.max_retries, workers=len(self.workers))
+        producer = asyncio.ensure_future(job.produce(_iter_shards(lines, self.shard_lines)))
+        tasks = [asyncio.ensure_future(self._serve(host, port, job)) for host, port in self.workers]
+        
+        try:
+            await job.done.wait()
+        finally:
+            for task in [producer] + tasks:
+                task.cancel()
+            await asyncio.gather(producer, *tasks, return_exceptions=True)
+        
+        if job.error is not None:
+            raise job.error
+        return sorted(job.reports, key=lambda report: report.shard)
+    
+    async def _serve(self, host: str, port: int, job: '_Job'):
+        """Feeds shards to one worker until the job is done or the worker is retired."""
+        address = f"{host}:{port}"
+        reader = writer = None
+        failures = 0
+        
+        try:
+            while True:
+                shard = await job.next_shard()
+                if shard is None:
+                    return
+                shard.attempts += 1
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port, limit=self.max_line_bytes)
+                    outputs, seconds = await asyncio.wait_for(_exchange(reader, writer, shard), self.timeout)
+                except (OSError, ValueError, KeyError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+                    _close(writer)
+                    reader = writer = None
+                    job.retry(shard, f"{address}: {error!r}")
+                    failures += 1
+                    if failures > self.max_retries:
+                        return
+                    await asyncio.sleep(0.05 * failures)
+                    continue
+                failures = 0
+                job.deliver(shard, outputs, ShardReport(shard.index, address, len(shard.lines), seconds, shard.attempts))
+        finally:
+            _close(writer)
+            job.retire_worker()
+
+
+class _Shard:
+    """Lines of one shard and the number of times it was sent."""
+    
+    __slots__ = ("index", "lines", "attempts")
+    
+    def __init__(self, index: int, lines: List[Union[str, bytes]]):
+        self.index = index
+        self.lines = lines
+        self.attempts = 0
+
+
+class _Job:
+    """Shared state of one coordinator run: pending shards, ordered output and completion."""
+    
+    def __init__(self, output: TextIO, window: int, max_retries: int, workers: int):
+        self.output = output
+        self.window = asyncio.Semaphore(window)
+        self.max_retries = max_retries
+        self.live_workers = workers
+        self.pending = asyncio.Queue()
+        self.completed: Dict[int, List[str]] = {}
+        self.reports: List[ShardReport] = []
+        self.total: Optional[int] = None
+        self.written = 0
+        self.error: Optional[Exception] = None
+        self.done = asyncio.Event()
+    
+    async def produce(self, shards: Iterator[_Shard]):
+        """Queues shards, waiting while too many are ahead of the output, and fails the job if reading them fails."""
+        count = 0
+        try:
+            for shard in shards:
+                await self.window.acquire()
+                self.pending.put_nowait(shard)
+                count += 1
+        except Exception as error:
+            self.fail(error)
+            return
+        self.total = count
+        self._check_done()
+    
+    async def next_shard(self) -> Optional[_Shard]:
+        """Waits for a pending shard, or returns None once the job is done."""
+        getter = asyncio.ensure_future(self.pending.get())
+        finished = asyncio.ensure_future(self.done.wait())
+        try:
+            await asyncio.wait({getter, finished}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            finished.cancel()
+            if not getter.done():
+                getter.cancel()
+        if self.done.is_set():
+            return None
+        return getter.result()
+    
+    def deliver(self, shard: _Shard, outputs: List[str], report: ShardReport):
+        """Stores the results of a shard and writes every shard now in sequence."""
+        self.completed[shard.index] = outputs
+        self.reports.append(report)
+        while self.written in self.completed:
+            outputs = self.completed.pop(self.written)
+            if outputs:
+                self.output.write("\n".join(outputs) + "\n")
+            self.written += 1
+            self.window.release()
+        self._check_done()
+    
+    def retry(self, shard: _Shard, reason: str):
+        """Requeues a failed shard, or fails the job once it ran out of attempts."""
+        if shard.attempts > self.max_retries:
+            self.fail(RuntimeError(f"Shard {shard.index} failed {shard.attempts} times, last on {reason}"))
+        else:
+            self.pending.put_nowait(shard)
+    
+    def retire_worker(self):
+        """Records that a worker stopped, failing the job when none is left."""
+        self.live_workers -= 1
+        if self.live_workers == 0 and not self.done.is_set():
+            self.fail(RuntimeError("Every worker failed"))
+    
+    def fail(self, error: Exception):
+        """Ends the job with an error."""
+        if not self.done.is_set():
+            self.error = error
+            self.done.set()
+    
+    def _check_done(self):
+        """Ends the job once every shard has been written."""
+        if self.total is not None and self.written == self.total:
+            self.done.set()
+
+
+async def _exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, shard: _Shard) -> Tuple[List[str], float]:
+    """Sends a shard and reads its results and processing time."""
+    writer.write(_encode_block(json.dumps({"shard": shard.index, "lines": len(shard.lines)}), shard.lines))
+    await writer.drain()
+    
+    response = json.loads(await _read_line(reader))
+    if response["shard"] != shard.index or response["lines"] != len(shard.lines):
+        raise ValueError(f"Unexpected response for shard {shard.index}: {response}")
+    outputs = [(await _read_line(reader)).decode("utf-8").rstrip("\n") for _ in range(response["lines"])]
+    return outputs, response["seconds"]
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    """Reads one line, raising ConnectionError if the peer closed the connection."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed in the middle of a shard")
+    return line
+
+
+def _encode_block(header: str, lines: List[Union[str, bytes]]) -> bytes:
+    """Encodes a header followed by its lines, raw lines being sent unchanged."""
+    return (header + "\n").encode("utf-8") + b"".join(
+        (line if isinstance(line, bytes) else line.encode("utf-8")) + b"\n" for line in lines
+    )
+
+
+def _iter_shards(lines: Iterator[Union[str, bytes]], shard_lines: int) -> Iterator[_Shard]:
+    """Splits lines into shards of consecutive lines."""
+    index = 0
+    while True:
+        chunk = list(islice(lines, shard_lines))
+        if not chunk:
+            return
+        yield _Shard(index, chunk)
+        index += 1
+
+
+def _close(writer: Optional[asyncio.StreamWriter]):
+    """Closes a connection without waiting for it."""
+    if writer is not None:
+        writer.close()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Parses a HOST:PORT address.
+    
+    Args:
+        address: Address text, the host may be omitted for localhost
+    
+    Returns:
+        Host and port
+    """
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def serve_worker(host: str, port: int, **worker_options):
+    """
+    Runs a shard worker until cancelled.
+    
+    Args:
+        host: Interface to bind
+        port: TCP port to bind
+        **worker_options: Keyword arguments for ShardWorker
+    """
+    worker = ShardWorker(**worker_options)
+    listener = await worker.start(host, port)
+    try:
+        await listener.serve_forever()
+    finally:
+        await worker.close()
+
+
+def coordinate_files(paths: List[str], workers: List[Tuple[str, int]], output_dir: str = ".", **coordinator_options) -> List[ShardReport]:
+    """
+    Processes input files on remote workers, one output file per input.
+    
+    Args:
+        paths: Paths of the input files, plain or .gz
+        workers: Host and port of every worker
+        output_dir: Directory receiving the .out files
+        **coordinator_options: Keyword arguments for Coordinator
+    
+    Returns:
+        Report of every shard of every file
+    
+    Raises:
+        ValueError: If two inputs would write the same output file
+    """
+    from src.utils.file_utils import iter_line_chunks, output_paths_for
+    
+    output_paths = output_paths_for(paths, output_dir)
+    coordinator = Coordinator(workers, **coordinator_options)
+    reports = []
+    for path, output_path in zip(paths, output_paths):
+        start = time.perf_counter()
+        lines = (line for chunk in iter_line_chunks(path) for line in chunk)
+        with open(output_path, "w", buffering=1024 * 1024) as output_file:
+            file_reports = asyncio.run(coordinator.run(lines, output_file))
+        seconds = time.perf_counter() - start
+        
+        for report in file_reports:
+            print(report.summary(), file=sys.stderr)
+        lines = sum(report.lines for report in file_reports)
+        print(f"{path}: {lines} lines in {seconds:.2f}s ({lines / seconds if seconds else 0:.0f} lines/s) -> {output_path}", file=sys.stderr)
+        reports.extend(file_reports)
+    return reports
+
@@ -0,0 +1,202 @@
+"""
+Module that implements a long-lived asyncio server speaking the CLI line protocol.
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from src.capital_gains_cli import CapitalGainsCLI, _init_worker, _process_line_in_worker
+
+
+class CapitalGainsServer:
+    """
+    Asyncio server processing simulation lines over TCP or Unix sockets.
+    
+    Each connection follows the standard input protocol: one JSON simulation
+    per line in, one result or error message per line out, in order, until
+    an empty line or the end of the stream. Clients may pipeline any number
+    of lines; at most max_pending of them are in flight per connection, after
+    which the server stops reading from that socket. Lines holding at least
+    offload_operations operations are calculated on a process pool, and the
+    event loop is yielded after every line calculated inline, so neither a
+    large simulation nor a burst of small ones stalls other connections.
+    """
+    
+    def __init__(
+        self,
+        cli_options: Optional[dict] = None,
+        workers: Optional[int] = None,
+        offload_operations: int = 32,
+        max_pending: int = 128,
+        max_line_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initializes the server.
+        
+        Args:
+            cli_options: Keyword arguments for the CapitalGainsCLI instances,
+                e.g. engine or cache sizes
+            workers: Number of worker processes for large lines, defaults to
+                the number of CPUs; the pool is created even for one worker
+            offload_operations: Number of operations in a line from which
+                work goes to the pool
+            max_pending: Maximum number of lines in flight per connection
+            max_line_bytes: Maximum accepted length of a single line
+        """
+        self.cli_options = dict(cli_options or {})
+        self.cli = CapitalGainsCLI(**self.cli_options)
+        self.workers = workers or os.cpu_count() or 1
+        self.offload_operations = offload_operations
+        self.max_pending = max_pending
+        self.max_line_bytes = max_line_bytes
+        self.executor: Optional[Executor] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.unix_path: Optional[str] = None
+    
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """
+        Starts listening on a TCP address.
+        
+        Args:
+            host: Interface to bind
+            port: Port to bind, zero for an ephemeral one
+        
+        Returns:
+            The listening asyncio server
+        """
+        self._start_executor()
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=self.max_line_bytes)
+        return self.server
+    
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """
+        Starts listening on a Unix domain socket.
+        
+        Args:
+            path: Filesystem path of the socket
+        
+        Returns:
+            The listening asyncio server
+        """
+        self._start_executor()
+        self.server = await asyncio.start_unix_server(self.handle_connection, path, limit=self.max_line_bytes)
+        self.unix_path = path
+        return self.server
+    
+    async def close(self):
+        """Stops listening, removes the Unix socket file and shuts the worker pool down."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.unix_path is not None:
+            try:
+                os.unlink(self.unix_path)
+            except FileNotFoundError:
+                pass
+            self.unix_path = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves one client connection.
+        
+        A line longer than max_line_bytes is answered with an error message
+        and ends the session, since the rest of it cannot be told apart from
+        the next line.
+        
+        Args:
+            reader: Stream of incoming lines
+            writer: Stream receiving the results
+        """
+        pending = asyncio.Queue(maxsize=self.max_pending)
+        responder = asyncio.ensure_future(self._respond(pending, writer))
+        
+        try:
+            while not responder.done():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await pending.put(_completed(f"Error: Line exceeds {self.max_line_bytes} bytes"))
+                    break
+                line = line.strip()
+                if not line:
+                    break
+                await pending.put(self._submit(line))
+                # Let other connections run between lines calculated inline
+                await asyncio.sleep(0)
+        except ConnectionError:
+            pass
+        finally:
+            if not responder.done():
+                await pending.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                pass
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+    
+    def _start_executor(self):
+        """Creates the worker pool used for large lines."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.cli_options,)
+            )
+    
+    def _submit(self, line: bytes) -> asyncio.Future:
+        """
+        Starts processing a line, inline when small or on the pool when large.
+        
+        The number of operations is estimated by counting the opening braces
+        of the line, one per operation object, without decoding it.
+        """
+        if line.count(b"{") >= self.offload_operations:
+            self._start_executor()
+            return asyncio.get_running_loop().run_in_executor(self.executor, _process_line_in_worker, line)
+        return _completed(self.cli.process_line(line))
+    
+    async def _respond(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        """Writes results in request order, waiting for the client to keep up."""
+        while True:
+            future = await pending.get()
+            if future is None:
+                return
+            output = await future
+            writer.write(output.encode("utf-8") + b"\n")
+            await writer.drain()
+
+
+def _completed(output: str) -> asyncio.Future:
+    """Returns a future already holding an output line."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(output)
+    return future
+
+
+async def serve(host: Optional[str] = None, port: int = 0, unix_path: Optional[str] = None, **server_options):
+    """
+    Runs a server until cancelled.
+    
+    Args:
+        host: Interface to bind for TCP
+        port: TCP port to bind
+        unix_path: Unix socket path, used instead of TCP when given
+        **server_options: Keyword arguments for CapitalGainsServer
+    """
+    server = CapitalGainsServer(**server_options)
+    if unix_path is not None:
+        listener = await server.start_unix(unix_path)
+    else:
+        listener = await server.start_tcp(host or "127.0.0.1", port)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
@@ -0,0 +1,94 @@
+"""
+Module that defines the serializable snapshot of the tax calculator state.
+"""
+
+import json
+from decimal import Decimal
+from typing import Dict, Any
+
+
+class CalculatorState:
+    """
+    Class representing the state carried between operations of a simulation.
+    """
+    
+    __slots__ = ("weighted_average_price", "total_shares", "accumulated_loss")
+    
+    def __init__(self, weighted_average_price: Decimal, total_shares: int, accumulated_loss: Decimal):
+        """
+        Initializes a new state snapshot.
+        
+        Args:
+            weighted_average_price: Weighted average price of the shares held
+            total_shares: Number of shares held
+            accumulated_loss: Loss still available to deduct from future profits
+        """
+        self.weighted_average_price = weighted_average_price
+        self.total_shares = total_shares
+        self.accumulated_loss = accumulated_loss
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CalculatorState):
+            return NotImplemented
+        return (
+            self.weighted_average_price == other.weighted_average_price
+            and self.total_shares == other.total_shares
+            and self.accumulated_loss == other.accumulated_loss
+        )
+    
+    def __repr__(self) -> str:
+        return f"CalculatorState({self.weighted_average_price!r}, {self.total_shares!r}, {self.accumulated_loss!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the state to a dictionary.
+        
+        Decimal values are kept as strings so the snapshot is exact.
+        
+        Returns:
+            Dictionary representing the state
+        """
+        return {
+            "weighted-average-price": str(self.weighted_average_price),
+            "total-shares": self.total_shares,
+            "accumulated-loss": str(self.accumulated_loss)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CalculatorState':
+        """
+        Creates a CalculatorState instance from a dictionary.
+        
+        Args:
+            data: Dictionary containing the state data
+            
+        Returns:
+            A new CalculatorState instance
+        """
+        return cls(
+            weighted_average_price=Decimal(data["weighted-average-price"]),
+            total_shares=data["total-shares"],
+            accumulated_loss=Decimal(data["accumulated-loss"])
+        )
+    
+    def to_json(self) -> str:
+        """
+        Serializes the state as compact JSON.
+        
+        Returns:
+            JSON string representing the state
+        """
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+    
+    @classmethod
+    def from_json(cls, json_str: str) -> 'CalculatorState':
+        """
+        Creates a CalculatorState instance from its JSON serialization.
+        
+        Args:
+            json_str: JSON string produced by to_json
+            
+        Returns:
+            A new CalculatorState instance
+        """
+        return cls.from_dict(json.loads(json_str))
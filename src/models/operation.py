@@ -4,7 +4,7 @@ Module that defines data models for financial operations.
 
 from decimal import Decimal
 from enum import Enum
-from typing import Dict, Any
+from typing import Any, Dict, Optional
 
 
 class OperationType(Enum):
@@ -18,18 +18,33 @@ class Operation:
     Class representing a financial operation for buying or selling stocks.
     """
     
-    def __init__(self, operation_type: str, unit_cost: float, quantity: int):
+    __slots__ = ("operation_type", "unit_cost", "quantity", "ticker", "timestamp")
+    
+    def __init__(
+        self,
+        operation_type: str,
+        unit_cost: float,
+        quantity: int,
+        ticker: Optional[str] = None,
+        timestamp: Any = None
+    ):
         """
         Initializes a new operation.
         
         Args:
             operation_type: Type of operation ('buy' or 'sell')
-            unit_cost: Unit price of the stock
+            unit_cost: Unit price of the stock, converted through str unless
+                already a Decimal
             quantity: Number of stocks traded
+            ticker: Asset traded, None for simulations of a single asset
+            timestamp: Time of the trade, used to merge time-ordered feeds;
+                any comparable value such as epoch seconds or ISO-8601 text
         """
         self.operation_type = OperationType(operation_type)
-        self.unit_cost = Decimal(str(unit_cost))
+        self.unit_cost = unit_cost if type(unit_cost) is Decimal else Decimal(str(unit_cost))
         self.quantity = quantity
+        self.ticker = ticker
+        self.timestamp = timestamp
     
     @property
     def total_value(self) -> Decimal:
@@ -41,16 +56,30 @@ class Operation:
         """
         Creates an Operation instance from a dictionary.
         
+        JSON decoders may hand fractional numbers over as Decimal; fractional
+        quantities and timestamps are converted back to float so they behave
+        exactly as when decoded by json.loads.
+        
         Args:
             data: Dictionary containing the operation data
             
         Returns:
             A new Operation instance
         """
+        operation_type = data["operation"]
+        unit_cost = data["unit-cost"]
+        quantity = data["quantity"]
+        if type(quantity) is Decimal:
+            quantity = float(quantity)
+        timestamp = data.get("timestamp")
+        if type(timestamp) is Decimal:
+            timestamp = float(timestamp)
         return cls(
-            operation_type=data["operation"],
-            unit_cost=data["unit-cost"],
-            quantity=data["quantity"]
+            operation_type=operation_type,
+            unit_cost=unit_cost,
+            quantity=quantity,
+            ticker=data.get("ticker"),
+            timestamp=timestamp
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -60,8 +89,13 @@ class Operation:
         Returns:
             Dictionary representing the operation
         """
-        return {
+        data = {
             "operation": self.operation_type.value,
             "unit-cost": float(self.unit_cost),
             "quantity": self.quantity
         }
+        if self.ticker is not None:
+            data["ticker"] = self.ticker
+        if self.timestamp is not None:
+            data["timestamp"] = self.timestamp
+        return data
@@ -0,0 +1,136 @@
+"""
+Module that defines a columnar container for large sequences of operations.
+"""
+
+from array import array
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, Union
+
+from src.models.operation import Operation, OperationType
+
+
+BUY_CODE = 0
+SELL_CODE = 1
+
+_TYPE_CODES = {OperationType.BUY: BUY_CODE, OperationType.SELL: SELL_CODE}
+_CODE_TYPES = {BUY_CODE: OperationType.BUY, SELL_CODE: OperationType.SELL}
+
+
+def price_to_cents(unit_cost: Union[Decimal, float, int, str]) -> int:
+    """
+    Converts a unit price into an integer number of cents.
+    
+    Args:
+        unit_cost: Unit price, converted through str like Operation does
+        
+    Returns:
+        Price in cents
+        
+    Raises:
+        ValueError: If the price is not a whole number of cents
+    """
+    value = unit_cost if isinstance(unit_cost, Decimal) else Decimal(str(unit_cost))
+    cents = value.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Unit cost {unit_cost} is not a whole number of cents")
+    return int(cents)
+
+
+class OperationBatch:
+    """
+    Class storing a sequence of operations as compact columns.
+    
+    Operation types are kept in a byte array (BUY_CODE or SELL_CODE), prices
+    as integer cents and quantities as signed 64-bit integers, so a batch
+    costs a few bytes per row instead of one Python object per operation.
+    Any indexable buffers with the same element types, such as memoryviews,
+    can be used as columns.
+    """
+    
+    __slots__ = ("types", "prices", "quantities")
+    
+    def __init__(self, types=None, prices=None, quantities=None):
+        """
+        Initializes a batch, empty unless columns are given.
+        
+        Args:
+            types: Column of operation type codes
+            prices: Column of unit prices in cents
+            quantities: Column of quantities
+        """
+        self.types = bytearray() if types is None else types
+        self.prices = array('q') if prices is None else prices
+        self.quantities = array('q') if quantities is None else quantities
+        if not len(self.types) == len(self.prices) == len(self.quantities):
+            raise ValueError("Batch columns must have the same length")
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def __iter__(self) -> Iterator[Operation]:
+        for index in range(len(self.types)):
+            yield self.operation(index)
+    
+    def append(self, operation_type: Union[OperationType, str], unit_cost: Union[Decimal, float, int, str], quantity: int):
+        """
+        Appends an operation to the batch.
+        
+        Args:
+            operation_type: Type of operation
+            unit_cost: Unit price of the stock
+            quantity: Number of stocks traded
+            
+        Raises:
+            ValueError: If the type is unknown or the price is not in whole cents
+        """
+        self.types.append(_TYPE_CODES[OperationType(operation_type)])
+        self.prices.append(price_to_cents(unit_cost))
+        self.quantities.append(quantity)
+    
+    def operation(self, index: int) -> Operation:
+        """
+        Materializes the operation stored at an index.
+        
+        Args:
+            index: Row index
+            
+        Returns:
+            A new Operation instance
+        """
+        return Operation(
+            operation_type=_CODE_TYPES[self.types[index]].value,
+            unit_cost=Decimal(self.prices[index]).scaleb(-2),
+            quantity=self.quantities[index]
+        )
+    
+    @classmethod
+    def from_operations(cls, operations: Iterable[Operation]) -> 'OperationBatch':
+        """
+        Creates a batch from operation objects.
+        
+        Args:
+            operations: Operations to be stored
+            
+        Returns:
+            A new OperationBatch instance
+        """
+        batch = cls()
+        for operation in operations:
+            batch.append(operation.operation_type, operation.unit_cost, operation.quantity)
+        return batch
+    
+    @classmethod
+    def from_dicts(cls, data: Iterable[Dict[str, Any]]) -> 'OperationBatch':
+        """
+        Creates a batch from decoded JSON operations without building Operation objects.
+        
+        Args:
+            data: Dictionaries with the operation data
+            
+        Returns:
+            A new OperationBatch instance
+        """
+        batch = cls()
+        for item in data:
+            batch.append(item["operation"], item["unit-cost"], item["quantity"])
+        return batch
@@ -11,6 +11,8 @@ class TaxResult:
     Class representing the tax calculation result for an operation.
     """
     
+    __slots__ = ("tax",)
+    
     def __init__(self, tax: Decimal):
         """
         Initializes a new tax result.
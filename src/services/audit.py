@@ -0,0 +1,312 @@
+"""
+Module that implements the opt-in explain mode recording how each tax was calculated.
+"""
+
+import csv
+import json
+from array import array
+from decimal import Decimal
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Union
+
+from src.models.operation import Operation, OperationType
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator, ZERO, EXEMPTION_LIMIT
+
+
+AUDIT_FORMATS = ("csv", "jsonl")
+
+# Why a sell paid the tax it did, stored as codes in the trail
+REASONS = ("buy", "loss", "no-gain", "exempt", "loss-offset", "taxed")
+_BUY, _LOSS, _NO_GAIN, _EXEMPT, _OFFSET, _TAXED = range(len(REASONS))
+
+FIELDS = (
+    "operation-index", "operation", "unit-cost", "quantity", "weighted-average", "profit-or-loss",
+    "loss-consumed", "accumulated-loss", "tax", "reason"
+)
+_OPERATION_NAMES = {BUY_CODE: "buy", SELL_CODE: "sell"}
+
+
+class AuditTrail:
+    """
+    Columnar buffer of the explanation of every operation of a simulation.
+    
+    Columns are allocated up front and doubled when full, so recording an
+    operation stores into existing slots instead of building a record.
+    Amounts are kept as the exact Decimal values used by the calculation.
+    Each row keeps the position of its operation in the input, which differs
+    from the row number when invalid operations were skipped.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        """
+        Initializes an empty trail.
+        
+        Args:
+            capacity: Number of operations the columns are allocated for
+        """
+        self.length = 0
+        self._allocate(max(capacity, 1))
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    def clear(self):
+        """Empties the trail, keeping the allocated columns."""
+        self.length = 0
+    
+    def append(
+        self,
+        operation_index: int,
+        operation: int,
+        unit_cost: Decimal,
+        quantity: int,
+        weighted_average: Decimal,
+        profit_or_loss: Decimal,
+        loss_consumed: Decimal,
+        accumulated_loss: Decimal,
+        tax: Decimal,
+        reason: int
+    ):
+        """
+        Records the explanation of one operation.
+        
+        Args:
+            operation_index: Position of the operation in the input
+            operation: BUY_CODE or SELL_CODE
+            unit_cost: Unit price of the operation
+            quantity: Number of shares
+            weighted_average: Weighted average price after a buy, or the one
+                the sell was measured against
+            profit_or_loss: Result of a sell, zero for buys
+            loss_consumed: Accumulated loss deducted from the profit
+            accumulated_loss: Loss left to deduct after the operation
+            tax: Tax paid
+            reason: Index into REASONS
+        """
+        index = self.length
+        if index == len(self.operations):
+            self._allocate(2 * index)
+        self.operation_indexes[index] = operation_index
+        self.operations[index] = operation
+        self.unit_costs[index] = unit_cost
+        self.quantities[index] = quantity
+        self.weighted_averages[index] = weighted_average
+        self.profits_or_losses[index] = profit_or_loss
+        self.losses_consumed[index] = loss_consumed
+        self.accumulated_losses[index] = accumulated_loss
+        self.taxes[index] = tax
+        self.reasons[index] = reason
+        self.length = index + 1
+    
+    def renumber(self, operation_indexes: Sequence[int]):
+        """
+        Maps the recorded operation positions to positions in the input.
+        
+        Args:
+            operation_indexes: Input position of each operation that was
+                calculated, in calculation order
+        """
+        for index in range(self.length):
+            self.operation_indexes[index] = operation_indexes[self.operation_indexes[index]]
+    
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the recorded explanations as dictionaries keyed by FIELDS.
+        
+        Yields:
+            One dictionary per operation, with Decimal amounts
+        """
+        for index in range(self.length):
+            yield {
+                "operation-index": self.operation_indexes[index],
+                "operation": _OPERATION_NAMES[self.operations[index]],
+                "unit-cost": self.unit_costs[index],
+                "quantity": self.quantities[index],
+                "weighted-average": self.weighted_averages[index],
+                "profit-or-loss": self.profits_or_losses[index],
+                "loss-consumed": self.losses_consumed[index],
+                "accumulated-loss": self.accumulated_losses[index],
+                "tax": self.taxes[index],
+                "reason": REASONS[self.reasons[index]]
+            }
+    
+    def _allocate(self, capacity: int):
+        """Grows every column to the given capacity, keeping recorded rows."""
+        grow = capacity - getattr(self, "capacity", 0)
+        if not grow:
+            return
+        if not hasattr(self, "capacity"):
+            self.operation_indexes = array('q', bytes(8 * capacity))
+            self.operations = bytearray(capacity)
+            self.reasons = bytearray(capacity)
+            self.unit_costs: List[Decimal] = [ZERO] * capacity
+            self.quantities: List[int] = [0] * capacity
+            self.weighted_averages: List[Decimal] = [ZERO] * capacity
+            self.profits_or_losses: List[Decimal] = [ZERO] * capacity
+            self.losses_consumed: List[Decimal] = [ZERO] * capacity
+            self.accumulated_losses: List[Decimal] = [ZERO] * capacity
+            self.taxes: List[Decimal] = [ZERO] * capacity
+        else:
+            self.operation_indexes.extend(array('q', bytes(8 * grow)))
+            self.operations.extend(bytes(grow))
+            self.reasons.extend(bytes(grow))
+            self.quantities.extend([0] * grow)
+            for column in (
+                self.unit_costs, self.weighted_averages, self.profits_or_losses,
+                self.losses_consumed, self.accumulated_losses, self.taxes
+            ):
+                column.extend([ZERO] * grow)
+        self.capacity = capacity
+
+
+class ExplainingTaxCalculator(TaxCalculator):
+    """
+    Tax calculator that also records why each operation paid its tax.
+    
+    The explanation of the last simulation (or appended operations) is kept
+    in the trail attribute. Sells go through the same _calculate_sell_tax as
+    the Decimal engine, so taxes are identical to TaxCalculator with either
+    engine; TaxCalculator itself is untouched and pays nothing for this mode.
+    """
+    
+    def __init__(self, engine: str = "decimal", capacity: int = 1024):
+        """
+        Initializes the calculator with an empty trail.
+        
+        Args:
+            engine: Arithmetic engine, accepted for compatibility; explained
+                operations always use Decimal arithmetic, which gives the
+                same results as every engine
+            capacity: Initial number of operations the trail is allocated for
+        """
+        self.trail = AuditTrail(capacity)
+        super().__init__(engine)
+    
+    def reset_state(self):
+        """Resets the state and empties the trail for a new simulation."""
+        super().reset_state()
+        self.trail.clear()
+    
+    def calculate_batch(self, batch: OperationBatch) -> array:
+        """
+        Calculates and explains the taxes for a columnar batch of operations.
+        
+        Args:
+            batch: Batch of operations to be processed
+        
+        Returns:
+            Array with the tax in cents for each operation
+        """
+        operations = [
+            Operation(_OPERATION_NAMES.get(code, ""), Decimal(price).scaleb(-2), quantity)
+            for code, price, quantity in zip(batch.types, batch.prices, batch.quantities)
+        ]
+        return array('q', [int(result.tax.scaleb(2)) for result in self.calculate_taxes(operations)])
+    
+    def _iter_taxes_from_state(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """
+        Processes and explains operations with Decimal arithmetic, starting from the current state.
+        
+        Operations are numbered from the rows already in the trail, so the
+        operations appended to a cleared trail are numbered from zero.
+        """
+        trail = self.trail
+        for operation_index, operation in enumerate(operations, len(trail)):
+            unit_cost, quantity = operation.unit_cost, operation.quantity
+            if operation.operation_type == OperationType.BUY:
+                self._update_weighted_average(unit_cost, quantity)
+                trail.append(operation_index, BUY_CODE, unit_cost, quantity, self.weighted_average_price, ZERO, ZERO, self.accumulated_loss, ZERO, _BUY)
+                yield TaxResult(ZERO)
+            elif operation.operation_type == OperationType.SELL:
+                weighted_average, loss_before = self.weighted_average_price, self.accumulated_loss
+                tax = self._calculate_sell_tax(unit_cost, quantity)
+                
+                operation_value = unit_cost * quantity
+                profit_or_loss = operation_value - weighted_average * quantity
+                loss_consumed = max(loss_before - self.accumulated_loss, ZERO)
+                if profit_or_loss < 0:
+                    reason = _LOSS
+                elif profit_or_loss == 0:
+                    reason = _NO_GAIN
+                elif operation_value <= EXEMPTION_LIMIT:
+                    reason = _EXEMPT
+                elif loss_consumed and not tax:
+                    reason = _OFFSET
+                else:
+                    reason = _TAXED
+                trail.append(
+                    operation_index, SELL_CODE, unit_cost, quantity, weighted_average, profit_or_loss,
+                    loss_consumed, self.accumulated_loss, tax, reason
+                )
+                yield TaxResult(tax)
+
+
+class AuditWriter:
+    """
+    Writer appending the trail of each simulation to a side file.
+    
+    Every row carries the zero-based index of its simulation and of its
+    operation within the simulation's input. CSV files get a header and
+    exact decimal strings; JSON lines hold one object per operation with
+    numbers formatted like the tax output.
+    """
+    
+    def __init__(self, output: Union[str, IO[str]], audit_format: Optional[str] = None):
+        """
+        Initializes the writer.
+        
+        Args:
+            output: Path or text stream receiving the rows
+            audit_format: 'csv' or 'jsonl', by default 'csv' for paths
+                ending in .csv and 'jsonl' otherwise
+        
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if audit_format is None:
+            audit_format = "csv" if isinstance(output, str) and output.endswith(".csv") else "jsonl"
+        if audit_format not in AUDIT_FORMATS:
+            raise ValueError(f"Unknown audit format: {audit_format}")
+        self.audit_format = audit_format
+        self._owned = isinstance(output, str)
+        self.output = open(output, "w", newline="") if self._owned else output
+        self.simulations = 0
+        self._csv = None
+        if audit_format == "csv":
+            self._csv = csv.writer(self.output)
+            self._csv.writerow(("simulation",) + FIELDS)
+    
+    def __enter__(self) -> 'AuditWriter':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def write(self, trail: AuditTrail):
+        """
+        Writes the rows of one simulation.
+        
+        Args:
+            trail: Trail of the simulation
+        """
+        simulation = self.simulations
+        self.simulations += 1
+        if self._csv is not None:
+            self._csv.writerows(
+                [simulation] + [row[field] for field in FIELDS] for row in trail.rows()
+            )
+            return
+        for row in trail.rows():
+            record = {"simulation": simulation}
+            for field in FIELDS:
+                value = row[field]
+                record[field] = float(value) if isinstance(value, Decimal) else value
+            self.output.write(json.dumps(record) + "\n")
+    
+    def close(self):
+        """Flushes the rows, closing the file if the writer opened it."""
+        if self._owned:
+            self.output.close()
+        else:
+            self.output.flush()
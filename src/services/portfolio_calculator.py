@@ -0,0 +1,175 @@
+"""
+Module that implements the tax calculation for portfolios of several assets.
+"""
+
+import zlib
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional
+
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import ENGINES, TaxCalculator, ZERO
+
+
+LOSS_POOLS = ("shared", "per-asset")
+
+
+class PortfolioTaxCalculator:
+    """
+    Class calculating taxes for simulations mixing operations on several tickers.
+    
+    Each ticker keeps its own weighted average price and share count in a
+    TaxCalculator of its own, so every asset follows exactly the single-asset
+    rules. Accumulated losses are either deducted from the profits of any
+    asset (a shared pool) or only from later profits of the same asset.
+    Operations without a ticker all belong to the same asset, so single-asset
+    simulations produce the same results as TaxCalculator.
+    
+    With per-asset loss pools tickers are independent, so large simulations
+    can be sharded by ticker across worker processes; results are always
+    returned in the original operation order.
+    """
+    
+    def __init__(
+        self,
+        engine: str = "decimal",
+        loss_pool: str = "shared",
+        shards: int = 1,
+        min_shard_operations: int = 10000
+    ):
+        """
+        Initializes the calculator with an empty portfolio.
+        
+        Args:
+            engine: Arithmetic engine of the per-ticker calculators
+            loss_pool: Either 'shared' or 'per-asset'
+            shards: Number of worker processes tickers are sharded across
+            min_shard_operations: Smallest simulation worth sharding
+        
+        Raises:
+            ValueError: If the engine or loss pool is unknown, or sharding is
+                requested with a shared loss pool
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if loss_pool not in LOSS_POOLS:
+            raise ValueError(f"Unknown loss pool: {loss_pool}")
+        if shards > 1 and loss_pool == "shared":
+            raise ValueError("Sharding requires per-asset loss pools")
+        self.engine = engine
+        self.loss_pool = loss_pool
+        self.shards = shards
+        self.min_shard_operations = min_shard_operations
+        self._executor = None
+        self.reset_state()
+    
+    def __enter__(self) -> 'PortfolioTaxCalculator':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def reset_state(self):
+        """Resets the state for a new simulation."""
+        self.calculators: Dict[Hashable, TaxCalculator] = {}
+        self.accumulated_loss = ZERO
+    
+    def close(self):
+        """Shuts the shard worker pool down, if started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def calculate_taxes(self, operations: List[Operation]) -> List[TaxResult]:
+        """
+        Calculates the tax for a list of operations on any number of tickers.
+        
+        Args:
+            operations: List of operations to be processed
+        
+        Returns:
+            List of tax results for each operation, in the original order
+        """
+        if self.shards > 1 and len(operations) >= self.min_shard_operations:
+            return self._calculate_sharded(operations)
+        return list(self.iter_taxes(operations))
+    
+    def iter_taxes(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """
+        Lazily calculates the tax for a stream of operations, without sharding.
+        
+        Args:
+            operations: Iterable of operations to be processed
+        
+        Yields:
+            Tax result for each operation, in order
+        """
+        self.reset_state()
+        shared = self.loss_pool == "shared"
+        
+        for ticker, run in groupby(operations, key=attrgetter("ticker")):
+            calculator = self.calculators.get(ticker)
+            if calculator is None:
+                calculator = self.calculators[ticker] = TaxCalculator(self.engine)
+            if shared:
+                calculator.accumulated_loss = self.accumulated_loss
+            yield from calculator._iter_taxes_from_state(run)
+            if shared:
+                self.accumulated_loss = calculator.accumulated_loss
+    
+    def calculate_batch(self, batch: OperationBatch):
+        """
+        Calculates the taxes for a columnar batch, which has no ticker column.
+        
+        Args:
+            batch: Batch of operations of a single asset
+        
+        Returns:
+            Array with the tax in cents for each operation
+        """
+        self.reset_state()
+        return TaxCalculator(self.engine).calculate_batch(batch)
+    
+    def _calculate_sharded(self, operations: List[Operation]) -> List[TaxResult]:
+        """Calculates the tickers of each shard on a worker process."""
+        positions = [[] for _ in range(self.shards)]
+        for position, operation in enumerate(operations):
+            positions[shard_of(operation.ticker, self.shards)].append(position)
+        positions = [shard for shard in positions if shard]
+        
+        shards = [[operations[position] for position in shard] for shard in positions]
+        results: List[Optional[TaxResult]] = [None] * len(operations)
+        for shard, taxes in zip(positions, self._pool().map(_calculate_shard, [self.engine] * len(shards), shards)):
+            for position, result in zip(shard, taxes):
+                results[position] = result
+        return results
+    
+    def _pool(self):
+        """Returns the shard worker pool, creating it on first use."""
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.shards)
+        return self._executor
+
+
+def shard_of(ticker: Hashable, shards: int) -> int:
+    """
+    Returns the shard of a ticker, stable across processes and runs.
+    
+    Args:
+        ticker: Ticker of an operation, None for the default asset
+        shards: Number of shards
+    
+    Returns:
+        Shard index between 0 and shards - 1
+    """
+    if ticker is None:
+        return 0
+    return zlib.crc32(str(ticker).encode("utf-8")) % shards
+
+
+def _calculate_shard(engine: str, operations: List[Operation]) -> List[TaxResult]:
+    """Calculates the operations of one shard inside a worker process."""
+    return list(PortfolioTaxCalculator(engine, loss_pool="per-asset").iter_taxes(operations))
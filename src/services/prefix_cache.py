@@ -0,0 +1,142 @@
+"""
+Module that implements a cache of calculator states shared by simulations with common prefixes.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from src.models.calculator_state import CalculatorState
+from src.models.operation import Operation
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator
+
+
+class _PrefixNode:
+    """Trie node holding the state and tax right after one operation of a prefix."""
+    
+    __slots__ = ("key", "parent", "children", "state", "tax")
+    
+    def __init__(self, key: Optional[Tuple], parent: Optional['_PrefixNode'], state: Optional[CalculatorState], tax: Optional[Decimal]):
+        self.key = key
+        self.parent = parent
+        self.children = {}
+        self.state = state
+        self.tax = tax
+
+
+class PrefixStateCache:
+    """
+    Trie of operation sequences storing calculator snapshots at each node.
+    
+    Nodes are keyed by (type, unit-cost, quantity). A simulation walks the
+    trie along its operations, reuses the taxes of its longest cached prefix
+    and resumes the calculator from the snapshot stored there, so only the
+    new operations are calculated. The trie is bounded by number of nodes
+    and evicts least recently used leaves first.
+    """
+    
+    def __init__(self, max_nodes: int = 100000):
+        """
+        Initializes an empty cache.
+        
+        Args:
+            max_nodes: Maximum number of trie nodes kept
+        """
+        self.max_nodes = max_nodes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._root = _PrefixNode(None, None, None, None)
+        # Ancestors are always touched after their descendants, so the least
+        # recently used node is always a leaf
+        self._lru = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._lru)
+    
+    def calculate_taxes(self, calculator: TaxCalculator, operations: List[Operation]) -> List[TaxResult]:
+        """
+        Calculates the taxes of a simulation, resuming from its longest cached prefix.
+        
+        Args:
+            calculator: Calculator used for the operations not yet cached
+            operations: List of operations to be processed
+        
+        Returns:
+            List of tax results for each operation
+        """
+        node = self._root
+        path = []
+        results = []
+        
+        for operation in operations:
+            child = node.children.get(_operation_key(operation))
+            if child is None:
+                break
+            path.append(child)
+            results.append(TaxResult(child.tax))
+            node = child
+        
+        self.hits += len(path)
+        if node is self._root:
+            calculator.reset_state()
+        else:
+            calculator.import_state(node.state)
+        
+        try:
+            for position in range(len(path), len(operations)):
+                operation = operations[position]
+                key = _operation_key(operation)
+                if key is None:
+                    # Operations that cannot be keyed safely end the cached prefix
+                    self.misses += len(operations) - position
+                    results.extend(calculator.append_operations(operations[position:]))
+                    break
+                self.misses += 1
+                result = calculator.append_operations([operation])[0]
+                results.append(result)
+                child = _PrefixNode(key, node, calculator.export_state(), result.tax)
+                node.children[key] = child
+                path.append(child)
+                node = child
+        finally:
+            self._touch(path)
+            self._evict()
+        
+        return results
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+        
+        Returns:
+            Dictionary with operations served from the cache (hits), operations
+            calculated (misses), evicted nodes and current nodes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "nodes": len(self._lru)
+        }
+    
+    def _touch(self, path: List[_PrefixNode]):
+        """Marks a path as recently used, deepest node first."""
+        for node in reversed(path):
+            self._lru[node] = None
+            self._lru.move_to_end(node)
+    
+    def _evict(self):
+        """Removes least recently used leaves until the trie fits its bound."""
+        while len(self._lru) > self.max_nodes:
+            node, _ = self._lru.popitem(last=False)
+            del node.parent.children[node.key]
+            self.evictions += 1
+
+
+def _operation_key(operation: Operation) -> Optional[Tuple]:
+    """Returns the trie key of an operation, or None if it cannot be cached safely."""
+    if type(operation.quantity) is not int:
+        return None
+    return operation.operation_type.value, operation.unit_cost, operation.quantity
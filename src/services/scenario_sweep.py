@@ -0,0 +1,133 @@
+"""
+Module that implements what-if sweeps of candidate final trades over a shared base history.
+"""
+
+from decimal import Decimal
+from typing import List, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from src.models.operation import Operation
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator, _to_cents
+from src.utils.json_utils import parse_operations
+
+
+# Grids whose profits stay below this bound are evaluated in int64; larger
+# values are left to the scalar engine.
+_SAFE_MAGNITUDE = 2 ** 62
+
+_EXEMPTION_CENTS = 2000000
+
+
+class ScenarioSweep:
+    """
+    Class evaluating grids of candidate sells after the same base history.
+    
+    The base operations are processed once and the end state (weighted
+    average price, shares held and accumulated loss) is kept, so a grid of
+    N prices by M quantities costs O(history + N * M) instead of N * M full
+    simulations. The whole grid is evaluated at once with NumPy in integer
+    cents; cells the vector path cannot evaluate exactly (prices that are
+    not whole cents, values that could overflow int64) are recomputed by
+    TaxCalculator from the same state, so every cell equals the tax of the
+    last operation of the full simulation.
+    """
+    
+    def __init__(self, operations: List[Operation], engine: str = "decimal"):
+        """
+        Processes the base history.
+        
+        Args:
+            operations: Operations preceding the candidate trade
+            engine: Arithmetic engine of the base history calculation
+        
+        Raises:
+            ImportError: If NumPy is not installed
+            ValueError: If the engine is unknown
+        """
+        _require_numpy()
+        self.calculator = TaxCalculator(engine)
+        self.base_taxes: List[TaxResult] = self.calculator.calculate_taxes(operations)
+        self.state = self.calculator.export_state()
+    
+    @classmethod
+    def from_json(cls, json_str: str, engine: str = "decimal") -> 'ScenarioSweep':
+        """
+        Creates a sweep from a JSON simulation line.
+        
+        Args:
+            json_str: JSON array with the base operations
+            engine: Arithmetic engine of the base history calculation
+        
+        Returns:
+            Sweep over the end state of the simulation
+        """
+        return cls(parse_operations(json_str), engine)
+    
+    def sell_taxes(self, prices: Sequence[Union[float, Decimal]], quantities: Sequence[int]) -> "np.ndarray":
+        """
+        Calculates the tax of a final sell for every price and quantity.
+        
+        Args:
+            prices: Candidate unit prices
+            quantities: Candidate quantities
+        
+        Returns:
+            Array of shape (len(prices), len(quantities)) with the tax in
+            cents of selling each quantity at each price
+        """
+        price_cents = [_to_cents(Decimal(str(price))) for price in prices]
+        quantities = [int(quantity) for quantity in quantities]
+        taxes = np.zeros((len(price_cents), len(quantities)), dtype=np.int64)
+        if not taxes.size:
+            return taxes
+        
+        average = _to_cents(self.state.weighted_average_price)
+        loss = _to_cents(self.state.accumulated_loss)
+        exact_rows = [row for row, cents in enumerate(price_cents) if cents is not None]
+        scalar_rows = [row for row, cents in enumerate(price_cents) if cents is None]
+        
+        if exact_rows and average is not None and loss is not None and loss >= 0:
+            largest = max(abs(price_cents[row]) for row in exact_rows) + abs(average) + loss
+            if 4 * largest * max(max(abs(quantity) for quantity in quantities), 1) < _SAFE_MAGNITUDE:
+                rows = np.array(exact_rows)
+                taxes[rows] = _sell_taxes_vectorized(
+                    np.array([price_cents[row] for row in exact_rows], dtype=np.int64),
+                    np.array(quantities, dtype=np.int64),
+                    average,
+                    loss
+                )
+            else:
+                scalar_rows = range(len(price_cents))
+        else:
+            scalar_rows = range(len(price_cents))
+        
+        for row in scalar_rows:
+            taxes[row] = [self._scalar_sell_tax(prices[row], quantity) for quantity in quantities]
+        return taxes
+    
+    def _scalar_sell_tax(self, price: Union[float, Decimal], quantity: int) -> int:
+        """Calculates one cell with TaxCalculator from the end state."""
+        self.calculator.import_state(self.state)
+        result = self.calculator.append_operations([Operation("sell", price, quantity)])[0]
+        return int(result.tax.scaleb(2))
+
+
+def _sell_taxes_vectorized(prices: "np.ndarray", quantities: "np.ndarray", average: int, loss: int) -> "np.ndarray":
+    """Applies the sell rules of TaxCalculator to a price by quantity grid in cents."""
+    operation_value = np.multiply.outer(prices, quantities)
+    profit_or_loss = operation_value - average * quantities
+    
+    # Losses and exempt sells pay nothing; profits covered by the loss are offset
+    taxable = (profit_or_loss >= 0) & (operation_value > _EXEMPTION_CENTS) & (profit_or_loss > loss)
+    return np.where(taxable, ((profit_or_loss - loss) * 2 + 5) // 10, 0)
+
+
+def _require_numpy():
+    """Raises ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError("NumPy is required for scenario sweeps")
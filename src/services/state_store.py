@@ -0,0 +1,191 @@
+"""
+Module that implements a persistent SQLite store of calculator states keyed by account.
+"""
+
+import sqlite3
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from src.models.calculator_state import CalculatorState
+
+
+class StateStore:
+    """
+    Store keeping the calculator state of each account between runs.
+    
+    States live in a single SQLite table, with amounts stored as exact
+    decimal strings. Reads and writes go through a bounded LRU write-back
+    cache: updated states are only written when evicted or when enough of
+    them are pending, each time as one batched transaction. prefetch loads
+    the states of many accounts with one join against a temporary table
+    instead of a lookup per account, and remembers accounts that have no
+    state yet so they are not looked up again.
+    """
+    
+    def __init__(self, path: str, cache_size: int = 1000000, batch_size: int = 10000):
+        """
+        Opens (or creates) a store.
+        
+        Args:
+            path: Path of the SQLite database file, ':memory:' for a transient store
+            cache_size: Maximum number of accounts kept in memory
+            batch_size: Number of pending writes that triggers a flush
+        """
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0
+        self.writes = 0
+        self._cache: "OrderedDict[str, Optional[CalculatorState]]" = OrderedDict()
+        self._dirty: Dict[str, CalculatorState] = {}
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS account_state ("
+            "account TEXT PRIMARY KEY, weighted_average_price TEXT NOT NULL, "
+            "total_shares TEXT NOT NULL, accumulated_loss TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._connection.commit()
+    
+    def __enter__(self) -> 'StateStore':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self) -> int:
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM account_state").fetchone()[0]
+    
+    def get(self, account: str) -> Optional[CalculatorState]:
+        """
+        Returns the state of an account, from memory when cached or prefetched.
+        
+        Args:
+            account: Account identifier
+        
+        Returns:
+            Stored state, or None if the account has no state yet
+        """
+        try:
+            state = self._cache[account]
+        except KeyError:
+            self.misses += 1
+            self.reads += 1
+            row = self._connection.execute(
+                "SELECT weighted_average_price, total_shares, accumulated_loss FROM account_state WHERE account = ?",
+                (account,)
+            ).fetchone()
+            state = _row_state(row) if row is not None else None
+            self._remember(account, state)
+            return state
+        self.hits += 1
+        self._cache.move_to_end(account)
+        return state
+    
+    def put(self, account: str, state: CalculatorState):
+        """
+        Stores the state of an account, writing it back later in a batch.
+        
+        Args:
+            account: Account identifier
+            state: New state of the account
+        """
+        self._remember(account, state)
+        self._dirty[account] = state
+        if len(self._dirty) >= self.batch_size:
+            self.flush()
+    
+    def prefetch(self, accounts: Iterable[str]):
+        """
+        Loads the states of many accounts into the cache with one query.
+        
+        Accounts already cached are skipped. At most cache_size accounts are
+        kept, so only the last ones prefetched stay in memory when more are
+        requested.
+        
+        Args:
+            accounts: Account identifiers, duplicates allowed
+        """
+        missing = list(dict.fromkeys(account for account in accounts if account not in self._cache))
+        if not missing:
+            return
+        self.reads += 1
+        cursor = self._connection.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS prefetch_accounts (account TEXT PRIMARY KEY) WITHOUT ROWID")
+        cursor.execute("DELETE FROM prefetch_accounts")
+        cursor.executemany("INSERT INTO prefetch_accounts VALUES (?)", ((account,) for account in missing))
+        cursor.execute(
+            "SELECT s.account, s.weighted_average_price, s.total_shares, s.accumulated_loss "
+            "FROM prefetch_accounts p JOIN account_state s ON s.account = p.account"
+        )
+        rows = cursor.fetchall()
+        cursor.execute("DELETE FROM prefetch_accounts")
+        self._connection.commit()
+        
+        cache = self._cache
+        cache.update(dict.fromkeys(missing))
+        for row in rows:
+            cache[row[0]] = _row_state(row[1:])
+        self._evict()
+    
+    def flush(self):
+        """Writes every pending state in a single transaction."""
+        if not self._dirty:
+            return
+        self.writes += 1
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO account_state VALUES (?, ?, ?, ?)",
+                (
+                    (account, str(state.weighted_average_price), str(state.total_shares), str(state.accumulated_loss))
+                    for account, state in self._dirty.items()
+                )
+            )
+        self._dirty.clear()
+    
+    def close(self):
+        """Writes pending states and closes the database."""
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+        
+        Returns:
+            Dictionary with hits, misses, batched reads and writes and size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reads": self.reads,
+            "writes": self.writes,
+            "entries": len(self._cache)
+        }
+    
+    def _remember(self, account: str, state: Optional[CalculatorState]):
+        """Caches a state, evicting the least recently used accounts when full."""
+        self._cache[account] = state
+        self._cache.move_to_end(account)
+        self._evict()
+    
+    def _evict(self):
+        """Evicts the least recently used accounts beyond cache_size."""
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            # An evicted state must reach the database before it is read back
+            if evicted in self._dirty:
+                self.flush()
+
+
+def _row_state(row) -> CalculatorState:
+    """Builds a state from its stored columns."""
+    shares = row[1]
+    shares = int(shares) if shares.lstrip("-").isdigit() else float(shares)
+    return CalculatorState(Decimal(row[0]), shares, Decimal(row[2]))
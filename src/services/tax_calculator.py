@@ -1,29 +1,58 @@
-
 """
 Module that implements the tax calculation logic for capital gains.
 """
 
+from array import array
 from decimal import Decimal, ROUND_HALF_UP
-from typing import List
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from src.models.calculator_state import CalculatorState
 from src.models.operation import Operation, OperationType
+from src.models.operation_batch import OperationBatch, BUY_CODE
 from src.models.tax_result import TaxResult
 
 
+ENGINES = ("decimal", "cents")
+
+# Decimal constants built once instead of on every call
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+EXEMPTION_LIMIT = Decimal('20000')
+TAX_RATE = Decimal('0.2')
+
+# Bound on the magnitude of every integer handled by the cents engine. Below it
+# the Decimal engine's 28-digit context never rounds, so both engines agree.
+_EXACT_LIMIT = 10 ** 26
+
+
 class TaxCalculator:
     """
     Class responsible for calculating taxes on financial operations.
     """
     
-    def __init__(self):
-        """Initializes the tax calculator with zeroed state."""
+    def __init__(self, engine: str = "decimal"):
+        """
+        Initializes the tax calculator with zeroed state.
+        
+        Args:
+            engine: Arithmetic engine, either 'decimal' or 'cents'. The cents
+                engine works on integer cents with explicit half-up rounding
+                and produces the same results as the decimal engine
+                
+        Raises:
+            ValueError: If the engine is unknown
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
         self.reset_state()
     
     def reset_state(self):
         """Resets the state for a new simulation."""
-        self.weighted_average_price = Decimal('0')
+        self.weighted_average_price = ZERO
         self.total_shares = 0
-        self.accumulated_loss = Decimal('0')
+        self.accumulated_loss = ZERO
     
     def calculate_taxes(self, operations: List[Operation]) -> List[TaxResult]:
         """
@@ -35,20 +64,233 @@ class TaxCalculator:
         Returns:
             List of tax results for each operation
         """
+        return list(self.iter_taxes(operations))
+    
+    def iter_taxes(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """
+        Lazily calculates the tax for a stream of operations.
+        
+        The state is reset when iteration starts and each result is yielded as
+        soon as its operation is processed, so operations can be consumed from
+        a generator without holding the whole simulation in memory.
+        
+        Args:
+            operations: Iterable of operations to be processed
+            
+        Yields:
+            Tax result for each operation, in order
+        """
+        self.reset_state()
+        yield from self._iter_taxes_from_state(operations)
+    
+    def export_state(self) -> CalculatorState:
+        """
+        Takes a snapshot of the current state.
+        
+        Returns:
+            Snapshot that can be serialized and later passed to import_state
+        """
+        return CalculatorState(self.weighted_average_price, self.total_shares, self.accumulated_loss)
+    
+    def import_state(self, state: CalculatorState):
+        """
+        Restores the state from a snapshot.
+        
+        Args:
+            state: Snapshot produced by export_state
+        """
+        self.weighted_average_price = state.weighted_average_price
+        self.total_shares = state.total_shares
+        self.accumulated_loss = state.accumulated_loss
+    
+    def append_operations(self, operations: Iterable[Operation], state: Optional[CalculatorState] = None) -> List[TaxResult]:
+        """
+        Calculates the tax for new operations without replaying the history.
+        
+        Processing continues from the given snapshot, or from the current
+        state when none is given, so each new trade costs O(1) instead of
+        O(history). The resulting state can be taken with export_state.
+        
+        Args:
+            operations: New operations to be processed
+            state: Snapshot of the state after the previous operations
+            
+        Returns:
+            List of tax results for the new operations
+        """
+        if state is not None:
+            self.import_state(state)
+        return list(self._iter_taxes_from_state(operations))
+    
+    def calculate_batch(self, batch: OperationBatch) -> array:
+        """
+        Calculates the taxes for a columnar batch of operations.
+        
+        Rows are read straight from the batch columns, so no Operation or
+        TaxResult object is created per row.
+        
+        Args:
+            batch: Batch of operations to be processed
+            
+        Returns:
+            Array with the tax in cents for each operation
+        """
         self.reset_state()
-        results = []
+        taxes = array('q', bytes(8 * len(batch)))
+        start = 0
         
+        if self.engine == "cents":
+            types, prices, quantities = batch.types, batch.prices, batch.quantities
+            rows = ((types[index] == BUY_CODE, prices[index], quantities[index], index) for index in range(len(types)))
+            core = self._run_cents(rows)
+            index = 0
+            while True:
+                try:
+                    taxes[index] = next(core)
+                except StopIteration as stop:
+                    if stop.value is None:
+                        return taxes
+                    start = stop.value[3]
+                    break
+                index += 1
+        
+        self._calculate_batch_decimal(batch, taxes, start)
+        return taxes
+    
+    def _iter_taxes_from_state(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """Processes operations with the configured engine, starting from the current state."""
+        if self.engine == "cents":
+            return self._iter_taxes_cents(operations)
+        return self._iter_taxes_decimal(operations)
+    
+    def _iter_taxes_decimal(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """Processes operations with Decimal arithmetic, starting from the current state."""
         for operation in operations:
             if operation.operation_type == OperationType.BUY:
                 # Buy operations don't pay taxes
                 self._update_weighted_average(operation.unit_cost, operation.quantity)
-                results.append(TaxResult(Decimal('0')))
+                yield TaxResult(ZERO)
             elif operation.operation_type == OperationType.SELL:
                 # Calculate tax for sell operations
                 tax = self._calculate_sell_tax(operation.unit_cost, operation.quantity)
-                results.append(TaxResult(tax))
+                yield TaxResult(tax)
+    
+    def _iter_taxes_cents(self, operations: Iterable[Operation]) -> Iterator[TaxResult]:
+        """
+        Processes operations with integer cents, starting from the current state.
+        
+        Operations the integer engine cannot reproduce exactly (fractional
+        cents, non-integer quantities or out of range values) switch the rest
+        of the simulation over to the Decimal engine.
+        """
+        operations = iter(operations)
+        rows = (
+            (operation.operation_type == OperationType.BUY, _to_cents(operation.unit_cost), operation.quantity, operation)
+            for operation in operations
+        )
+        core = self._run_cents(rows)
+        
+        while True:
+            try:
+                tax = next(core)
+            except StopIteration as stop:
+                pending = stop.value
+                break
+            yield TaxResult(Decimal(tax).scaleb(-2) if tax else ZERO)
         
-        return results
+        if pending is not None:
+            yield from self._iter_taxes_decimal(chain([pending[3]], operations))
+    
+    def _calculate_batch_decimal(self, batch: OperationBatch, taxes: array, start: int):
+        """Fills taxes from row start on with Decimal arithmetic, starting from the current state."""
+        types, prices, quantities = batch.types, batch.prices, batch.quantities
+        
+        for index in range(start, len(types)):
+            unit_cost = Decimal(prices[index]).scaleb(-2)
+            if types[index] == BUY_CODE:
+                self._update_weighted_average(unit_cost, quantities[index])
+            else:
+                tax = self._calculate_sell_tax(unit_cost, quantities[index])
+                if tax:
+                    taxes[index] = int(tax.scaleb(2))
+    
+    def _run_cents(self, rows: Iterator[Tuple[bool, Optional[int], int, object]]):
+        """
+        Integer cents engine shared by the operation and batch paths.
+        
+        Each row is (is_buy, unit cost in cents or None, quantity, payload).
+        The state is loaded from and stored back into the Decimal attributes,
+        so both engines can continue each other's work.
+        
+        Args:
+            rows: Iterator of rows to be processed
+            
+        Yields:
+            Tax in cents for each row
+            
+        Returns:
+            The first row that could not be processed exactly, or None
+        """
+        limit = _EXACT_LIMIT
+        weighted_average = _to_cents(self.weighted_average_price)
+        loss = _to_cents(self.accumulated_loss)
+        shares = self.total_shares
+        if weighted_average is None or loss is None or type(shares) is not int or not -limit < shares < limit:
+            return next(rows, None)
+        
+        try:
+            for row in rows:
+                is_buy, unit_cost, quantity, _ = row
+                if unit_cost is None or type(quantity) is not int:
+                    return row
+                
+                if is_buy:
+                    if shares == 0:
+                        if not -limit < quantity < limit:
+                            return row
+                        weighted_average = unit_cost
+                        shares = quantity
+                    else:
+                        total_value = weighted_average * shares + unit_cost * quantity
+                        total_shares = shares + quantity
+                        if total_shares == 0 or not (-limit < total_value < limit and -limit < total_shares < limit):
+                            return row
+                        weighted_average = _divide_half_up(total_value, total_shares)
+                        shares = total_shares
+                    yield 0
+                    continue
+                
+                operation_value = unit_cost * quantity
+                cost_basis = weighted_average * quantity
+                remaining = shares - quantity
+                if not (-limit < operation_value < limit and -limit < cost_basis < limit and -limit < remaining < limit):
+                    return row
+                profit_or_loss = operation_value - cost_basis
+                
+                if profit_or_loss < 0:
+                    if loss - profit_or_loss >= limit:
+                        return row
+                    loss -= profit_or_loss
+                    tax = 0
+                elif operation_value <= 2000000:
+                    tax = 0
+                elif loss > 0:
+                    if profit_or_loss <= loss:
+                        loss -= profit_or_loss
+                        tax = 0
+                    else:
+                        # 20% of the taxable profit, rounded half up to cents
+                        tax = ((profit_or_loss - loss) * 2 + 5) // 10
+                        loss = 0
+                else:
+                    tax = (profit_or_loss * 2 + 5) // 10
+                shares = remaining
+                yield tax
+        finally:
+            self.weighted_average_price = Decimal(weighted_average).scaleb(-2)
+            self.total_shares = shares
+            self.accumulated_loss = Decimal(loss).scaleb(-2)
+        return None
     
     def _update_weighted_average(self, unit_cost: Decimal, quantity: int):
         """
@@ -64,7 +306,7 @@ class TaxCalculator:
         else:
             total_value = (self.weighted_average_price * self.total_shares) + (unit_cost * quantity)
             self.total_shares += quantity
-            self.weighted_average_price = (total_value / self.total_shares).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            self.weighted_average_price = (total_value / self.total_shares).quantize(CENT, rounding=ROUND_HALF_UP)
     
     def _calculate_sell_tax(self, unit_cost: Decimal, quantity: int) -> Decimal:
         """
@@ -88,22 +330,41 @@ class TaxCalculator:
         # If it's a loss, accumulate to deduct from future profits
         if profit_or_loss < 0:
             self.accumulated_loss += abs(profit_or_loss)
-            return Decimal('0')
+            return ZERO
         
         # If the total value of the operation is less than or equal to R$ 20,000.00, no tax is paid
-        if operation_value <= Decimal('20000'):
-            return Decimal('0')
+        if operation_value <= EXEMPTION_LIMIT:
+            return ZERO
         
         # Deduct accumulated losses from current profit
         if self.accumulated_loss > 0:
             if profit_or_loss <= self.accumulated_loss:
                 self.accumulated_loss -= profit_or_loss
-                return Decimal('0')
+                return ZERO
             else:
                 taxable_profit = profit_or_loss - self.accumulated_loss
-                self.accumulated_loss = Decimal('0')
+                self.accumulated_loss = ZERO
                 # Calculate 20% tax on taxable profit
-                return (taxable_profit * Decimal('0.2')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                return (taxable_profit * TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
         
         # Calculate 20% tax on profit
-        return (profit_or_loss * Decimal('0.2')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return (profit_or_loss * TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _to_cents(value: Decimal) -> Optional[int]:
+    """Returns a Decimal amount as integer cents, or None if not exactly representable."""
+    if not value.is_finite():
+        return None
+    numerator, denominator = value.as_integer_ratio()
+    cents, remainder = divmod(numerator * 100, denominator)
+    if remainder or not -_EXACT_LIMIT < cents < _EXACT_LIMIT:
+        return None
+    return cents
+
+
+def _divide_half_up(dividend: int, divisor: int) -> int:
+    """Divides two integers rounding half away from zero, like ROUND_HALF_UP."""
+    quotient, remainder = divmod(abs(dividend), abs(divisor))
+    if 2 * remainder >= abs(divisor):
+        quotient += 1
+    return -quotient if (dividend < 0) != (divisor < 0) else quotient
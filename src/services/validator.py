@@ -0,0 +1,216 @@
+"""
+Module that implements the validation pre-pass run before any tax is calculated.
+"""
+
+import math
+from decimal import Decimal
+from typing import Any, Hashable, List, Sequence
+
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+
+
+VALIDATION_MODES = ("strict", "lenient")
+
+_OPERATION_NAMES = ("buy", "sell")
+_FIELDS = ("operation", "unit-cost", "quantity")
+
+# Batches shorter than this are cheaper to scan in Python than to hand to NumPy
+_VECTOR_MIN_LENGTH = 256
+
+
+class OperationIssue:
+    """
+    Class describing why one operation of a simulation is invalid.
+    """
+    
+    __slots__ = ("index", "reason")
+    
+    def __init__(self, index: int, reason: str):
+        """
+        Initializes an issue.
+        
+        Args:
+            index: Zero-based position of the operation in the simulation
+            reason: Description of the problem
+        """
+        self.index = index
+        self.reason = reason
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, OperationIssue):
+            return NotImplemented
+        return self.index == other.index and self.reason == other.reason
+    
+    def __repr__(self) -> str:
+        return f"OperationIssue({self.index!r}, {self.reason!r})"
+    
+    def __str__(self) -> str:
+        return f"operation {self.index}: {self.reason}"
+
+
+class SimulationValidationError(ValueError):
+    """
+    Error raised when a simulation is rejected by strict validation.
+    """
+    
+    def __init__(self, issues: List[OperationIssue]):
+        """
+        Initializes the error.
+        
+        Args:
+            issues: Every problem found in the simulation
+        """
+        super().__init__("Invalid simulation: " + "; ".join(str(issue) for issue in issues))
+        self.issues = issues
+
+
+def validate_records(records: Any, per_ticker: bool = False) -> List[OperationIssue]:
+    """
+    Checks decoded JSON operations in a single pass, without Decimal arithmetic.
+    
+    Each operation must be an object with a 'buy' or 'sell' operation and a
+    finite non-negative unit cost and quantity, and a sell may not exceed
+    the shares held. Zero and fractional quantities are left to the
+    calculator, exactly as without validation. Invalid operations do not change the
+    shares held, so every issue is reported as if they were skipped.
+    
+    Args:
+        records: Decoded JSON value of a simulation
+        per_ticker: Whether shares are held per ticker, as in the portfolio engine
+    
+    Returns:
+        Issues found, ordered by index; empty when the simulation is valid
+    
+    Raises:
+        SimulationValidationError: If the simulation is not an array
+    """
+    if not isinstance(records, list):
+        raise SimulationValidationError([OperationIssue(0, "simulation must be an array of operations")])
+    
+    issues = []
+    held = {}
+    for index, record in enumerate(records):
+        reason = _record_problem(record)
+        if reason is None:
+            ticker: Hashable = record.get("ticker") if per_ticker else None
+            try:
+                shares = held.get(ticker, 0)
+            except TypeError:
+                reason = "ticker must be a string"
+            else:
+                quantity = record["quantity"]
+                if type(quantity) is Decimal:
+                    # Operation.from_dict turns decoded Decimal quantities into floats
+                    quantity = float(quantity)
+                if record["operation"] == "buy":
+                    held[ticker] = shares + quantity
+                elif quantity > shares:
+                    reason = f"sell of {quantity} exceeds {shares} shares held"
+                else:
+                    held[ticker] = shares - quantity
+        if reason is not None:
+            issues.append(OperationIssue(index, reason))
+    return issues
+
+
+def validate_batch(batch: OperationBatch) -> List[OperationIssue]:
+    """
+    Checks a columnar batch of a single asset.
+    
+    Long batches are checked with NumPy when it is installed; the per-row
+    scan is only needed when some sell exceeds the shares held, since
+    skipping invalid rows then changes the shares seen by later ones.
+    
+    Args:
+        batch: Batch to be checked
+    
+    Returns:
+        Issues found, ordered by index; empty when the batch is valid
+    """
+    if len(batch) >= _VECTOR_MIN_LENGTH:
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            np = None
+        if np is not None:
+            issues = _validate_batch_vectorized(np, batch)
+            if issues is not None:
+                return issues
+    return _validate_columns(batch.types, batch.prices, batch.quantities)
+
+
+def _record_problem(record: Any) -> Any:
+    """Returns why a record is malformed, or None."""
+    if not isinstance(record, dict):
+        return "operation must be an object"
+    for field in _FIELDS:
+        if field not in record:
+            return f"missing field '{field}'"
+    
+    operation = record["operation"]
+    if type(operation) is not str or operation not in _OPERATION_NAMES:
+        return f"unknown operation {operation!r}"
+    unit_cost = record["unit-cost"]
+    if type(unit_cost) not in (int, float, Decimal) or not _is_finite(unit_cost) or unit_cost < 0:
+        return "unit-cost must be a finite non-negative number"
+    quantity = record["quantity"]
+    if type(quantity) not in (int, float, Decimal) or not _is_finite(quantity) or quantity < 0:
+        return "quantity must be a finite non-negative number"
+    return None
+
+
+def _is_finite(value: Any) -> bool:
+    """Whether a JSON number is finite."""
+    if type(value) is Decimal:
+        return value.is_finite()
+    return math.isfinite(value)
+
+
+def _validate_columns(types: Sequence[int], prices: Sequence[int], quantities: Sequence[int]) -> List[OperationIssue]:
+    """Scans batch columns row by row."""
+    issues = []
+    shares = 0
+    for index in range(len(types)):
+        code, quantity = types[index], quantities[index]
+        if code != BUY_CODE and code != SELL_CODE:
+            issues.append(OperationIssue(index, f"unknown operation code {code}"))
+        elif prices[index] < 0:
+            issues.append(OperationIssue(index, "unit-cost must be a finite non-negative number"))
+        elif quantity < 0:
+            issues.append(OperationIssue(index, "quantity must be a finite non-negative number"))
+        elif code == BUY_CODE:
+            shares += quantity
+        elif quantity > shares:
+            issues.append(OperationIssue(index, f"sell of {quantity} exceeds {shares} shares held"))
+        else:
+            shares -= quantity
+    return issues
+
+
+def _validate_batch_vectorized(np, batch: OperationBatch):
+    """Checks a batch with NumPy, or returns None when the row scan is needed."""
+    types = np.asarray(batch.types, dtype=np.uint8)
+    prices = np.asarray(batch.prices, dtype=np.int64)
+    quantities = np.asarray(batch.quantities, dtype=np.int64)
+    
+    bad_type = (types != BUY_CODE) & (types != SELL_CODE)
+    bad_price = ~bad_type & (prices < 0)
+    bad_quantity = ~bad_type & ~bad_price & (quantities < 0)
+    valid = ~(bad_type | bad_price | bad_quantity)
+    
+    # Share counts must stay exact, leave huge quantities to the row scan
+    if quantities.max(initial=0) >= 2 ** 62 // max(len(quantities), 1):
+        return None
+    held = np.cumsum(np.where(valid, np.where(types == SELL_CODE, -quantities, quantities), 0))
+    if (held < 0).any():
+        return None
+    
+    issues = []
+    for index in np.flatnonzero(~valid).tolist():
+        if bad_type[index]:
+            issues.append(OperationIssue(index, f"unknown operation code {types[index]}"))
+        elif bad_price[index]:
+            issues.append(OperationIssue(index, "unit-cost must be a finite non-negative number"))
+        else:
+            issues.append(OperationIssue(index, "quantity must be a finite non-negative number"))
+    return issues
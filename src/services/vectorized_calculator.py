@@ -0,0 +1,171 @@
+"""
+Module that implements a NumPy vectorized tax evaluator for many simulations.
+"""
+
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+from src.services.tax_calculator import TaxCalculator
+
+
+PAD_CODE = -1
+
+# Simulations whose largest price times total traded quantity stays below this
+# bound can never overflow the int64 state; the others are evaluated by the
+# scalar engine instead.
+_SAFE_MAGNITUDE = float(2 ** 60)
+
+
+def pad_batches(batches: Sequence[OperationBatch]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Packs simulations into padded 2-D arrays, one row per simulation.
+    
+    Args:
+        batches: Simulations to be packed
+    
+    Returns:
+        Tuple with the type codes (PAD_CODE after the end of each
+        simulation), prices in cents and quantities
+    """
+    _require_numpy()
+    width = max((len(batch) for batch in batches), default=0)
+    types = np.full((len(batches), width), PAD_CODE, dtype=np.int8)
+    prices = np.zeros((len(batches), width), dtype=np.int64)
+    quantities = np.zeros((len(batches), width), dtype=np.int64)
+    
+    for row, batch in enumerate(batches):
+        length = len(batch)
+        types[row, :length] = np.frombuffer(bytes(batch.types), dtype=np.uint8)
+        prices[row, :length] = batch.prices
+        quantities[row, :length] = batch.quantities
+    
+    return types, prices, quantities
+
+
+class VectorizedTaxCalculator:
+    """
+    Class that evaluates thousands of simulations together with NumPy.
+    
+    The state of every simulation (weighted average price, total shares and
+    accumulated loss) is kept in integer cents vectors and all simulations
+    are stepped forward one operation index at a time. Results match
+    TaxCalculator exactly; simulations the vector path cannot evaluate
+    safely (negative prices or quantities, overselling, values that could
+    overflow int64) are recomputed by the scalar cents engine.
+    """
+    
+    def __init__(self):
+        """
+        Initializes the evaluator.
+        
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        _require_numpy()
+        self.fallback_calculator = TaxCalculator(engine="cents")
+    
+    def calculate_batches(self, batches: Sequence[OperationBatch]) -> "np.ndarray":
+        """
+        Calculates the taxes for a sequence of simulations.
+        
+        Args:
+            batches: Simulations to be evaluated
+        
+        Returns:
+            Array of shape (simulations, longest simulation) with the tax in
+            cents of each operation, zero for padding
+        """
+        return self.calculate(*pad_batches(batches))
+    
+    def calculate(self, types: "np.ndarray", prices: "np.ndarray", quantities: "np.ndarray") -> "np.ndarray":
+        """
+        Calculates the taxes for padded simulation arrays.
+        
+        Args:
+            types: 2-D array of BUY_CODE, SELL_CODE or PAD_CODE, where padding
+                may only follow the operations of a simulation
+            prices: 2-D array of unit prices in cents
+            quantities: 2-D array of quantities
+        
+        Returns:
+            Array with the tax in cents of each operation, zero for padding
+        
+        Raises:
+            ValueError: If the arrays differ in shape or contain unknown types
+        """
+        types = np.asarray(types, dtype=np.int8)
+        prices = np.asarray(prices, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if not types.shape == prices.shape == quantities.shape or types.ndim != 2:
+            raise ValueError("Types, prices and quantities must be 2-D arrays of the same shape")
+        if not np.isin(types, (BUY_CODE, SELL_CODE, PAD_CODE)).all():
+            raise ValueError("Unknown operation type code")
+        
+        simulations, width = types.shape
+        active = types != PAD_CODE
+        fallback = ((prices < 0) | (quantities < 0)).any(axis=1)
+        largest_price = np.where(active, prices, 0).max(axis=1, initial=0).astype(np.float64)
+        traded = np.where(active, quantities, 0).astype(np.float64).sum(axis=1)
+        fallback |= largest_price * traded >= _SAFE_MAGNITUDE
+        
+        weighted_average = np.zeros(simulations, dtype=np.int64)
+        shares = np.zeros(simulations, dtype=np.int64)
+        loss = np.zeros(simulations, dtype=np.int64)
+        taxes = np.zeros((simulations, width), dtype=np.int64)
+        
+        for column in range(width):
+            operation_type = types[:, column]
+            unit_cost = np.where(fallback, 0, prices[:, column])
+            quantity = np.where(fallback, 0, quantities[:, column])
+            
+            # Buy operations update the weighted average, rounded half up
+            buy = operation_type == BUY_CODE
+            first_buy = buy & (shares == 0)
+            new_shares = shares + quantity
+            divisor = np.where(buy & ~first_buy & (new_shares != 0), new_shares, 1)
+            total_value = weighted_average * shares + unit_cost * quantity
+            average, remainder = np.divmod(total_value, divisor)
+            average += 2 * remainder >= divisor
+            weighted_average = np.where(first_buy, unit_cost, np.where(buy, average, weighted_average))
+            shares = np.where(buy, new_shares, shares)
+            
+            # Sell operations accumulate losses or pay 20% over the 20000 exemption
+            sell = operation_type == SELL_CODE
+            operation_value = unit_cost * quantity
+            profit_or_loss = operation_value - weighted_average * quantity
+            shares = np.where(sell, shares - quantity, shares)
+            fallback |= sell & (shares < 0)
+            
+            is_loss = sell & (profit_or_loss < 0)
+            loss = np.where(is_loss, loss - profit_or_loss, loss)
+            
+            taxable = sell & (profit_or_loss >= 0) & (operation_value > 2000000)
+            offset = taxable & (loss > 0) & (profit_or_loss <= loss)
+            loss = np.where(offset, loss - profit_or_loss, loss)
+            taxable &= ~offset
+            taxable_profit = profit_or_loss - np.where(taxable, loss, 0)
+            loss = np.where(taxable, 0, loss)
+            taxes[:, column] = np.where(taxable, (taxable_profit * 2 + 5) // 10, 0)
+        
+        for row in np.flatnonzero(fallback):
+            length = int(active[row].sum())
+            batch = OperationBatch(
+                bytearray(types[row, :length].astype(np.uint8).tobytes()),
+                prices[row, :length].tolist(),
+                quantities[row, :length].tolist()
+            )
+            taxes[row, :length] = self.fallback_calculator.calculate_batch(batch)
+            taxes[row, length:] = 0
+        
+        return taxes
+
+
+def _require_numpy():
+    """Raises ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError("NumPy is required for the vectorized tax evaluator")
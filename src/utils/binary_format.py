@@ -0,0 +1,355 @@
+"""
+Utility module implementing the binary columnar format for operations and results.
+
+Streams start with a 4-byte magic and a reserved uint32, followed by one
+record per simulation. All integers are little-endian and every column
+starts on an 8-byte boundary, so records can be mapped straight into
+memoryviews or NumPy arrays:
+
+    operations record: uint32 count, uint32 reserved,
+                       count type codes (BUY_CODE or SELL_CODE) padded to 8 bytes,
+                       count int64 unit prices in cents,
+                       count int64 quantities
+    results record:    uint32 count, uint32 status,
+                       STATUS_OK: count int64 taxes in cents
+                       STATUS_ERROR: count bytes of UTF-8 error message padded to 8 bytes
+
+Usage:
+    python -m src.utils.binary_format to-binary < operations.jsonl > operations.bin
+    python -m src.utils.binary_format to-json < results.bin
+"""
+
+import argparse
+import json
+import struct
+import sys
+from array import array
+from decimal import Decimal
+from typing import BinaryIO, Iterable, Iterator, Sequence, Union
+
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+from src.utils.json_utils import format_cents, parse_operations
+
+
+FORMATS = ("json", "binary")
+
+OPERATIONS_MAGIC = b"CGO1"
+RESULTS_MAGIC = b"CGR1"
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<II")
+_TYPE_CODES = bytes((BUY_CODE, SELL_CODE))
+_TYPE_NAMES = {BUY_CODE: "buy", SELL_CODE: "sell"}
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def stream_header(magic: bytes) -> bytes:
+    """
+    Returns the header starting a binary stream.
+    
+    Args:
+        magic: OPERATIONS_MAGIC or RESULTS_MAGIC
+    
+    Returns:
+        Header bytes
+    """
+    return _HEADER.pack(magic, 0)
+
+
+def encode_batch(batch: OperationBatch) -> bytes:
+    """
+    Encodes one simulation as an operations record.
+    
+    Args:
+        batch: Operations of the simulation
+    
+    Returns:
+        Record bytes
+    """
+    count = len(batch)
+    return b"".join((
+        _RECORD.pack(count, 0),
+        bytes(batch.types),
+        bytes(_padded(count) - count),
+        _int64_bytes(batch.prices),
+        _int64_bytes(batch.quantities)
+    ))
+
+
+def encode_taxes(taxes: Sequence[int]) -> bytes:
+    """
+    Encodes the taxes of one simulation as a results record.
+    
+    Args:
+        taxes: Tax in cents of each operation
+    
+    Returns:
+        Record bytes
+    """
+    return _RECORD.pack(len(taxes), STATUS_OK) + _int64_bytes(taxes)
+
+
+def encode_error(message: str) -> bytes:
+    """
+    Encodes a failed simulation as a results record.
+    
+    Args:
+        message: Error message, without the 'Error: ' prefix of the JSON mode
+    
+    Returns:
+        Record bytes
+    """
+    data = message.encode("utf-8")
+    return _RECORD.pack(len(data), STATUS_ERROR) + data + bytes(_padded(len(data)) - len(data))
+
+
+def iter_batches(data: Union[bytes, bytearray, memoryview]) -> Iterator[OperationBatch]:
+    """
+    Reads the simulations of an operations stream without copying their columns.
+    
+    The batches returned are views into data, which must stay alive (and,
+    for a memory map, open) while they are in use.
+    
+    Args:
+        data: Whole operations stream, e.g. bytes or an mmap
+    
+    Yields:
+        One batch per simulation
+    
+    Raises:
+        ValueError: If the stream is not a valid operations stream
+    """
+    view = memoryview(data).cast("B")
+    offset = _check_header(view, OPERATIONS_MAGIC)
+    end = len(view)
+    
+    while offset < end:
+        batch, offset = _operations_record(view, offset)
+        yield batch
+
+
+def read_batches(stream: BinaryIO) -> Iterator[OperationBatch]:
+    """
+    Reads the simulations of an operations stream one record at a time.
+    
+    Unlike iter_batches, only the record being decoded is held in memory,
+    so a pipe can be processed while it is still being written and the
+    result of each simulation is available before the stream ends.
+    
+    Args:
+        stream: Binary stream positioned at the stream header
+    
+    Yields:
+        One batch per simulation
+    
+    Raises:
+        ValueError: If the stream is not a valid operations stream
+    """
+    _check_header(memoryview(_read_exactly(stream, _HEADER.size)), OPERATIONS_MAGIC)
+    while True:
+        header = _read_exactly(stream, _RECORD.size)
+        if not header:
+            return
+        if len(header) < _RECORD.size:
+            raise ValueError("Truncated record header")
+        count = _RECORD.unpack(header)[0]
+        record = memoryview(header + _read_exactly(stream, _padded(count) + 16 * count))
+        yield _operations_record(record, 0)[0]
+
+
+def iter_results(data: Union[bytes, bytearray, memoryview]) -> Iterator[Union[Sequence[int], str]]:
+    """
+    Reads the records of a results stream without copying the taxes.
+    
+    Args:
+        data: Whole results stream
+    
+    Yields:
+        Taxes in cents of each simulation, or its error message
+    
+    Raises:
+        ValueError: If the stream is not a valid results stream
+    """
+    view = memoryview(data).cast("B")
+    offset = _check_header(view, RESULTS_MAGIC)
+    end = len(view)
+    
+    while offset < end:
+        count, status = _record_size(view, offset)
+        start = offset + _RECORD.size
+        if status == STATUS_OK:
+            offset = start + 8 * count
+        elif status == STATUS_ERROR:
+            offset = start + _padded(count)
+        else:
+            raise ValueError(f"Unknown result status: {status}")
+        if offset > end:
+            raise ValueError("Truncated results record")
+        
+        if status == STATUS_OK:
+            yield _int64_column(view[start:offset])
+        else:
+            yield str(view[start:start + count], "utf-8")
+
+
+def json_to_operations(lines: Iterable[str], stream: BinaryIO):
+    """
+    Converts JSON simulation lines into an operations stream.
+    
+    Args:
+        lines: JSON arrays of operations, one simulation each
+        stream: Binary stream receiving the output
+    
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON
+        ValueError: If a price is not a whole number of cents
+        OverflowError: If a price or quantity does not fit in 64 bits
+    """
+    stream.write(stream_header(OPERATIONS_MAGIC))
+    for line in lines:
+        stream.write(encode_batch(OperationBatch.from_operations(parse_operations(line))))
+
+
+def operations_to_json(data: Union[bytes, bytearray, memoryview]) -> Iterator[str]:
+    """
+    Converts an operations stream into JSON simulation lines.
+    
+    Args:
+        data: Whole operations stream
+    
+    Yields:
+        One JSON array of operations per simulation
+    """
+    for batch in iter_batches(data):
+        yield json.dumps([
+            {"operation": _TYPE_NAMES[code], "unit-cost": price / 100, "quantity": quantity}
+            for code, price, quantity in zip(batch.types, batch.prices, batch.quantities)
+        ])
+
+
+def json_to_results(lines: Iterable[str], stream: BinaryIO):
+    """
+    Converts CLI output lines into a results stream.
+    
+    Args:
+        lines: JSON arrays of taxes or 'Error: ' messages, one per simulation
+        stream: Binary stream receiving the output
+    """
+    stream.write(stream_header(RESULTS_MAGIC))
+    for line in lines:
+        if line.startswith("Error: "):
+            stream.write(encode_error(line[len("Error: "):]))
+        else:
+            taxes = [int(result["tax"].scaleb(2)) for result in json.loads(line, parse_float=Decimal)]
+            stream.write(encode_taxes(taxes))
+
+
+def results_to_json(data: Union[bytes, bytearray, memoryview]) -> Iterator[str]:
+    """
+    Converts a results stream into the CLI output lines.
+    
+    Args:
+        data: Whole results stream
+    
+    Yields:
+        One JSON array of taxes, or 'Error: ' message, per simulation
+    """
+    for result in iter_results(data):
+        yield "Error: " + result if isinstance(result, str) else format_cents(result)
+
+
+def _check_header(view: memoryview, magic: bytes) -> int:
+    """Validates the stream header, returning the offset of the first record."""
+    if len(view) < _HEADER.size or _HEADER.unpack_from(view, 0)[0] != magic:
+        raise ValueError(f"Not a binary stream starting with {magic.decode('ascii')}")
+    return _HEADER.size
+
+
+def _operations_record(view: memoryview, offset: int) -> tuple:
+    """Decodes the operations record at offset, returning its batch and the offset of the next record."""
+    count = _record_size(view, offset)[0]
+    types_start = offset + _RECORD.size
+    prices_start = types_start + _padded(count)
+    quantities_start = prices_start + 8 * count
+    end = quantities_start + 8 * count
+    if end > len(view):
+        raise ValueError("Truncated operations record")
+    
+    types = view[types_start:types_start + count]
+    if types.tobytes().translate(None, _TYPE_CODES):
+        raise ValueError("Unknown operation type code")
+    batch = OperationBatch(
+        types,
+        _int64_column(view[prices_start:quantities_start]),
+        _int64_column(view[quantities_start:end])
+    )
+    return batch, end
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Reads size bytes, fewer only when the stream ends first."""
+    data = stream.read(size)
+    while len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def _record_size(view: memoryview, offset: int) -> tuple:
+    """Unpacks a record header, checking it is complete."""
+    if offset + _RECORD.size > len(view):
+        raise ValueError("Truncated record header")
+    return _RECORD.unpack_from(view, offset)
+
+
+def _padded(size: int) -> int:
+    """Rounds a byte count up to the next multiple of 8."""
+    return (size + 7) & ~7
+
+
+def _int64_column(view: memoryview) -> Sequence[int]:
+    """Returns little-endian int64 data as an indexable column, zero-copy on little-endian hosts."""
+    if _LITTLE_ENDIAN:
+        return view.cast("q")
+    column = array('q', view.tobytes())
+    column.byteswap()
+    return column
+
+
+def _int64_bytes(values: Sequence[int]) -> bytes:
+    """Encodes integers as little-endian int64 bytes."""
+    column = values if isinstance(values, array) and values.typecode == 'q' else array('q', values)
+    if _LITTLE_ENDIAN:
+        return column.tobytes()
+    column = array('q', column)
+    column.byteswap()
+    return column.tobytes()
+
+
+def main(argv=None) -> int:
+    """Converts between the JSON and binary formats on standard input and output."""
+    parser = argparse.ArgumentParser(description="Convert between JSON lines and the binary columnar format")
+    parser.add_argument("direction", choices=("to-binary", "to-json"), help="conversion to perform")
+    parser.add_argument("--results", action="store_true", help="convert CLI output lines instead of operations (to-binary)")
+    args = parser.parse_args(argv)
+    
+    if args.direction == "to-binary":
+        lines = (line.strip() for line in sys.stdin)
+        lines = [line for line in lines if line]
+        (json_to_results if args.results else json_to_operations)(lines, sys.stdout.buffer)
+        return 0
+    
+    data = sys.stdin.buffer.read()
+    converter = results_to_json if data[:4] == RESULTS_MAGIC else operations_to_json
+    for line in converter(data):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Utility module for reading large simulation files in line-aligned chunks.
+"""
+
+import gzip
+import mmap
+import os
+from typing import Iterator, List
+
+
+def iter_line_chunks(path: str, chunk_bytes: int = 8 * 1024 * 1024) -> Iterator[List[bytes]]:
+    """
+    Reads a file as chunks of complete lines.
+    
+    Plain files are memory-mapped and split at the first newline after every
+    chunk_bytes boundary, so no line is ever cut in two. Files ending in .gz
+    are decompressed as a stream and split the same way.
+    
+    Args:
+        path: Path of the input file
+        chunk_bytes: Approximate size of each chunk
+    
+    Yields:
+        Lists of raw lines, without line terminators
+    """
+    if path.endswith(".gz"):
+        yield from _iter_gzip_chunks(path, chunk_bytes)
+        return
+    
+    with open(path, "rb") as input_file:
+        size = os.fstat(input_file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = 0
+            while position < size:
+                end = min(position + chunk_bytes, size)
+                if end < size:
+                    newline = mapped.find(b"\n", end - 1)
+                    end = size if newline == -1 else newline + 1
+                yield mapped[position:end].splitlines()
+                position = end
+
+
+def output_path_for(path: str, output_dir: str) -> str:
+    """
+    Returns the path of the output file written for an input file.
+    
+    Args:
+        path: Path of the input file
+        output_dir: Directory receiving the output files
+    
+    Returns:
+        Output path named after the input, without a .gz suffix, ending in .out
+    """
+    name = os.path.basename(path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return os.path.join(output_dir, name + ".out")
+
+
+def output_paths_for(paths: List[str], output_dir: str) -> List[str]:
+    """
+    Returns the output path of every input file, checking they are distinct.
+    
+    Args:
+        paths: Paths of the input files
+        output_dir: Directory receiving the output files
+    
+    Returns:
+        Output path of each input, in order
+    
+    Raises:
+        ValueError: If two inputs would write the same output file, e.g.
+            a.jsonl and a.jsonl.gz, or files with the same name in different
+            directories
+    """
+    outputs = [output_path_for(path, output_dir) for path in paths]
+    writers = {}
+    for index, output_path in enumerate(outputs):
+        previous = writers.setdefault(os.path.normpath(output_path), index)
+        if previous != index:
+            raise ValueError(f"Inputs {paths[previous]} and {paths[index]} would both write {output_path}")
+    return outputs
+
+
+def _iter_gzip_chunks(path: str, chunk_bytes: int) -> Iterator[List[bytes]]:
+    """Reads a gzip-compressed file as chunks of complete lines."""
+    remainder = b""
+    with gzip.open(path, "rb") as input_file:
+        while True:
+            block = input_file.read(chunk_bytes)
+            if not block:
+                break
+            block = remainder + block
+            newline = block.rfind(b"\n")
+            if newline == -1:
+                remainder = block
+                continue
+            remainder = block[newline + 1:]
+            yield block[:newline].splitlines()
+    if remainder:
+        yield remainder.splitlines()
+
+
+class FileReport:
+    """
+    Class representing the throughput of processing one input file.
+    """
+    
+    __slots__ = ("path", "output_path", "lines", "bytes", "seconds")
+    
+    def __init__(self, path: str, output_path: str, lines: int, bytes: int, seconds: float):
+        """
+        Initializes a new report.
+        
+        Args:
+            path: Path of the input file
+            output_path: Path of the output file
+            lines: Number of simulation lines processed
+            bytes: Number of uncompressed input bytes processed
+            seconds: Elapsed wall-clock time
+        """
+        self.path = path
+        self.output_path = output_path
+        self.lines = lines
+        self.bytes = bytes
+        self.seconds = seconds
+    
+    @property
+    def lines_per_second(self) -> float:
+        """Lines processed per second."""
+        return self.lines / self.seconds if self.seconds else 0.0
+    
+    @property
+    def megabytes_per_second(self) -> float:
+        """Input megabytes processed per second."""
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+    
+    def summary(self) -> str:
+        """
+        Formats the report as a single human readable line.
+        
+        Returns:
+            Summary of the throughput
+        """
+        return (
+            f"{self.path}: {self.lines} lines, {self.bytes / 1e6:.1f} MB in {self.seconds:.2f}s "
+            f"({self.lines_per_second:.0f} lines/s, {self.megabytes_per_second:.1f} MB/s) -> {self.output_path}"
+        )
@@ -0,0 +1,230 @@
+"""
+Utility module implementing optional timers, counters and profiling hooks for the hot path.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import src.capital_gains_cli as capital_gains_cli
+import src.utils.json_utils as json_utils
+from src.models.operation import Operation
+from src.services.tax_calculator import TaxCalculator, EXEMPTION_LIMIT
+
+
+class Instrumentation:
+    """
+    Per-stage timers and business counters for a run.
+    
+    Instrumentation works by wrapping parse_operations, Operation.from_dict,
+    TaxCalculator.calculate_taxes, TaxCalculator._update_weighted_average,
+    TaxCalculator._calculate_sell_tax and format_results while installed.
+    Nothing is wrapped otherwise, so a disabled instrumentation costs nothing.
+    Per-operation stages are only reached by the decimal engine in the
+    current process, which is why main rejects --metrics with the modes
+    that bypass them (see main.metrics_conflicts).
+    """
+    
+    def __init__(self):
+        """Initializes empty timers and counters."""
+        self.timers = defaultdict(lambda: [0, 0])
+        self.counters = defaultdict(int)
+        self._originals: List[Tuple[Any, str, Any]] = []
+    
+    def __enter__(self) -> 'Instrumentation':
+        self.install()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.uninstall()
+    
+    @property
+    def installed(self) -> bool:
+        """Whether the instrumentation wrappers are currently in place."""
+        return bool(self._originals)
+    
+    def install(self):
+        """
+        Wraps the instrumented functions.
+        
+        Raises:
+            RuntimeError: If the instrumentation is already installed
+        """
+        if self.installed:
+            raise RuntimeError("Instrumentation is already installed")
+        
+        parse_operations = self._timed("parse_operations", json_utils.parse_operations)
+        format_results = self._timed("format_results", json_utils.format_results)
+        for module in (json_utils, capital_gains_cli):
+            self._replace(module, "parse_operations", parse_operations)
+            self._replace(module, "format_results", format_results)
+        
+        self._replace(Operation, "from_dict", classmethod(self._timed("Operation.from_dict", Operation.from_dict.__func__)))
+        self._replace(TaxCalculator, "calculate_taxes", self._counted_calculation(TaxCalculator.calculate_taxes))
+        self._replace(
+            TaxCalculator,
+            "_update_weighted_average",
+            self._timed("TaxCalculator._update_weighted_average", TaxCalculator._update_weighted_average)
+        )
+        self._replace(TaxCalculator, "_calculate_sell_tax", self._classified_sell(TaxCalculator._calculate_sell_tax))
+    
+    def uninstall(self):
+        """Restores the original functions."""
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the collected metrics to a dictionary.
+        
+        Returns:
+            Dictionary with the timers (calls and seconds per stage) and counters
+        """
+        return {
+            "timers": {
+                stage: {"calls": calls, "seconds": nanoseconds / 1e9}
+                for stage, (calls, nanoseconds) in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items()))
+        }
+    
+    def to_json(self) -> str:
+        """
+        Serializes the collected metrics as JSON.
+        
+        Returns:
+            JSON string with the metrics
+        """
+        return json.dumps(self.to_dict())
+    
+    def to_prometheus(self) -> str:
+        """
+        Serializes the collected metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Metrics text
+        """
+        lines = [
+            "# TYPE capital_gains_stage_calls_total counter",
+            "# TYPE capital_gains_stage_seconds_total counter"
+        ]
+        for stage, (calls, nanoseconds) in sorted(self.timers.items()):
+            lines.append(f'capital_gains_stage_calls_total{{stage="{stage}"}} {calls}')
+            lines.append(f'capital_gains_stage_seconds_total{{stage="{stage}"}} {nanoseconds / 1e9:.9f}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE capital_gains_{name}_total counter")
+            lines.append(f"capital_gains_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+    
+    def export(self, metrics_format: str = "json", path: Optional[str] = None):
+        """
+        Writes the collected metrics to a file or to standard error.
+        
+        Args:
+            metrics_format: Either 'json' or 'prometheus'
+            path: Destination file; standard error when omitted
+        
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if metrics_format == "json":
+            text = self.to_json() + "\n"
+        elif metrics_format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Unknown metrics format: {metrics_format}")
+        
+        if path is None:
+            sys.stderr.write(text)
+        else:
+            with open(path, "w") as metrics_file:
+                metrics_file.write(text)
+    
+    def _replace(self, owner: Any, name: str, replacement: Any):
+        """Replaces an attribute, remembering the original."""
+        self._originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+    
+    def _timed(self, stage: str, function: Callable) -> Callable:
+        """Wraps a function accumulating its calls and elapsed time."""
+        timer = self.timers[stage]
+        clock = time.perf_counter_ns
+        
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer[0] += 1
+                timer[1] += clock() - start
+        
+        return wrapper
+    
+    def _counted_calculation(self, function: Callable) -> Callable:
+        """Wraps TaxCalculator.calculate_taxes counting the operations processed."""
+        timed = self._timed("TaxCalculator.calculate_taxes", function)
+        counters = self.counters
+        
+        @wraps(function)
+        def wrapper(calculator, operations):
+            results = timed(calculator, operations)
+            counters["operations_processed"] += len(results)
+            return results
+        
+        return wrapper
+    
+    def _classified_sell(self, function: Callable) -> Callable:
+        """Wraps TaxCalculator._calculate_sell_tax classifying each sell."""
+        timed = self._timed("TaxCalculator._calculate_sell_tax", function)
+        counters = self.counters
+        
+        @wraps(function)
+        def wrapper(calculator, unit_cost, quantity):
+            loss_before = calculator.accumulated_loss
+            tax = timed(calculator, unit_cost, quantity)
+            loss_after = calculator.accumulated_loss
+            
+            if loss_after > loss_before:
+                counters["loss_carry_forward_events"] += 1
+            elif unit_cost * quantity <= EXEMPTION_LIMIT:
+                counters["sells_exempted_under_20k"] += 1
+            elif loss_after < loss_before and not tax:
+                counters["sells_offset_by_loss"] += 1
+            else:
+                counters["sells_taxed"] += 1
+            return tax
+        
+        return wrapper
+
+
+@contextmanager
+def profiled(path: Optional[str] = None) -> Iterator[cProfile.Profile]:
+    """
+    Profiles the enclosed block with cProfile.
+    
+    Args:
+        path: File receiving the raw profile, readable with pstats or
+            snakeviz; when omitted the hottest functions are printed to
+            standard error
+    
+    Yields:
+        The active profiler
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path is None:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+        else:
+            profiler.dump_stats(path)
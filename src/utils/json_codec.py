@@ -0,0 +1,148 @@
+"""
+Utility module implementing pluggable JSON decoding backends.
+"""
+
+import json
+from decimal import Decimal
+from typing import Any, Callable, Optional, Tuple, Union
+
+
+BACKENDS = ("orjson", "msgspec", "stdlib")
+
+# Literals this short with a fraction and no exponent have at most 15 significant digits,
+# so they survive the float round trip unchanged apart from their trailing zeros
+_EXACT_LITERAL_LENGTH = 16
+
+
+def decode_decimal(literal: str) -> Decimal:
+    """
+    Converts a JSON number literal into the Decimal Operation builds from its float.
+    
+    Operation converts unit costs with Decimal(str(float)). Literals with at
+    most 15 significant digits round-trip through a float unchanged, so they
+    are converted directly once their trailing zeros are dropped the way
+    float repr drops them ("10.00" becomes "10.0"); longer literals,
+    exponents and values float repr writes with an exponent take the float
+    round trip. Either way the result has the same value and the same text
+    as with backends that decode floats, so audit trails and stored states
+    do not depend on the backend.
+    
+    Args:
+        literal: Text of a JSON number with a fraction or exponent
+    
+    Returns:
+        Decimal value of the literal
+    """
+    if len(literal) <= _EXACT_LITERAL_LENGTH and "." in literal and "e" not in literal and "E" not in literal:
+        literal = literal.rstrip("0")
+        if literal.endswith("."):
+            return Decimal(literal + "0")
+        # float repr switches to an exponent below 1e-4
+        if not literal.lstrip("-").startswith("0.0000"):
+            return Decimal(literal)
+    return Decimal(repr(float(literal)))
+
+
+class JsonCodec:
+    """
+    JSON decoder backed by orjson, msgspec or the standard library.
+    
+    Every backend produces the same Python values as the standard library
+    decoder, except that numbers with a fraction or exponent are decoded as
+    Decimal by backends that expose their literal text (msgspec and the
+    standard library), which spares Operation the str(float) round trip.
+    Inputs rejected by a third-party backend are decoded again with the
+    standard library, so the values returned and the errors raised are the
+    same whichever backend is used.
+    """
+    
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initializes the codec.
+        
+        Args:
+            backend: One of BACKENDS; defaults to the first one installed
+        
+        Raises:
+            ValueError: If the backend is unknown
+            ImportError: If the backend is not installed
+        """
+        if backend is None:
+            backend = default_backend()
+        elif backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        self.backend = backend
+        self._stdlib = json.JSONDecoder(parse_float=decode_decimal)
+        self._decode, self._errors = _load_backend(backend, self._loads_stdlib)
+    
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decodes a JSON document.
+        
+        Args:
+            data: JSON text, as str or UTF-8 bytes
+        
+        Returns:
+            Decoded value
+        
+        Raises:
+            json.JSONDecodeError: If the document is not valid JSON
+        """
+        try:
+            return self._decode(data)
+        except self._errors:
+            return self._loads_stdlib(data)
+    
+    def _loads_stdlib(self, data: Union[str, bytes]) -> Any:
+        """Decodes with the standard library exactly like json.loads."""
+        if isinstance(data, str):
+            if data.startswith("\ufeff"):
+                raise json.JSONDecodeError("Unexpected UTF-8 BOM (decode using utf-8-sig)", data, 0)
+        elif isinstance(data, (bytes, bytearray)):
+            data = data.decode(json.detect_encoding(data), "surrogatepass")
+        return self._stdlib.decode(data)
+
+
+def default_backend() -> str:
+    """
+    Returns the fastest JSON backend installed.
+    
+    Returns:
+        Name of the backend
+    """
+    for backend in BACKENDS[:-1]:
+        try:
+            __import__(backend)
+        except ImportError:
+            continue
+        return backend
+    return "stdlib"
+
+
+_default_codec: Optional[JsonCodec] = None
+
+
+def default_codec() -> JsonCodec:
+    """
+    Returns the shared codec of the default backend, creating it on first use.
+    
+    Returns:
+        Shared JsonCodec instance
+    """
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = JsonCodec()
+    return _default_codec
+
+
+def _load_backend(backend: str, stdlib: Callable[[Any], Any]) -> Tuple[Callable[[Any], Any], Tuple[type, ...]]:
+    """Returns the decode function of a backend and the errors it raises on rejected input."""
+    if backend == "orjson":
+        import orjson
+        return orjson.loads, (orjson.JSONDecodeError,)
+    if backend == "msgspec":
+        import msgspec
+        decoder = msgspec.json.Decoder(float_hook=decode_decimal)
+        return decoder.decode, (msgspec.DecodeError,)
+    # The standard library reports its own errors, there is nothing to retry
+    return stdlib, ()
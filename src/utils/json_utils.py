@@ -4,18 +4,28 @@ Utility module for JSON processing and formatting.
 
 import json
 from decimal import Decimal
-from typing import List
+from typing import Iterable, Iterator, List, Optional, TextIO
 
 from src.models.operation import Operation
 from src.models.tax_result import TaxResult
+from src.utils.json_codec import JsonCodec, decode_decimal, default_codec
 
 
-def parse_operations(json_str: str) -> List[Operation]:
+_DECODER = json.JSONDecoder(parse_float=decode_decimal)
+_FLOAT_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def parse_operations(json_str: str, codec: Optional[JsonCodec] = None) -> List[Operation]:
     """
     Converts a JSON string into a list of operations.
     
+    Operations that cannot be built are decoded again with plain floats, so
+    errors are reported exactly as for json.loads whatever the codec.
+    
     Args:
         json_str: JSON string containing the operations
+        codec: JSON codec used for decoding, defaults to the fastest backend installed
         
     Returns:
         List of operations
@@ -23,8 +33,89 @@ def parse_operations(json_str: str) -> List[Operation]:
     Raises:
         json.JSONDecodeError: If the string is not valid JSON
     """
-    data = json.loads(json_str)
-    return [Operation.from_dict(item) for item in data]
+    data = (codec or default_codec()).loads(json_str)
+    try:
+        return [Operation.from_dict(item) for item in data]
+    except Exception:
+        return [Operation.from_dict(item) for item in json.loads(json_str)]
+
+
+def iter_operations(json_str: str, codec: Optional[JsonCodec] = None) -> Iterator[Operation]:
+    """
+    Lazily converts a JSON array string into operations, one element at a time.
+    
+    Unlike parse_operations, the full list of decoded dictionaries and
+    operations is never materialized, so memory stays bounded by the size of
+    the largest single element instead of the length of the simulation.
+    Inputs whose top-level value is not an array are delegated to
+    parse_operations so that error reporting stays identical.
+    
+    The lazy decoder is the standard library one; a codec with a
+    third-party backend decodes the whole array with that backend instead,
+    as parse_operations does.
+    
+    Args:
+        json_str: JSON string containing the operations
+        codec: JSON codec used for decoding, None or a standard library
+            codec for the lazy decoder
+        
+    Yields:
+        Operations in the order they appear in the array
+        
+    Raises:
+        json.JSONDecodeError: If the string is not valid JSON
+    """
+    if codec is not None and codec.backend != "stdlib":
+        yield from parse_operations(json_str, codec)
+        return
+    if isinstance(json_str, (bytes, bytearray)):
+        json_str = json_str.decode("utf-8")
+    
+    end = len(json_str)
+    index = _skip_whitespace(json_str, 0)
+    if index >= end or json_str[index] != "[":
+        yield from parse_operations(json_str)
+        return
+    
+    index = _skip_whitespace(json_str, index + 1)
+    if index < end and json_str[index] == "]":
+        _check_trailing_data(json_str, index + 1)
+        return
+    
+    while True:
+        start = index
+        item, index = _DECODER.raw_decode(json_str, index)
+        try:
+            operation = Operation.from_dict(item)
+        except Exception:
+            # Report the error exactly as for the element decoded with floats
+            operation = Operation.from_dict(_FLOAT_DECODER.raw_decode(json_str, start)[0])
+        yield operation
+        
+        index = _skip_whitespace(json_str, index)
+        if index >= end:
+            raise json.JSONDecodeError("Expecting ',' delimiter", json_str, index)
+        if json_str[index] == "]":
+            _check_trailing_data(json_str, index + 1)
+            return
+        if json_str[index] != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", json_str, index)
+        index = _skip_whitespace(json_str, index + 1)
+
+
+def _skip_whitespace(json_str: str, index: int) -> int:
+    """Returns the index of the first non-whitespace character from index."""
+    end = len(json_str)
+    while index < end and json_str[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def _check_trailing_data(json_str: str, index: int):
+    """Raises a decode error if anything but whitespace follows the array."""
+    index = _skip_whitespace(json_str, index)
+    if index != len(json_str):
+        raise json.JSONDecodeError("Extra data", json_str, index)
 
 
 def format_results(results: List[TaxResult]) -> str:
@@ -37,7 +128,107 @@ def format_results(results: List[TaxResult]) -> str:
     Returns:
         JSON string representing the results
     """
-    return json.dumps([result.to_dict() for result in results])
+    return "[" + ", ".join([_format_result(result) for result in results]) + "]"
+
+
+def format_cents(taxes: Iterable[int]) -> str:
+    """
+    Formats taxes in integer cents exactly like format_results.
+    
+    Integer true division is correctly rounded, so cents / 100 is the same
+    float json.dumps would print for the equivalent Decimal.
+    
+    Args:
+        taxes: Tax in cents of each operation
+        
+    Returns:
+        JSON string representing the results
+    """
+    return "[" + ", ".join(['{"tax": ' + repr(cents / 100) + "}" for cents in taxes]) + "]"
+
+
+def decimal_to_json(value: Decimal) -> str:
+    """
+    Converts a Decimal into the JSON text json.dumps would produce for float(value).
+    
+    Values with at most 15 significant digits inside the range where floats
+    are printed in positional notation are formatted directly from their
+    digits, which is what repr(float) yields for them. Anything else falls
+    back to the float round trip.
+    
+    Args:
+        value: Decimal value, usually a tax quantized to cents
+        
+    Returns:
+        JSON number text for the value
+    """
+    if not value.is_finite() or len(value.as_tuple().digits) > 15 or not -4 <= value.adjusted() < 16:
+        return repr(float(value))
+    text = format(value, "f")
+    if "." not in text:
+        return text + ".0"
+    text = text.rstrip("0")
+    return text + "0" if text.endswith(".") else text
+
+
+def _format_result(result: TaxResult) -> str:
+    """Formats a single tax result exactly as json.dumps(result.to_dict())."""
+    return '{"tax": ' + decimal_to_json(result.tax) + "}"
+
+
+class ResultWriter:
+    """
+    Incrementally serializes tax results as JSON array lines to a text stream.
+    
+    Entries are written in chunks as they are produced, so neither the list
+    of results nor the final JSON string of a simulation is ever held in
+    memory as a whole.
+    """
+    
+    def __init__(self, stream: TextIO, chunk_size: int = 1024):
+        """
+        Initializes the writer.
+        
+        Args:
+            stream: Text stream receiving the output
+            chunk_size: Number of entries buffered between writes
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.partial = False
+    
+    def write_line(self, results: Iterable[TaxResult]) -> int:
+        """
+        Writes the results of one simulation as a single JSON array line.
+        
+        If consuming results raises, entries buffered since the last write are
+        discarded and the exception propagates. The partial attribute then
+        tells whether an incomplete line has already reached the stream.
+        
+        Args:
+            results: Iterable of tax results, consumed lazily
+            
+        Returns:
+            Number of results written
+        """
+        self.partial = False
+        pieces = ["["]
+        count = 0
+        
+        for result in results:
+            if count:
+                pieces.append(", ")
+            pieces.append(_format_result(result))
+            count += 1
+            if len(pieces) >= self.chunk_size:
+                self.stream.write("".join(pieces))
+                self.partial = True
+                pieces = []
+        
+        pieces.append("]\n")
+        self.stream.write("".join(pieces))
+        self.partial = False
+        return count
 
 
 class DecimalEncoder(json.JSONEncoder):
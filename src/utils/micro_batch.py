@@ -0,0 +1,223 @@
+"""
+Utility module implementing the adaptive micro-batching pipeline for standard input.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+
+# Marks the end of the input in the line queue
+_END = object()
+
+# Largest read from standard input at a time
+_READ_BYTES = 64 * 1024
+
+
+class PipelineStats:
+    """
+    Class collecting queue depth, batch size and latency statistics of a pipeline.
+    """
+    
+    __slots__ = ("lines", "batches", "depth_total", "max_depth", "latency_total", "max_latency")
+    
+    def __init__(self):
+        """Initializes zeroed counters."""
+        self.lines = 0
+        self.batches = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.max_latency = 0.0
+    
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Converts the statistics to a dictionary.
+        
+        Queue depth, in groups of lines read together, is sampled each time
+        a group is taken from the queue; latency runs from the moment a line
+        was read to the moment its output was flushed.
+        
+        Returns:
+            Dictionary with counts, mean and maximum queue depth, mean batch
+            size and mean and maximum latency in milliseconds
+        """
+        lines = self.lines or 1
+        return {
+            "lines": self.lines,
+            "batches": self.batches,
+            "mean-batch-lines": self.lines / self.batches if self.batches else 0.0,
+            "mean-queue-depth": self.depth_total / lines,
+            "max-queue-depth": self.max_depth,
+            "mean-latency-ms": 1000 * self.latency_total / lines,
+            "max-latency-ms": 1000 * self.max_latency
+        }
+
+
+class MicroBatchPipeline:
+    """
+    Pipeline overlapping input reading with calculation and batching output writes.
+    
+    A reader thread reads and decodes groups of input lines into a bounded
+    queue, so a fast producer is slowed down by backpressure instead of
+    filling memory. The calling thread calculates each line and buffers its
+    output, which is written and flushed in one call when the batch reaches
+    max_lines, when it was started max_delay seconds ago, or as soon as no
+    more input is ready. Under heavy load batches grow to max_lines; when
+    input slows down every line is flushed right away, keeping latency low.
+    """
+    
+    def __init__(
+        self,
+        process_line: Callable[[str], str],
+        max_lines: int = 1024,
+        max_delay: float = 0.01,
+        queue_size: int = 8,
+        immediate: bool = False
+    ):
+        """
+        Initializes the pipeline.
+        
+        Args:
+            process_line: Function returning the output line of an input line
+            max_lines: Largest number of output lines written at once
+            max_delay: Longest time in seconds an output may wait in the batch
+            queue_size: Maximum number of line groups read ahead of the calculation
+            immediate: Whether every output line is flushed on its own, e.g.
+                for interactive terminals
+        """
+        self.process_line = process_line
+        self.max_lines = 1 if immediate else max_lines
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self.stats = PipelineStats()
+    
+    def run(self, stream: TextIO, output: TextIO):
+        """
+        Processes input lines until they end or an empty line is read.
+        
+        Args:
+            stream: Input text stream, e.g. standard input
+            output: Text stream receiving one output line per input line
+        
+        Raises:
+            Exception: Any error raised while reading the input
+        """
+        pending: "queue.Queue" = queue.Queue(self.queue_size)
+        reader = threading.Thread(target=_read_into, args=(stream, pending), name="stdin-reader", daemon=True)
+        reader.start()
+        
+        stats = self.stats
+        buffer: List[str] = []
+        read_times: List[float] = []
+        batch_start = 0.0
+        while True:
+            if buffer and pending.empty():
+                self._flush(output, buffer, read_times)
+            depth = pending.qsize()
+            item = pending.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                self._flush(output, buffer, read_times)
+                raise item
+            
+            read_time, lines = item
+            stats.depth_total += depth * len(lines)
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+            for line in lines:
+                if not buffer:
+                    batch_start = time.perf_counter()
+                buffer.append(self.process_line(line))
+                read_times.append(read_time)
+                if len(buffer) >= self.max_lines or time.perf_counter() - batch_start >= self.max_delay:
+                    self._flush(output, buffer, read_times)
+        
+        self._flush(output, buffer, read_times)
+        reader.join()
+    
+    def _flush(self, output: TextIO, buffer: List[str], read_times: List[float]):
+        """Writes the buffered outputs with one write and records their latency."""
+        if not buffer:
+            return
+        output.write("\n".join(buffer) + "\n")
+        output.flush()
+        
+        now = time.perf_counter()
+        stats = self.stats
+        stats.lines += len(buffer)
+        stats.batches += 1
+        stats.latency_total += len(read_times) * now - sum(read_times)
+        stats.max_latency = max(stats.max_latency, now - read_times[0])
+        buffer.clear()
+        read_times.clear()
+
+
+def _read_into(stream: TextIO, pending: "queue.Queue"):
+    """Reads groups of stripped lines into the queue until the first empty line, then marks the end."""
+    try:
+        for lines in _iter_line_groups(stream):
+            end = lines.index("") if "" in lines else -1
+            if end >= 0:
+                if end:
+                    pending.put((time.perf_counter(), lines[:end]))
+                break
+            pending.put((time.perf_counter(), lines))
+    except BaseException as error:
+        pending.put(error)
+        return
+    pending.put(_END)
+
+
+def _iter_line_groups(stream: TextIO) -> Iterator[List[str]]:
+    """
+    Yields the complete lines available on a stream, stripped.
+    
+    Streams backed by a file descriptor are read with os.read, which
+    returns whatever the producer has written so far, so a burst of input
+    becomes one group and a single line is passed on without waiting for
+    more. Other streams are read line by line.
+    """
+    try:
+        descriptor = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        descriptor = None
+    if descriptor is None:
+        for line in stream:
+            yield [line.strip()]
+        return
+    
+    encoding = getattr(stream, "encoding", None) or "utf-8"
+    leftover = b""
+    while True:
+        data = os.read(descriptor, _READ_BYTES)
+        if not data:
+            break
+        data = leftover + data
+        last = data.rfind(b"\n")
+        if last < 0:
+            leftover = data
+            continue
+        leftover = data[last + 1:]
+        yield [line.strip() for line in data[:last].decode(encoding).split("\n")]
+    if leftover:
+        yield [leftover.decode(encoding).strip()]
+
+
+def is_interactive(stream: Optional[TextIO]) -> bool:
+    """
+    Tells whether a stream is an interactive terminal.
+    
+    Args:
+        stream: Stream to be checked
+    
+    Returns:
+        True for a TTY, False otherwise or if it cannot be told
+    """
+    try:
+        return stream is not None and stream.isatty()
+    except (AttributeError, ValueError):
+        return False
@@ -0,0 +1,113 @@
+"""
+Utility module implementing a bounded LRU cache of simulation results.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+
+class ResultCache:
+    """
+    Bounded LRU cache mapping a hash of a raw input line to its output.
+    
+    The cache is bounded both by number of entries and by the approximate
+    number of bytes held by the cached outputs. Hits, misses and evictions
+    are counted so the hit ratio can be monitored.
+    """
+    
+    # Approximate fixed cost of an entry: digest, dictionary slot and string header
+    ENTRY_OVERHEAD = 128
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initializes an empty cache.
+        
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum approximate memory used by cached results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def key(input_line: Union[str, bytes]) -> bytes:
+        """
+        Computes the cache key of a raw input line.
+        
+        Args:
+            input_line: Input line as read
+            
+        Returns:
+            Digest identifying the line
+        """
+        if isinstance(input_line, str):
+            input_line = input_line.encode("utf-8")
+        return hashlib.blake2b(input_line, digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Looks up a cached result, marking it as recently used.
+        
+        Args:
+            key: Key computed by ResultCache.key
+            
+        Returns:
+            The cached result, or None on a miss
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: bytes, result: str):
+        """
+        Stores a result, evicting the least recently used ones if needed.
+        
+        Results larger than the byte limit are not cached.
+        
+        Args:
+            key: Key computed by ResultCache.key
+            result: Output to be cached
+        """
+        size = len(result) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= len(previous) + self.ENTRY_OVERHEAD
+        
+        while self._entries and (len(self._entries) >= self.max_entries or self.current_bytes + size > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= len(evicted) + self.ENTRY_OVERHEAD
+            self.evictions += 1
+        
+        self._entries[key] = result
+        self.current_bytes += size
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+        
+        Returns:
+            Dictionary with hits, misses, evictions, entries and bytes
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes
+        }
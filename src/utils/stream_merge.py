@@ -0,0 +1,74 @@
+"""
+Utility module implementing the time-ordered merge of several operation feeds.
+"""
+
+import heapq
+from operator import attrgetter
+from typing import Iterable, Iterator, Optional
+
+from src.models.operation import Operation
+from src.utils.json_codec import JsonCodec, default_codec
+
+
+def merge_operations(*feeds: Iterable[Operation]) -> Iterator[Operation]:
+    """
+    Lazily merges feeds sorted by timestamp into a single time-ordered stream.
+    
+    Only the next operation of each feed is held in memory, so merging k
+    feeds takes O(k) memory whatever their length. Operations with equal
+    timestamps keep a deterministic order: first by feed, in the order the
+    feeds are given, then by position within their feed.
+    
+    Args:
+        *feeds: Iterables of operations, each sorted by timestamp
+        
+    Yields:
+        Operations of every feed in timestamp order
+        
+    Raises:
+        ValueError: If an operation has no timestamp or a feed is not sorted
+    """
+    return heapq.merge(*(_checked_feed(feed, index) for index, feed in enumerate(feeds)), key=attrgetter("timestamp"))
+
+
+def iter_feed(path: str, codec: Optional[JsonCodec] = None) -> Iterator[Operation]:
+    """
+    Lazily reads a feed file holding one JSON operation per line.
+    
+    Files ending in .gz are decompressed on the fly. Empty lines are skipped.
+    
+    Args:
+        path: Path of the feed
+        codec: JSON codec used for decoding, defaults to the fastest backend installed
+        
+    Yields:
+        Operations in file order
+        
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON
+    """
+    codec = codec or default_codec()
+    if path.endswith(".gz"):
+        import gzip
+        feed_file = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        feed_file = open(path, encoding="utf-8")
+    
+    with feed_file:
+        for line in feed_file:
+            line = line.strip()
+            if line:
+                yield Operation.from_dict(codec.loads(line))
+
+
+def _checked_feed(feed: Iterable[Operation], index: int) -> Iterator[Operation]:
+    """Passes a feed through, checking that its timestamps never decrease."""
+    previous = None
+    for position, operation in enumerate(feed):
+        timestamp = operation.timestamp
+        if timestamp is None:
+            raise ValueError(f"Operation {position} of feed {index} has no timestamp")
+        if previous is not None and timestamp < previous:
+            raise ValueError(f"Feed {index} is not sorted by timestamp at operation {position}")
+        previous = timestamp
+        yield operation
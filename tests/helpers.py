@@ -0,0 +1,28 @@
+"""Shared helpers of the test suite."""
+
+import random
+from decimal import Decimal
+
+from src.models.operation import Operation
+
+
+def random_operations(rng: random.Random, length: int):
+    """Builds a random simulation biased towards the 20000 boundary and loss deductions."""
+    operations = []
+    shares = 0
+    for _ in range(length):
+        if shares == 0 or rng.random() < 0.4:
+            quantity = rng.randint(1, 5000)
+            operations.append(Operation("buy", rng.randint(1, 5000) / 100, quantity))
+            shares += quantity
+        else:
+            quantity = rng.randint(1, shares)
+            if rng.random() < 0.3:
+                # Land exactly on the 20000 exemption threshold when possible
+                unit_cost = Decimal(20000) / quantity
+                unit_cost = unit_cost if unit_cost == unit_cost.quantize(Decimal('0.01')) else Decimal(rng.randint(1, 9000)) / 100
+            else:
+                unit_cost = Decimal(rng.randint(1, 9000)) / 100
+            operations.append(Operation("sell", unit_cost, quantity))
+            shares -= quantity
+    return operations
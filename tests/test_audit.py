@@ -0,0 +1,225 @@
+import unittest
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+from decimal import Decimal
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.services.audit import AuditTrail, AuditWriter, ExplainingTaxCalculator
+from src.services.tax_calculator import TaxCalculator
+from tests.helpers import random_operations
+
+
+OPERATIONS = [
+    Operation("buy", 10.00, 10000),
+    Operation("sell", 5.00, 5000),
+    Operation("sell", 20.00, 3000),
+    Operation("sell", 30.00, 1000),
+    Operation("sell", 15.00, 100)
+]
+
+
+class TestExplainingTaxCalculator(unittest.TestCase):
+
+    def test_trail_explains_every_operation(self):
+        calculator = ExplainingTaxCalculator()
+        
+        calculator.calculate_taxes(OPERATIONS + [Operation("buy", 20.00, 1000), Operation("sell", 5.00, 1000), Operation("sell", 25.00, 1000)])
+        rows = list(calculator.trail.rows())
+        
+        self.assertEqual([row["reason"] for row in rows], ["buy", "loss", "taxed", "taxed", "exempt", "buy", "loss", "loss-offset"])
+        self.assertEqual(rows[1]["profit-or-loss"], Decimal("-25000"))
+        self.assertEqual(rows[1]["accumulated-loss"], Decimal("25000"))
+        self.assertEqual(rows[2]["loss-consumed"], Decimal("25000"))
+        self.assertEqual(rows[2]["tax"], Decimal("1000.00"))
+        self.assertEqual(rows[5]["weighted-average"], Decimal("15.26"))
+        self.assertEqual(rows[7]["loss-consumed"], Decimal("9740.00"))
+        self.assertEqual(rows[7]["accumulated-loss"], Decimal("520.00"))
+        self.assertEqual([row["operation-index"] for row in rows], list(range(8)))
+    
+    def test_sell_at_the_weighted_average_has_no_gain(self):
+        calculator = ExplainingTaxCalculator()
+        
+        calculator.calculate_taxes([Operation("buy", 10.00, 10000), Operation("sell", 10.00, 5000)])
+        row = list(calculator.trail.rows())[1]
+        
+        self.assertEqual(row["reason"], "no-gain")
+        self.assertEqual((row["profit-or-loss"], row["tax"], row["loss-consumed"]), (0, 0, 0))
+    
+    def test_appended_operations_are_numbered_from_the_trail(self):
+        calculator = ExplainingTaxCalculator()
+        calculator.append_operations(OPERATIONS[:2])
+        calculator.trail.clear()
+        
+        calculator.append_operations(OPERATIONS[2:4])
+        
+        self.assertEqual([row["operation-index"] for row in calculator.trail.rows()], [0, 1])
+    
+    def test_taxes_match_tax_calculator(self):
+        rng = random.Random(22)
+        for engine in ("decimal", "cents"):
+            calculator = ExplainingTaxCalculator(engine, capacity=4)
+            reference = TaxCalculator(engine)
+            for _ in range(100):
+                operations = random_operations(rng, rng.randint(0, 30))
+                
+                taxes = [result.tax for result in calculator.calculate_taxes(operations)]
+                
+                self.assertEqual(taxes, [result.tax for result in reference.calculate_taxes(operations)])
+                self.assertEqual(len(calculator.trail), len(operations))
+    
+    def test_calculate_batch(self):
+        batch = OperationBatch.from_operations(OPERATIONS)
+        calculator = ExplainingTaxCalculator()
+        
+        self.assertEqual(list(calculator.calculate_batch(batch)), list(TaxCalculator().calculate_batch(batch)))
+        self.assertEqual(len(calculator.trail), len(OPERATIONS))
+    
+    def test_trail_grows_past_its_capacity(self):
+        trail = AuditTrail(capacity=1)
+        calculator = ExplainingTaxCalculator()
+        calculator.trail = trail
+        
+        calculator.calculate_taxes([Operation("buy", 10.00, 1)] * 5)
+        
+        self.assertEqual(len(trail), 5)
+        self.assertEqual(trail.capacity, 8)
+
+
+class TestAuditWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = ExplainingTaxCalculator()
+        self.calculator.calculate_taxes(OPERATIONS[:2])
+    
+    def test_json_lines(self):
+        output = io.StringIO()
+        writer = AuditWriter(output)
+        writer.write(self.calculator.trail)
+        writer.write(self.calculator.trail)
+        
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        
+        self.assertEqual([record["simulation"] for record in records], [0, 0, 1, 1])
+        self.assertEqual(records[1], {
+            "simulation": 0, "operation-index": 1, "operation": "sell", "unit-cost": 5.0, "quantity": 5000, "weighted-average": 10.0,
+            "profit-or-loss": -25000.0, "loss-consumed": 0.0, "accumulated-loss": 25000.0, "tax": 0.0, "reason": "loss"
+        })
+    
+    def test_csv_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "audit.csv")
+            with AuditWriter(path) as writer:
+                writer.write(self.calculator.trail)
+            
+            with open(path, newline="") as audit_file:
+                rows = list(csv.DictReader(audit_file))
+        
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["reason"], "loss")
+        self.assertEqual(rows[1]["operation-index"], "1")
+        self.assertEqual(Decimal(rows[1]["profit-or-loss"]), Decimal("-25000"))
+    
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            AuditWriter(io.StringIO(), "xml")
+
+
+class TestExplainMode(unittest.TestCase):
+
+    def test_cli_writes_one_simulation_per_input_line(self):
+        lines = [
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]',
+            'invalid json',
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "audit.jsonl")
+            cli = CapitalGainsCLI(explain=path)
+            with patch("sys.stdin", io.StringIO("\n".join(lines) + "\n\n")), patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                cli.run()
+            cli.audit.close()
+            
+            with open(path) as audit_file:
+                records = [json.loads(line) for line in audit_file]
+        
+        self.assertEqual(stdout.getvalue().splitlines(), [
+            '[{"tax": 0.0}, {"tax": 10000.0}]',
+            'Error: Invalid JSON format',
+            '[{"tax": 0.0}]'
+        ])
+        self.assertEqual([record["simulation"] for record in records], [0, 0, 2])
+        self.assertEqual(records[1]["reason"], "taxed")
+    
+    def test_skipped_operations_keep_their_input_index(self):
+        line = (
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 100},{"operation":"sell", "unit-cost":-1, "quantity": 10},'
+            '{"operation":"sell", "unit-cost":20.00, "quantity": 50}]'
+        )
+        output = io.StringIO()
+        cli = CapitalGainsCLI(validation="lenient", explain=os.devnull)
+        cli.audit.close()
+        cli.audit = AuditWriter(output)
+        
+        with patch("sys.stderr", new_callable=io.StringIO):
+            cli.process_line(line)
+        records = [json.loads(record) for record in output.getvalue().splitlines()]
+        
+        self.assertEqual([record["operation-index"] for record in records], [0, 2])
+    
+    def test_accounts_and_feeds_write_their_trails(self):
+        from src.services.state_store import StateStore
+        
+        lines = [
+            '{"account": "a", "operations": [{"operation":"buy", "unit-cost":10.00, "quantity": 100}]}',
+            'invalid json',
+            '{"account": "a", "operations": [{"operation":"sell", "unit-cost":20.00, "quantity": 50}]}'
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            feed = os.path.join(directory, "feed.jsonl")
+            with open(feed, "w") as feed_file:
+                feed_file.write('{"timestamp": 1, "operation":"buy", "unit-cost":10.00, "quantity": 100}\n')
+                feed_file.write('{"timestamp": 2, "operation":"sell", "unit-cost":20.00, "quantity": 50}\n')
+            output = io.StringIO()
+            cli = CapitalGainsCLI(explain=os.devnull)
+            cli.audit.close()
+            cli.audit = AuditWriter(output)
+            
+            with patch("sys.stdout", new_callable=io.StringIO), StateStore(os.path.join(directory, "state.db")) as store:
+                cli.process_accounts(lines, store)
+                cli.process_feeds([feed])
+        records = [json.loads(record) for record in output.getvalue().splitlines()]
+        
+        self.assertEqual(
+            [(record["simulation"], record["operation-index"], record["reason"]) for record in records],
+            [(0, 0, "buy"), (2, 0, "exempt"), (3, 0, "buy"), (3, 1, "exempt")]
+        )
+        self.assertEqual(records[1]["weighted-average"], 10.0)
+    
+    def test_explain_mode_rejects_caches_and_workers(self):
+        for options in ({"cache_size": 10}, {"workers": 2}, {"portfolio": "shared"}, {"output_format": "binary"}):
+            with self.assertRaises(ValueError):
+                CapitalGainsCLI(explain=os.devnull, **options)
+    
+    def test_default_calculator_keeps_no_trail(self):
+        self.assertIs(type(CapitalGainsCLI().calculator), TaxCalculator)
+    
+    def test_default_hot_loop_has_no_audit_hook(self):
+        self.assertIsNot(ExplainingTaxCalculator._iter_taxes_from_state, TaxCalculator._iter_taxes_from_state)
+        for name, method in vars(TaxCalculator).items():
+            if callable(method) and hasattr(method, "__code__"):
+                self.assertFalse({"trail", "audit"} & set(method.__code__.co_names), name)
+        
+        with patch.object(AuditTrail, "append", side_effect=AssertionError("recorded on the default path")):
+            for engine in ("decimal", "cents"):
+                TaxCalculator(engine).calculate_taxes(OPERATIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import io
+import json
+import unittest
+from array import array
+from unittest.mock import patch
+
+from benchmarks.workload import generate_workload
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+from src.services.tax_calculator import TaxCalculator
+from src.services.vectorized_calculator import np
+from src.utils.binary_format import (
+    OPERATIONS_MAGIC, RESULTS_MAGIC, encode_batch, encode_error, iter_batches, iter_results,
+    json_to_operations, json_to_results, operations_to_json, read_batches, results_to_json, stream_header
+)
+
+
+def binary_stdio(data):
+    stdin = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    return stdin, stdout
+
+
+class TestBinaryFormat(unittest.TestCase):
+    
+    def setUp(self):
+        self.lines = generate_workload(10, 37, 0.4, 0.3, 5)
+        self.stream = io.BytesIO()
+        json_to_operations(self.lines, self.stream)
+    
+    def test_records_are_aligned_to_8_bytes(self):
+        batch = OperationBatch(bytearray([BUY_CODE, SELL_CODE, SELL_CODE]), array('q', [1000, 1500, -1]), array('q', [10, 5, 2 ** 62]))
+        
+        record = encode_batch(batch)
+        
+        self.assertEqual(len(record), 8 + 8 + 3 * 8 + 3 * 8)
+        self.assertEqual(record[:8], b"\x03\x00\x00\x00\x00\x00\x00\x00")
+        self.assertEqual(len(encode_error("boom")) % 8, 0)
+    
+    def test_batches_round_trip(self):
+        batches = list(iter_batches(self.stream.getvalue()))
+        
+        self.assertEqual(len(batches), len(self.lines))
+        for batch, line in zip(batches, self.lines):
+            expected = OperationBatch.from_dicts(json.loads(line))
+            self.assertEqual(bytes(batch.types), bytes(expected.types))
+            self.assertEqual(list(batch.prices), list(expected.prices))
+            self.assertEqual(list(batch.quantities), list(expected.quantities))
+    
+    def test_batches_are_read_one_record_at_a_time(self):
+        data = self.stream.getvalue()
+        stream = io.BufferedReader(io.BytesIO(data), buffer_size=8)
+        
+        batches = read_batches(stream)
+        first = next(batches)
+        
+        self.assertLess(stream.tell(), len(data) // 2)
+        expected = list(iter_batches(data))
+        for batch, reference in zip([first] + list(batches), expected):
+            self.assertEqual(bytes(batch.types), bytes(reference.types))
+            self.assertEqual(list(batch.prices), list(reference.prices))
+            self.assertEqual(list(batch.quantities), list(reference.quantities))
+        self.assertEqual(stream.tell(), len(data))
+    
+    def test_batches_are_views_of_the_input(self):
+        data = bytearray(self.stream.getvalue())
+        batch = next(iter_batches(data))
+        price = batch.prices[0]
+        
+        # Stream header, record header and 37 type codes padded to 40 bytes
+        data[8 + 8 + 40] ^= 1
+        
+        self.assertEqual(batch.prices[0], price ^ 1)
+    
+    def test_batches_feed_the_calculator_directly(self):
+        calculator = TaxCalculator(engine="cents")
+        reference = TaxCalculator()
+        
+        for batch, line in zip(iter_batches(self.stream.getvalue()), self.lines):
+            expected = [int(result.tax.scaleb(2)) for result in reference.calculate_taxes(list(batch))]
+            self.assertEqual(list(calculator.calculate_batch(batch)), expected)
+    
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_batches_feed_the_vectorized_calculator(self):
+        from src.services.vectorized_calculator import VectorizedTaxCalculator
+        batches = list(iter_batches(self.stream.getvalue()))
+        
+        taxes = VectorizedTaxCalculator().calculate_batches(batches)
+        
+        for row, batch in enumerate(batches):
+            self.assertEqual(taxes[row, :len(batch)].tolist(), list(TaxCalculator(engine="cents").calculate_batch(batch)))
+    
+    def test_operations_convert_back_to_equivalent_json(self):
+        cli = CapitalGainsCLI()
+        
+        converted = list(operations_to_json(self.stream.getvalue()))
+        
+        self.assertEqual([cli.process_line(line) for line in converted], [cli.process_line(line) for line in self.lines])
+    
+    def test_results_round_trip(self):
+        lines = ['[{"tax": 0.0}, {"tax": 10000.0}, {"tax": 0.01}]', "Error: Invalid JSON format", "[]"]
+        stream = io.BytesIO()
+        
+        json_to_results(lines, stream)
+        results = list(iter_results(stream.getvalue()))
+        
+        self.assertEqual(list(results[0]), [0, 1000000, 1])
+        self.assertEqual(results[1], "Invalid JSON format")
+        self.assertEqual(list(results_to_json(stream.getvalue())), lines)
+    
+    def test_invalid_streams_are_rejected(self):
+        data = self.stream.getvalue()
+        
+        with self.assertRaises(ValueError):
+            list(iter_batches(data[:-1]))
+        for truncated in (data[:-1], data[:12], data[:4]):
+            with self.assertRaises(ValueError):
+                list(read_batches(io.BytesIO(truncated)))
+        with self.assertRaises(ValueError):
+            list(iter_results(data))
+        with self.assertRaises(ValueError):
+            list(iter_batches(stream_header(OPERATIONS_MAGIC) + encode_batch(OperationBatch(bytearray([7]), [1], [1]))))
+        with self.assertRaises(ValueError):
+            list(iter_results(stream_header(RESULTS_MAGIC) + b"\x00\x00\x00\x00\x09\x00\x00\x00"))
+    
+    def test_cli_binary_modes_match_json_mode(self):
+        expected = [CapitalGainsCLI().process_line(line) for line in self.lines]
+        
+        for engine in ("decimal", "cents"):
+            with self.subTest(engine=engine):
+                stdin, stdout = binary_stdio(self.stream.getvalue())
+                with patch('sys.stdin', stdin), patch('sys.stdout', stdout):
+                    CapitalGainsCLI(engine=engine, input_format="binary", output_format="binary").run()
+                self.assertEqual(list(results_to_json(stdout.buffer.getvalue())), expected)
+                
+                stdin, stdout = binary_stdio(self.stream.getvalue())
+                with patch('sys.stdin', stdin), patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                    CapitalGainsCLI(engine=engine, input_format="binary").run()
+                self.assertEqual(stdout.getvalue().splitlines(), expected)
+    
+    def test_cli_writes_binary_errors(self):
+        stdin, stdout = binary_stdio(b'invalid json\n[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]\n\n')
+        
+        with patch('sys.stdin', stdin), patch('sys.stdout', stdout):
+            CapitalGainsCLI(output_format="binary").run()
+        
+        self.assertEqual(list(results_to_json(stdout.buffer.getvalue())), ["Error: Invalid JSON format", '[{"tax": 0.0}]'])
+
+
+if __name__ == '__main__':
+    unittest.main()
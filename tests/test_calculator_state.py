@@ -0,0 +1,30 @@
+import unittest
+from decimal import Decimal
+
+from src.models.calculator_state import CalculatorState
+
+
+class TestCalculatorState(unittest.TestCase):
+    
+    def test_to_dict_keeps_decimals_exact(self):
+        state = CalculatorState(Decimal('13.33'), 15, Decimal('2500.005'))
+        
+        expected = {
+            "weighted-average-price": "13.33",
+            "total-shares": 15,
+            "accumulated-loss": "2500.005"
+        }
+        
+        self.assertEqual(state.to_dict(), expected)
+    
+    def test_json_round_trip(self):
+        state = CalculatorState(Decimal('10.125'), 300, Decimal('0'))
+        
+        restored = CalculatorState.from_json(state.to_json())
+        
+        self.assertEqual(restored, state)
+        self.assertEqual(str(restored.weighted_average_price), '10.125')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
+import gzip
 import io
+import os
 import sys
+import tempfile
 from unittest.mock import patch
 
 from src.capital_gains_cli import CapitalGainsCLI
@@ -8,7 +11,7 @@ from src.capital_gains_cli import CapitalGainsCLI
 
 
 class TestCapitalGainsCLI(unittest.TestCase):
-    
+
     def setUp(self):
         self.cli = CapitalGainsCLI()
     
@@ -52,7 +55,7 @@ class TestCapitalGainsCLI(unittest.TestCase):
         
         expected_output = 'Error: Invalid JSON format\n'
         self.assertEqual(mock_stdout.getvalue(), expected_output)
-
+    
     @patch('sys.stdin', io.BytesIO(b'{"operation":"buy", "unit-cost":10.00, "quantity": 100}\n'))
     @patch('sys.stdout', new_callable=io.StringIO)
     def test_run_with_invalid_value(self, mock_stdout):
@@ -60,6 +63,151 @@ class TestCapitalGainsCLI(unittest.TestCase):
         
         expected_output = "Error: string indices must be integers, not 'str'\n"
         self.assertEqual(mock_stdout.getvalue(), expected_output)
+    
+    @patch('sys.stdin', io.StringIO('[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]\ninvalid json\n\n'))
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_run_streaming_matches_default_output(self, mock_stdout):
+        CapitalGainsCLI(streaming=True).run()
+        
+        expected_output = '[{"tax": 0.0}, {"tax": 10000.0}]\nError: Invalid JSON format\n'
+        self.assertEqual(mock_stdout.getvalue(), expected_output)
+    
+    @patch('sys.stdin', io.BytesIO(b'{"operation":"buy", "unit-cost":10.00, "quantity": 100}\n'))
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_run_streaming_with_invalid_value(self, mock_stdout):
+        CapitalGainsCLI(streaming=True).run()
+        
+        expected_output = "Error: string indices must be integers, not 'str'\n"
+        self.assertEqual(mock_stdout.getvalue(), expected_output)
+    
+    def test_streaming_rejects_workers(self):
+        from main import parse_args
+        
+        with self.assertRaises(ValueError):
+            CapitalGainsCLI(streaming=True, workers=2)
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit) as context:
+            parse_args(["--stream", "--workers", "4"])
+        self.assertEqual(context.exception.code, 2)
+        self.assertIn("--stream cannot be combined with --workers", stderr.getvalue())
+    
+    def test_streaming_rejects_caches(self):
+        from main import parse_args
+        
+        for options, argv in (({"cache_size": 4}, ["--cache-size", "4"]), ({"prefix_cache_size": 4}, ["--prefix-cache", "4"])):
+            with self.assertRaises(ValueError):
+                CapitalGainsCLI(streaming=True, **options)
+            with patch('sys.stderr', new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit):
+                parse_args(["--stream"] + argv)
+            self.assertIn("--stream cannot be combined with --cache-size or --prefix-cache", stderr.getvalue())
+    
+    def test_command_line_reports_incompatible_options_as_usage_errors(self):
+        from main import parse_args
+        
+        for argv in (
+            ["--explain", "trail.csv", "--cache-size", "4"],
+            ["--explain", "trail.csv", "--output-format", "binary"],
+            ["--batch", "--stream"],
+            ["--batch", "--input-format", "binary"],
+            ["--portfolio", "shared", "--prefix-cache", "8"],
+            ["--portfolio", "shared", "--shards", "2"],
+            ["--shards", "2"]
+        ):
+            with self.subTest(argv=argv):
+                with patch('sys.stderr', new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit) as context:
+                    parse_args(argv)
+                self.assertEqual(context.exception.code, 2)
+                self.assertIn("usage:", stderr.getvalue())
+        self.assertEqual(parse_args(["--portfolio", "per-asset", "--shards", "2"]).shards, 2)
+    
+    def test_process_input_with_cents_engine(self):
+        input_line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":5.00, "quantity": 5000},{"operation":"sell", "unit-cost":20.00, "quantity": 3000}]'
+        expected_output = '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 1000.0}]'
+        
+        result = CapitalGainsCLI(engine="cents").process_input(input_line)
+        
+        self.assertEqual(result, expected_output)
+    
+    def test_process_input_serves_duplicate_lines_from_cache(self):
+        cli = CapitalGainsCLI(cache_size=10)
+        input_line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+        first = cli.process_input(input_line)
+        
+        with patch('src.capital_gains_cli.parse_operations') as parse_operations:
+            second = cli.process_input(input_line)
+        
+        parse_operations.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(cli.cache.stats()["hits"], 1)
+    
+    def test_process_input_with_prefix_cache(self):
+        cli = CapitalGainsCLI(prefix_cache_size=100)
+        prefix = '{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":5.00, "quantity": 5000}'
+        
+        cli.process_input('[' + prefix + ']')
+        result = cli.process_input('[' + prefix + ',{"operation":"sell", "unit-cost":20.00, "quantity": 3000}]')
+        
+        self.assertEqual(result, '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 1000.0}]')
+        self.assertEqual(cli.prefix_cache.stats()["hits"], 2)
+    
+    def test_process_line_returns_error_message(self):
+        self.assertEqual(self.cli.process_line('invalid json'), 'Error: Invalid JSON format')
+    
+    @patch('sys.stdin', io.StringIO(
+        '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]\n'
+        'invalid json\n'
+        '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]\n'
+        '{"operation":"buy", "unit-cost":10.00, "quantity": 100}\n'
+        '\n'
+        '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]\n'
+    ))
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_run_with_workers_keeps_input_order_and_errors(self, mock_stdout):
+        CapitalGainsCLI(workers=2, chunk_size=1).run()
+        
+        expected_output = (
+            '[{"tax": 0.0}, {"tax": 10000.0}]\n'
+            'Error: Invalid JSON format\n'
+            '[{"tax": 0.0}]\n'
+            "Error: string indices must be integers, not 'str'\n"
+        )
+        self.assertEqual(mock_stdout.getvalue(), expected_output)
+    
+    def test_process_files_writes_one_output_per_input(self):
+        lines = (
+            b'[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]\n'
+            b'\n'
+            b'invalid json\n'
+        )
+        expected_output = '[{"tax": 0.0}, {"tax": 10000.0}]\nError: Invalid JSON format\n'
+        
+        for workers in (1, 2):
+            with tempfile.TemporaryDirectory() as directory:
+                plain = os.path.join(directory, "plain.jsonl")
+                compressed = os.path.join(directory, "compressed.jsonl.gz")
+                with open(plain, "wb") as plain_file:
+                    plain_file.write(lines)
+                with gzip.open(compressed, "wb") as compressed_file:
+                    compressed_file.write(lines)
+                
+                with patch('sys.stderr', new_callable=io.StringIO):
+                    reports = CapitalGainsCLI(workers=workers).process_files([plain, compressed], directory)
+                
+                self.assertEqual([report.lines for report in reports], [2, 2])
+                for name in ("plain.jsonl.out", "compressed.jsonl.out"):
+                    with open(os.path.join(directory, name)) as output_file:
+                        self.assertEqual(output_file.read(), expected_output)
+    
+    def test_process_files_rejects_colliding_outputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name in ("day.jsonl", "day.jsonl.gz"):
+                paths.append(os.path.join(directory, name))
+                with (gzip.open if name.endswith(".gz") else open)(paths[-1], "wb") as input_file:
+                    input_file.write(b'[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]\n')
+            
+            with self.assertRaisesRegex(ValueError, "would both write"):
+                CapitalGainsCLI().process_files(paths, directory)
+            self.assertFalse(os.path.exists(os.path.join(directory, "day.jsonl.out")))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+import unittest
+import unittest.mock
+import asyncio
+import io
+import os
+import tempfile
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.capital_gains_cluster import Coordinator, ShardWorker, coordinate_files, parse_address
+
+
+BUY = '[{"operation":"buy", "unit-cost":10.00, "quantity": %d}]'
+PROFIT = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+
+
+class TestCoordinator(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.workers = []
+        self.addresses = []
+        for _ in range(2):
+            worker = ShardWorker(log=io.StringIO())
+            listener = await worker.start("127.0.0.1", 0)
+            self.workers.append(worker)
+            self.addresses.append(("127.0.0.1", listener.sockets[0].getsockname()[1]))
+    
+    async def asyncTearDown(self):
+        for worker in self.workers:
+            await worker.close()
+    
+    async def test_results_are_reassembled_in_input_order(self):
+        lines = [BUY % quantity for quantity in range(1, 50)] + [PROFIT, 'invalid json', '']
+        output = io.StringIO()
+        
+        reports = await Coordinator(self.addresses, shard_lines=7).run(lines, output)
+        
+        self.assertEqual(output.getvalue().splitlines(), ['[{"tax": 0.0}]'] * 49 + [
+            '[{"tax": 0.0}, {"tax": 10000.0}]',
+            'Error: Invalid JSON format'
+        ])
+        self.assertEqual([report.shard for report in reports], list(range(8)))
+        self.assertEqual(sum(report.lines for report in reports), 51)
+        self.assertTrue(all(report.attempts == 1 for report in reports))
+    
+    async def test_empty_input(self):
+        output = io.StringIO()
+        
+        self.assertEqual(await Coordinator(self.addresses).run([], output), [])
+        self.assertEqual(output.getvalue(), "")
+    
+    async def test_shards_of_a_failing_worker_are_retried(self):
+        async def drop_connection(reader, writer):
+            await reader.readline()
+            writer.close()
+        
+        flaky = await asyncio.start_server(drop_connection, "127.0.0.1", 0)
+        address = ("127.0.0.1", flaky.sockets[0].getsockname()[1])
+        lines = [BUY % quantity for quantity in range(1, 21)]
+        output = io.StringIO()
+        try:
+            reports = await Coordinator([address, self.addresses[0]], shard_lines=3, max_retries=5).run(lines, output)
+        finally:
+            flaky.close()
+            await flaky.wait_closed()
+        
+        self.assertEqual(output.getvalue().splitlines(), ['[{"tax": 0.0}]'] * 20)
+        self.assertEqual({report.worker for report in reports}, {"%s:%d" % self.addresses[0]})
+        self.assertTrue(any(report.attempts > 1 for report in reports))
+    
+    async def test_fails_when_every_worker_is_down(self):
+        unused = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        address = ("127.0.0.1", unused.sockets[0].getsockname()[1])
+        unused.close()
+        await unused.wait_closed()
+        
+        with self.assertRaises(RuntimeError):
+            await Coordinator([address], max_retries=1).run([BUY % 1], io.StringIO())
+    
+    async def test_timed_out_shards_are_retried(self):
+        async def never_answer(reader, writer):
+            await reader.read()
+        
+        slow = await asyncio.start_server(never_answer, "127.0.0.1", 0)
+        address = ("127.0.0.1", slow.sockets[0].getsockname()[1])
+        output = io.StringIO()
+        try:
+            await Coordinator([address, self.addresses[1]], shard_lines=1, timeout=0.2).run([BUY % 1, BUY % 2], output)
+        finally:
+            slow.close()
+            await slow.wait_closed()
+        
+        self.assertEqual(output.getvalue().splitlines(), ['[{"tax": 0.0}]'] * 2)
+    
+    async def test_fails_when_reading_the_input_fails(self):
+        def lines():
+            yield BUY % 1
+            raise OSError("read failed")
+        
+        with self.assertRaisesRegex(OSError, "read failed"):
+            await asyncio.wait_for(Coordinator(self.addresses, shard_lines=1).run(lines(), io.StringIO()), 5)
+    
+    async def test_raw_lines_are_answered_like_a_local_run(self):
+        output = io.StringIO()
+        
+        await asyncio.wait_for(Coordinator(self.addresses).run([b"\xff\xfe bad", (BUY % 1).encode()], output), 5)
+        
+        self.assertEqual(output.getvalue().splitlines(), [CapitalGainsCLI().process_line(b"\xff\xfe bad"), '[{"tax": 0.0}]'])
+
+
+class TestCoordinateFiles(unittest.TestCase):
+
+    def test_output_file_matches_local_run(self):
+        async def run(path, directory):
+            worker = ShardWorker(cli_options={"engine": "cents"}, log=io.StringIO())
+            listener = await worker.start("127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: coordinate_files([path], [("127.0.0.1", port)], directory, shard_lines=2)
+                )
+            finally:
+                await worker.close()
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "input.jsonl")
+            with open(path, "w") as input_file:
+                input_file.write("\n".join([PROFIT, BUY % 5, "", PROFIT]) + "\n")
+            
+            with unittest.mock.patch("sys.stderr", io.StringIO()):
+                reports = asyncio.run(run(path, directory))
+            
+            with open(os.path.join(directory, "input.jsonl.out")) as output_file:
+                self.assertEqual(output_file.read().splitlines(), [
+                    '[{"tax": 0.0}, {"tax": 10000.0}]',
+                    '[{"tax": 0.0}]',
+                    '[{"tax": 0.0}, {"tax": 10000.0}]'
+                ])
+            self.assertEqual(len(reports), 2)
+    
+    def test_parse_address(self):
+        self.assertEqual(parse_address("example.com:9000"), ("example.com", 9000))
+        self.assertEqual(parse_address(":9000"), ("127.0.0.1", 9000))
+
+
+if __name__ == '__main__':
+    unittest.main()
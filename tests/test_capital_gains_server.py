@@ -0,0 +1,111 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch
+
+from src.capital_gains_client import CapitalGainsClient, run_client
+from src.capital_gains_server import CapitalGainsServer
+
+
+class TestCapitalGainsServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = CapitalGainsServer(workers=1, offload_operations=2, max_pending=2)
+        listener = await self.server.start_tcp("127.0.0.1", 0)
+        self.port = listener.sockets[0].getsockname()[1]
+    
+    async def asyncTearDown(self):
+        await self.server.close()
+    
+    async def test_pipelined_lines_are_answered_in_order(self):
+        small = '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'
+        large = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+        
+        results = await run_client([large, small, 'invalid json', large] * 5, port=self.port)
+        
+        self.assertEqual(results, [
+            '[{"tax": 0.0}, {"tax": 10000.0}]',
+            '[{"tax": 0.0}]',
+            'Error: Invalid JSON format',
+            '[{"tax": 0.0}, {"tax": 10000.0}]'
+        ] * 5)
+    
+    async def test_lines_longer_than_the_default_stream_limit(self):
+        line = '[' + ','.join(['{"operation":"buy", "unit-cost":10.00, "quantity": 1}'] * 3000) + ']'
+        
+        results = await run_client([line], port=self.port)
+        
+        self.assertEqual(results, ['[' + ', '.join(['{"tax": 0.0}'] * 3000) + ']'])
+    
+    async def test_concurrent_connections(self):
+        lines = ['[{"operation":"buy", "unit-cost":10.00, "quantity": %d}]' % quantity for quantity in range(1, 30)]
+        
+        results = await asyncio.gather(*[run_client(lines, port=self.port) for _ in range(4)])
+        
+        for result in results:
+            self.assertEqual(result, ['[{"tax": 0.0}]'] * len(lines))
+    
+    async def test_large_lines_are_offloaded_to_the_pool(self):
+        line = b'[{"operation":"buy", "unit-cost":10.00, "quantity": 100},{"operation":"sell", "unit-cost":20.00, "quantity": 50}]'
+        
+        small = self.server._submit(b'[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]')
+        large = self.server._submit(line)
+        
+        self.assertTrue(small.done())
+        self.assertFalse(large.done())
+        self.assertEqual(await large, '[{"tax": 0.0}, {"tax": 0.0}]')
+    
+    async def test_lines_over_the_limit_get_an_error_line(self):
+        server = CapitalGainsServer(workers=1, max_line_bytes=1024)
+        listener = await server.start_tcp("127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+            writer.write(b"[" + b" " * 4096 + b"]\n")
+            await writer.drain()
+            
+            response = await reader.readline()
+            
+            self.assertEqual(response, b"Error: Line exceeds 1024 bytes\n")
+            self.assertEqual(await reader.read(), b"")
+            writer.close()
+        finally:
+            await server.close()
+    
+    async def test_empty_line_ends_the_session(self):
+        client = await CapitalGainsClient.connect_tcp("127.0.0.1", self.port)
+        await client.close()
+        
+        self.assertEqual(await client.reader.read(), b'')
+
+
+class TestCapitalGainsUnixServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "capital_gains.sock")
+            server = CapitalGainsServer(workers=1)
+            await server.start_unix(path)
+            try:
+                results = await run_client(['[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'], unix_path=path)
+            finally:
+                await server.close()
+            self.assertFalse(os.path.exists(path))
+        
+        self.assertEqual(results, ['[{"tax": 0.0}]'])
+
+
+
+class TestServeCommand(unittest.TestCase):
+
+    def test_workers_default_to_the_server_default(self):
+        from main import main
+        
+        for argv, workers in ((["--serve", "127.0.0.1:0"], None), (["--serve", "127.0.0.1:0", "--workers", "3"], 3)):
+            with patch("src.capital_gains_server.serve") as serve:
+                main(argv)
+            self.assertEqual(serve.call_args.kwargs["workers"], workers)
+        self.assertEqual(CapitalGainsServer().workers, os.cpu_count() or 1)
+
+if __name__ == "__main__":
+    unittest.main()
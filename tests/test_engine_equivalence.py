@@ -0,0 +1,80 @@
+import unittest
+import random
+
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.services.tax_calculator import TaxCalculator
+from src.utils.json_utils import format_results
+from tests.helpers import random_operations
+
+
+class TestEngineEquivalence(unittest.TestCase):
+    
+    def setUp(self):
+        self.decimal_calculator = TaxCalculator(engine="decimal")
+        self.cents_calculator = TaxCalculator(engine="cents")
+    
+    def assertEnginesAgree(self, operations):
+        expected = format_results(self.decimal_calculator.calculate_taxes(operations))
+        self.assertEqual(format_results(self.cents_calculator.calculate_taxes(operations)), expected)
+        self.assertEqual(self.cents_calculator.weighted_average_price, self.decimal_calculator.weighted_average_price)
+        self.assertEqual(self.cents_calculator.total_shares, self.decimal_calculator.total_shares)
+        self.assertEqual(self.cents_calculator.accumulated_loss, self.decimal_calculator.accumulated_loss)
+    
+    def test_random_simulations_produce_identical_output(self):
+        rng = random.Random(20240601)
+        for _ in range(500):
+            self.assertEnginesAgree(random_operations(rng, rng.randint(1, 40)))
+    
+    def test_batch_path_matches_decimal_engine(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            batch = OperationBatch.from_operations(random_operations(rng, rng.randint(1, 40)))
+            self.assertEqual(self.cents_calculator.calculate_batch(batch), self.decimal_calculator.calculate_batch(batch))
+    
+    def test_weighted_average_rounding_ties(self):
+        self.assertEnginesAgree([
+            Operation("buy", 10.00, 1),
+            Operation("buy", 10.01, 1),
+            Operation("sell", 30000.00, 2),
+            Operation("buy", 10.00, 3),
+            Operation("buy", 10.02, 5),
+            Operation("sell", 5000.00, 8)
+        ])
+    
+    def test_fractional_cents_fall_back_to_decimal(self):
+        self.assertEnginesAgree([
+            Operation("buy", 10.00, 10000),
+            Operation("buy", 10.125, 333),
+            Operation("sell", 20.333, 5000),
+            Operation("sell", 2.00, 100)
+        ])
+    
+    def test_huge_values_fall_back_to_decimal(self):
+        self.assertEnginesAgree([
+            Operation("buy", 10.00, 10 ** 25),
+            Operation("buy", 11.00, 10 ** 25),
+            Operation("sell", 30.00, 10 ** 25)
+        ])
+    
+    def test_negative_and_oversold_quantities(self):
+        self.assertEnginesAgree([
+            Operation("buy", 10.00, 100),
+            Operation("sell", 50.00, 1000),
+            Operation("buy", 12.00, -50),
+            Operation("sell", 3.00, -20)
+        ])
+    
+    def test_errors_are_identical(self):
+        operations = [Operation("buy", 10.00, 5), Operation("buy", 10.00, -5)]
+        
+        with self.assertRaises(Exception) as decimal_error:
+            self.decimal_calculator.calculate_taxes(operations)
+        with self.assertRaises(Exception) as cents_error:
+            self.cents_calculator.calculate_taxes(operations)
+        
+        self.assertEqual(str(cents_error.exception), str(decimal_error.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import gzip
+import os
+import tempfile
+
+from src.utils.file_utils import FileReport, iter_line_chunks, output_path_for, output_paths_for
+
+
+class TestFileUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.lines = [('[{"operation":"buy", "unit-cost":10.00, "quantity": %d}]' % index).encode() for index in range(200)]
+        self.content = b"\n".join(self.lines) + b"\n"
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def write(self, name, content, compress=False):
+        path = os.path.join(self.directory.name, name)
+        with (gzip.open(path, "wb") if compress else open(path, "wb")) as output_file:
+            output_file.write(content)
+        return path
+    
+    def test_chunks_are_line_aligned(self):
+        path = self.write("input.txt", self.content)
+        
+        chunks = list(iter_line_chunks(path, chunk_bytes=100))
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([line for chunk in chunks for line in chunk], self.lines)
+    
+    def test_last_line_without_newline(self):
+        path = self.write("input.txt", self.content.rstrip(b"\n"))
+        
+        self.assertEqual([line for chunk in iter_line_chunks(path, chunk_bytes=64) for line in chunk], self.lines)
+    
+    def test_gzip_input(self):
+        path = self.write("input.txt.gz", self.content, compress=True)
+        
+        self.assertEqual([line for chunk in iter_line_chunks(path, chunk_bytes=100) for line in chunk], self.lines)
+    
+    def test_empty_file(self):
+        self.assertEqual(list(iter_line_chunks(self.write("empty.txt", b""))), [])
+    
+    def test_output_path_for(self):
+        self.assertEqual(output_path_for("/data/day1.jsonl.gz", "/out"), "/out/day1.jsonl.out")
+        self.assertEqual(output_path_for("day2.jsonl", "."), "./day2.jsonl.out")
+    
+    def test_output_paths_must_be_distinct(self):
+        self.assertEqual(output_paths_for(["a.jsonl", "b.jsonl.gz"], "out"), ["out/a.jsonl.out", "out/b.jsonl.out"])
+        for paths in (["a.jsonl", "a.jsonl.gz"], ["x/day.jsonl", "y/day.jsonl"], ["a.jsonl", "a.jsonl"]):
+            with self.assertRaisesRegex(ValueError, "would both write"):
+                output_paths_for(paths, "out")
+    
+    def test_file_report_throughput(self):
+        report = FileReport("in", "out", lines=100, bytes=2000000, seconds=2.0)
+        
+        self.assertEqual(report.lines_per_second, 50)
+        self.assertEqual(report.megabytes_per_second, 1.0)
+        self.assertIn("100 lines", report.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
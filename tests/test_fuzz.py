@@ -0,0 +1,117 @@
+import unittest
+import io
+from contextlib import redirect_stderr, redirect_stdout
+from decimal import Decimal
+
+from fuzz.differential import ENGINES, Unsupported, fuzz, main, outcome, shrink
+from fuzz.generator import generate_case
+from src.models.operation import Operation, OperationType
+from src.models.tax_result import TaxResult
+from src.services.tax_calculator import TaxCalculator
+from src.utils.json_utils import parse_operations
+
+
+def make_exemption_bug_engine():
+    """Engine taxing sells of exactly 20000, which the reference exempts."""
+    calculator = TaxCalculator()
+    
+    def calculate(operations):
+        taxes = calculator.calculate_taxes(operations)
+        for index, operation in enumerate(operations):
+            if operation.operation_type is OperationType.SELL and operation.unit_cost * operation.quantity == 20000:
+                taxes[index] = TaxResult(taxes[index].tax + Decimal("0.01"))
+        return taxes
+    return calculate
+
+
+def make_crashing_engine():
+    """Engine raising on any sell above 1000 shares."""
+    calculator = TaxCalculator()
+    
+    def calculate(operations):
+        if any(operation.operation_type is OperationType.SELL and operation.quantity > 1000 for operation in operations):
+            raise ZeroDivisionError()
+        return calculator.calculate_taxes(operations)
+    return calculate
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_cases_are_reproducible(self):
+        for index in range(50):
+            first = [(op.operation_type, op.unit_cost, op.quantity) for op in generate_case(3, index)]
+            second = [(op.operation_type, op.unit_cost, op.quantity) for op in generate_case(3, index)]
+            self.assertEqual(first, second)
+        self.assertNotEqual(
+            [op.unit_cost for op in generate_case(3, 0)],
+            [op.unit_cost for op in generate_case(4, 0)]
+        )
+    
+    def test_cases_reach_the_edge_cases(self):
+        operations = [operation for index in range(300) for operation in generate_case(0, index)]
+        
+        sells = [operation for operation in operations if operation.operation_type is OperationType.SELL]
+        self.assertTrue(any(operation.unit_cost * operation.quantity == 20000 for operation in sells))
+        self.assertTrue(any(operation.unit_cost != operation.unit_cost.quantize(Decimal("0.01")) for operation in operations))
+        self.assertTrue(any(operation.quantity >= 10 ** 12 for operation in operations))
+
+
+class TestDifferentialFuzzer(unittest.TestCase):
+
+    def test_outcome_normalizes_results(self):
+        operations = [Operation("buy", 10, 100)]
+        
+        self.assertEqual(outcome(lambda ops: [TaxResult(Decimal("1.50"))], operations), "[1.5]")
+        self.assertEqual(outcome(lambda ops: [150], operations), "[1.5]")
+        self.assertEqual(outcome(lambda ops: [Decimal("1.5")], operations), "[1.5]")
+        self.assertEqual(outcome(lambda ops: 1 / 0, operations), "error ZeroDivisionError")
+        
+        def unsupported(ops):
+            raise Unsupported("skipped")
+        self.assertIsNone(outcome(unsupported, operations))
+    
+    def test_builtin_engines_agree_with_reference(self):
+        comparisons, mismatches = fuzz(list(ENGINES), seed=11, cases=300)
+        
+        self.assertEqual(mismatches, [])
+        self.assertGreater(comparisons, 300)
+    
+    def test_bug_is_found_and_shrunk(self):
+        comparisons, mismatches = fuzz(["tests.test_fuzz:make_exemption_bug_engine"], seed=0, cases=300)
+        
+        self.assertEqual(len(mismatches), 1)
+        mismatch = mismatches[0]
+        self.assertLessEqual(len(mismatch.operations), 2)
+        self.assertNotEqual(mismatch.expected, mismatch.actual)
+        replayed = parse_operations(mismatch.reproducer())
+        self.assertEqual(outcome(TaxCalculator().calculate_taxes, replayed), mismatch.expected)
+    
+    def test_crash_is_reported(self):
+        _, mismatches = fuzz(["tests.test_fuzz:make_crashing_engine"], seed=0, cases=100)
+        
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0].actual, "error ZeroDivisionError")
+        self.assertEqual(len(mismatches[0].operations), 1)
+        self.assertGreater(mismatches[0].operations[0].quantity, 1000)
+    
+    def test_shrink_removes_and_simplifies_operations(self):
+        operations = [Operation("buy", Decimal("12.34"), 500)] * 5 + [Operation("sell", Decimal("99.99"), 77)]
+        
+        def fails(candidate):
+            return any(operation.operation_type is OperationType.SELL for operation in candidate)
+        
+        shrunk = shrink(operations, fails)
+        
+        self.assertEqual(len(shrunk), 1)
+        self.assertEqual((shrunk[0].unit_cost, shrunk[0].quantity), (Decimal("100"), 1))
+    
+    def test_main_exit_status(self):
+        for engine, status in (("cents", 0), ("tests.test_fuzz:make_exemption_bug_engine", 1)):
+            with redirect_stdout(io.StringIO()) as stdout, redirect_stderr(io.StringIO()) as stderr:
+                self.assertEqual(main(["--engine", engine, "--cases", "300", "--workers", "1"]), status)
+            self.assertIn("300 cases", stderr.getvalue())
+            self.assertEqual(bool(stdout.getvalue()), bool(status))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation import Operation
+from src.services.tax_calculator import TaxCalculator
+from src.utils.instrumentation import Instrumentation, profiled
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.input_line = (
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},'
+            '{"operation":"sell", "unit-cost":5.00, "quantity": 1000},'
+            '{"operation":"sell", "unit-cost":15.00, "quantity": 1000},'
+            '{"operation":"sell", "unit-cost":25.00, "quantity": 1000},'
+            '{"operation":"sell", "unit-cost":40.00, "quantity": 1000}]'
+        )
+    
+    def test_counts_stages_and_sell_outcomes(self):
+        with Instrumentation() as instrumentation:
+            result = CapitalGainsCLI().process_input(self.input_line)
+        
+        metrics = instrumentation.to_dict()
+        
+        self.assertEqual(result, '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 0.0}, {"tax": 2000.0}, {"tax": 6000.0}]')
+        self.assertEqual(metrics["timers"]["parse_operations"]["calls"], 1)
+        self.assertEqual(metrics["timers"]["Operation.from_dict"]["calls"], 5)
+        self.assertEqual(metrics["timers"]["TaxCalculator._update_weighted_average"]["calls"], 1)
+        self.assertEqual(metrics["timers"]["format_results"]["calls"], 1)
+        self.assertEqual(metrics["counters"], {
+            "loss_carry_forward_events": 1,
+            "operations_processed": 5,
+            "sells_exempted_under_20k": 1,
+            "sells_taxed": 2
+        })
+    
+    def test_metrics_reject_options_it_cannot_see(self):
+        from main import parse_args
+        
+        self.assertEqual(parse_args(["--metrics", "json", "--validate", "lenient", "--batch"]).metrics, "json")
+        for options in (
+            ["--engine", "cents"], ["--stream"], ["--workers", "2"], ["--cache-size", "10"], ["--prefix-cache", "10"],
+            ["--portfolio", "shared"], ["--input-format", "binary"], ["--merge", "feed.jsonl"], ["--serve", ":0"]
+        ):
+            with patch("sys.stderr", new_callable=io.StringIO) as stderr, self.assertRaises(SystemExit):
+                parse_args(["--metrics", "json"] + options)
+            self.assertIn("--metrics cannot be combined with", stderr.getvalue())
+    
+    def test_uninstall_restores_original_functions(self):
+        original = TaxCalculator.__dict__["_calculate_sell_tax"]
+        from_dict = Operation.__dict__["from_dict"]
+        
+        with Instrumentation():
+            self.assertIsNot(TaxCalculator.__dict__["_calculate_sell_tax"], original)
+        
+        self.assertIs(TaxCalculator.__dict__["_calculate_sell_tax"], original)
+        self.assertIs(Operation.__dict__["from_dict"], from_dict)
+    
+    def test_prometheus_export(self):
+        with Instrumentation() as instrumentation:
+            CapitalGainsCLI().process_input(self.input_line)
+        
+        text = instrumentation.to_prometheus()
+        
+        self.assertIn('capital_gains_stage_calls_total{stage="parse_operations"} 1\n', text)
+        self.assertIn('capital_gains_sells_taxed_total 2\n', text)
+    
+    def test_export_to_stderr_and_file(self):
+        instrumentation = Instrumentation()
+        instrumentation.counters["sells_taxed"] = 3
+        
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            instrumentation.export("json")
+        
+        self.assertEqual(json.loads(stderr.getvalue())["counters"], {"sells_taxed": 3})
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.prom")
+            instrumentation.export("prometheus", path)
+            with open(path) as metrics_file:
+                self.assertIn("capital_gains_sells_taxed_total 3", metrics_file.read())
+        
+        self.assertRaises(ValueError, instrumentation.export, "xml")
+    
+    def test_profiled_writes_profile_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.prof")
+            with profiled(path):
+                CapitalGainsCLI().process_input(self.input_line)
+            
+            self.assertTrue(os.path.getsize(path) > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import json
+import random
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from benchmarks.workload import generate_workload
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation import Operation
+from src.services.tax_calculator import TaxCalculator
+from src.utils.json_codec import BACKENDS, JsonCodec, decode_decimal, default_backend
+from src.utils.json_utils import format_results, iter_operations
+
+
+def installed_backends():
+    backends = []
+    for backend in BACKENDS:
+        try:
+            JsonCodec(backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def reference_output(line):
+    """Output of the original pipeline: json.loads, str(float) and json.dumps."""
+    try:
+        operations = [Operation.from_dict(item) for item in json.loads(line)]
+        taxes = TaxCalculator().calculate_taxes(operations)
+    except json.JSONDecodeError:
+        return "Error: Invalid JSON format"
+    except Exception as e:
+        return f"Error: {e}"
+    return json.dumps([{"tax": float(result.tax)} for result in taxes])
+
+
+EDGE_LINES = [
+    '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]',
+    '[{"operation":"buy", "unit-cost":10.123456789012345678, "quantity": 10000},{"operation":"sell", "unit-cost":2.5e1, "quantity": 5000}]',
+    '[{"operation":"buy", "unit-cost":1E2, "quantity": 100000000000000000000000},{"operation":"sell", "unit-cost":1.5e2, "quantity": 3}]',
+    '[{"operation":"buy", "unit-cost":NaN, "quantity": 10}]',
+    '[{"operation":"buy", "unit-cost":1e400, "quantity": 10}]',
+    '[{"operation":"buy", "unit-cost":10.5, "quantity": 100.0},{"operation":"sell", "unit-cost":11.5, "quantity": 50}]',
+    '[{"operation":1.5, "unit-cost":10.5, "quantity": 100}]',
+    '[1.5]',
+    '1.5',
+    '[{"operation":"buy", "unit-cost":-0.0, "quantity": 10}]',
+    '[{"operation":"\\ud800", "unit-cost":10, "quantity": 10}]',
+    '﻿[]',
+    '[{"operation":"buy", "unit-cost":10.00, "quantity": 10}',
+    '[{"operation":"buy", "quantity": 10}]',
+    '[]'
+]
+
+
+class TestDecodeDecimal(unittest.TestCase):
+    
+    def test_matches_the_float_round_trip(self):
+        rng = random.Random(3)
+        literals = ['0.1', '10.00', '-0.0', '0.000', '100.0', '0.0001', '0.00005', '-0.000120', '1e5', '1.5E-7', '123456789012345.6', '0.1000000000000000055511', '1e400']
+        literals += [f"{rng.uniform(0, 10 ** rng.randint(0, 20)):.{rng.randint(0, 12)}f}" for _ in range(2000)]
+        literals += [f"{rng.uniform(0, 10 ** -rng.randint(0, 8)):.{rng.randint(1, 12)}f}" for _ in range(2000)]
+        
+        for literal in literals:
+            with self.subTest(literal=literal):
+                self.assertEqual(str(decode_decimal(literal)), str(Decimal(str(float(literal)))))
+
+
+class TestJsonCodec(unittest.TestCase):
+    
+    def test_default_backend_is_installed(self):
+        self.assertIn(default_backend(), installed_backends())
+    
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            JsonCodec("yaml")
+    
+    def test_backends_decode_the_same_values(self):
+        line = '[{"operation":"buy", "unit-cost":10.25, "quantity": 100, "note": [true, null, "x"]}]'
+        for backend in installed_backends():
+            with self.subTest(backend=backend):
+                item = JsonCodec(backend).loads(line)[0]
+                self.assertEqual(item["unit-cost"], Decimal("10.25"))
+                self.assertEqual(str(Operation.from_dict(JsonCodec(backend).loads('[{"operation":"buy", "unit-cost":10.00, "quantity": 1}]')[0]).unit_cost), "10.0")
+                self.assertEqual(item["note"], [True, None, "x"])
+                self.assertEqual(JsonCodec(backend).loads(line.encode("utf-8")), JsonCodec(backend).loads(line))
+    
+    def test_backends_raise_json_decode_error(self):
+        for backend in installed_backends():
+            with self.subTest(backend=backend):
+                with self.assertRaises(json.JSONDecodeError):
+                    JsonCodec(backend).loads('[{"operation": }]')
+    
+    def test_cli_output_is_byte_compatible_with_every_backend(self):
+        lines = EDGE_LINES + generate_workload(20, 200, 0.4, 0.3, 11)
+        expected = [reference_output(line) for line in lines]
+        
+        for backend in installed_backends():
+            for engine in ("decimal", "cents"):
+                cli = CapitalGainsCLI(engine=engine, json_backend=backend)
+                with self.subTest(backend=backend, engine=engine):
+                    self.assertEqual([cli.process_line(line) for line in lines], expected)
+    
+    def test_streaming_uses_the_configured_backend(self):
+        line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+        for backend in installed_backends():
+            codec = JsonCodec(backend)
+            with self.subTest(backend=backend), patch.object(codec, "loads", wraps=codec.loads) as loads:
+                operations = list(iter_operations(line, codec))
+                self.assertEqual([str(operation.unit_cost) for operation in operations], ["10.0", "20.0"])
+                self.assertEqual(loads.called, backend != "stdlib")
+    
+    def test_streaming_parser_reports_errors_like_json_loads(self):
+        for line in EDGE_LINES:
+            with self.subTest(line=line):
+                try:
+                    expected = format_results(TaxCalculator().calculate_taxes([Operation.from_dict(item) for item in json.loads(line)]))
+                except Exception as e:
+                    expected = f"{type(e).__name__}: {e}"
+                try:
+                    output = format_results(TaxCalculator().calculate_taxes(list(iter_operations(line))))
+                except Exception as e:
+                    output = f"{type(e).__name__}: {e}"
+                self.assertEqual(output, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
 import unittest
+import io
 import json
 from decimal import Decimal
 
 from src.models.tax_result import TaxResult
-from src.utils.json_utils import parse_operations, format_results, DecimalEncoder
+from src.utils.json_utils import (
+    parse_operations, iter_operations, format_results, decimal_to_json, ResultWriter, DecimalEncoder
+)
 
 
 class TestJsonUtils(unittest.TestCase):
@@ -21,6 +24,34 @@ class TestJsonUtils(unittest.TestCase):
         self.assertEqual(operations[1].unit_cost, Decimal('15.00'))
         self.assertEqual(operations[1].quantity, 50)
     
+    def test_iter_operations_matches_parse_operations(self):
+        json_str = ' [ {"operation":"buy", "unit-cost":10.00, "quantity": 100} ,{"operation":"sell", "unit-cost":15.00, "quantity": 50} ] '
+        
+        streamed = list(iter_operations(json_str))
+        parsed = parse_operations(json_str)
+        
+        self.assertEqual([op.to_dict() for op in streamed], [op.to_dict() for op in parsed])
+    
+    def test_iter_operations_is_lazy(self):
+        json_str = '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}, invalid'
+        
+        operations = iter_operations(json_str)
+        
+        self.assertEqual(next(operations).quantity, 100)
+        self.assertRaises(json.JSONDecodeError, next, operations)
+    
+    def test_iter_operations_handles_empty_array(self):
+        self.assertEqual(list(iter_operations('[ ]')), [])
+    
+    def test_iter_operations_rejects_trailing_data(self):
+        self.assertRaises(json.JSONDecodeError, list, iter_operations('[] []'))
+    
+    def test_iter_operations_delegates_non_array_input(self):
+        with self.assertRaises(TypeError) as context:
+            list(iter_operations(b'{"operation":"buy", "unit-cost":10.00, "quantity": 100}'))
+        
+        self.assertEqual(str(context.exception), "string indices must be integers, not 'str'")
+    
     def test_format_results(self):
         results = [
             TaxResult(Decimal('0')),
@@ -34,6 +65,41 @@ class TestJsonUtils(unittest.TestCase):
         self.assertEqual(data[0]["tax"], 0.0)
         self.assertEqual(data[1]["tax"], 10000.5)
     
+    def test_format_results_matches_json_dumps(self):
+        results = [TaxResult(Decimal(value)) for value in ('0', '0.00', '1000', '10000.50', '0.01', '123456789012.34')]
+        
+        self.assertEqual(format_results(results), json.dumps([result.to_dict() for result in results]))
+        self.assertEqual(format_results([]), '[]')
+    
+    def test_decimal_to_json_matches_float_representation(self):
+        values = ['0', '-0', '0.00', '7', '10.50', '1E+3', '99999999999999.99', '123456789012345678.91', '1E+20', '0.00001']
+        
+        for value in values:
+            self.assertEqual(decimal_to_json(Decimal(value)), repr(float(Decimal(value))), value)
+    
+    def test_result_writer_writes_one_line_per_simulation(self):
+        stream = io.StringIO()
+        writer = ResultWriter(stream, chunk_size=2)
+        
+        count = writer.write_line(iter([TaxResult(Decimal('0')), TaxResult(Decimal('10000.00')), TaxResult(Decimal('0'))]))
+        writer.write_line(iter([]))
+        
+        self.assertEqual(count, 3)
+        self.assertEqual(stream.getvalue(), '[{"tax": 0.0}, {"tax": 10000.0}, {"tax": 0.0}]\n[]\n')
+    
+    def test_result_writer_flags_partial_output_on_failure(self):
+        def results():
+            yield TaxResult(Decimal('0'))
+            yield TaxResult(Decimal('0'))
+            raise ValueError("boom")
+        
+        stream = io.StringIO()
+        writer = ResultWriter(stream, chunk_size=2)
+        
+        self.assertRaises(ValueError, writer.write_line, results())
+        self.assertTrue(writer.partial)
+        self.assertEqual(stream.getvalue(), '[{"tax": 0.0}, {"tax": 0.0}')
+    
     def test_decimal_encoder(self):
         data = {
             "value": Decimal('123.45')
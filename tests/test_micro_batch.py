@@ -0,0 +1,126 @@
+import unittest
+import io
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.utils.micro_batch import MicroBatchPipeline, is_interactive
+
+
+class RecordingOutput(io.StringIO):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+    
+    def write(self, text):
+        self.writes.append(text)
+        return super().write(text)
+
+
+class TestMicroBatchPipeline(unittest.TestCase):
+
+    def test_outputs_are_written_in_order_and_batched(self):
+        output = RecordingOutput()
+        pipeline = MicroBatchPipeline(str.upper, max_lines=4, max_delay=60)
+        
+        pipeline.run(io.StringIO("".join(f"line {index}\n" for index in range(10)) + "\nignored\n"), output)
+        
+        self.assertEqual(output.getvalue().splitlines(), [f"LINE {index}" for index in range(10)])
+        self.assertLessEqual(max(write.count("\n") for write in output.writes), 4)
+        self.assertEqual(pipeline.stats.lines, 10)
+        self.assertEqual(pipeline.stats.batches, len(output.writes))
+    
+    def test_burst_on_a_pipe_is_read_as_groups(self):
+        read_end, write_end = os.pipe()
+        os.write(write_end, "".join(f"line {index}\r\n" for index in range(500)).encode("utf-8"))
+        os.close(write_end)
+        output = RecordingOutput()
+        pipeline = MicroBatchPipeline(str.upper, max_lines=1000, max_delay=60)
+        
+        with os.fdopen(read_end) as stream:
+            pipeline.run(stream, output)
+        
+        self.assertEqual(output.getvalue().splitlines(), [f"LINE {index}" for index in range(500)])
+        self.assertLess(len(output.writes), 500)
+    
+    def test_slow_input_is_flushed_immediately(self):
+        read_end, write_end = os.pipe()
+        output = RecordingOutput()
+        pipeline = MicroBatchPipeline(str.upper, max_lines=1000, max_delay=60)
+        
+        def produce():
+            for index in range(3):
+                os.write(write_end, f"line {index}\n".encode("utf-8"))
+                time.sleep(0.05)
+            os.close(write_end)
+        
+        producer = threading.Thread(target=produce)
+        producer.start()
+        with os.fdopen(read_end) as stream:
+            pipeline.run(stream, output)
+        producer.join()
+        
+        self.assertEqual(output.writes, ["LINE 0\n", "LINE 1\n", "LINE 2\n"])
+    
+    def test_immediate_mode_flushes_every_line(self):
+        output = RecordingOutput()
+        pipeline = MicroBatchPipeline(str.upper, immediate=True)
+        
+        pipeline.run(io.StringIO("a\nb\nc\n"), output)
+        
+        self.assertEqual(output.writes, ["A\n", "B\n", "C\n"])
+    
+    def test_statistics(self):
+        pipeline = MicroBatchPipeline(str.upper)
+        pipeline.run(io.StringIO("a\nb\n"), io.StringIO())
+        
+        stats = pipeline.stats.to_dict()
+        
+        self.assertEqual(stats["lines"], 2)
+        self.assertGreaterEqual(stats["batches"], 1)
+        self.assertGreaterEqual(stats["max-latency-ms"], stats["mean-latency-ms"])
+        self.assertIn("mean-queue-depth", stats)
+    
+    def test_is_interactive(self):
+        self.assertFalse(is_interactive(io.StringIO()))
+        self.assertFalse(is_interactive(None))
+
+
+class TestBatchedCLI(unittest.TestCase):
+
+    def test_batched_run_matches_default_run(self):
+        lines = [
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]',
+            'invalid json',
+            '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'
+        ] * 20
+        outputs = []
+        for options in ({}, {"batching": True, "batch_lines": 7}):
+            with patch("sys.stdin", io.StringIO("\n".join(lines) + "\n\n")), patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                cli = CapitalGainsCLI(**options)
+                cli.run()
+            outputs.append(stdout.getvalue())
+        
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(cli.pipeline_stats.lines, len(lines))
+    
+    def test_batching_rejects_modes_without_the_pipeline(self):
+        for options in ({"workers": 2}, {"streaming": True}, {"input_format": "binary"}, {"output_format": "binary"}):
+            with self.assertRaises(ValueError):
+                CapitalGainsCLI(batching=True, **options)
+        with self.assertRaises(ValueError):
+            CapitalGainsCLI(batching=True).process_files(["input.jsonl"])
+    
+    def test_command_line_rejects_batching_of_files(self):
+        from main import parse_args
+        
+        for options in (["--input", "a.jsonl"], ["--merge", "a.jsonl"], ["--state-store", "state.db"]):
+            with patch("sys.stderr", new_callable=io.StringIO), self.assertRaises(SystemExit):
+                parse_args(["--batch"] + options)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,6 +41,25 @@ class TestOperation(unittest.TestCase):
         }
         
         self.assertEqual(operation.to_dict(), expected)
+    
+    def test_ticker_is_optional(self):
+        data = {"operation": "buy", "unit-cost": 10.00, "quantity": 100, "ticker": "PETR4"}
+        
+        operation = Operation.from_dict(data)
+        
+        self.assertEqual(operation.ticker, "PETR4")
+        self.assertEqual(operation.to_dict(), data)
+        self.assertIsNone(Operation("buy", 10.00, 100).ticker)
+        self.assertNotIn("ticker", Operation("buy", 10.00, 100).to_dict())
+    
+    def test_timestamp_is_optional(self):
+        data = {"operation": "sell", "unit-cost": 10.00, "quantity": 100, "timestamp": "2024-01-02T10:00:00"}
+        
+        operation = Operation.from_dict(data)
+        
+        self.assertEqual(operation.timestamp, "2024-01-02T10:00:00")
+        self.assertEqual(operation.to_dict(), data)
+        self.assertEqual(Operation.from_dict({"operation": "buy", "unit-cost": 1, "quantity": 1, "timestamp": Decimal("1.5")}).timestamp, 1.5)
 
 
 if __name__ == "__main__":
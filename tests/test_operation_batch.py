@@ -0,0 +1,47 @@
+import unittest
+from array import array
+from decimal import Decimal
+
+from src.models.operation import Operation, OperationType
+from src.models.operation_batch import OperationBatch, price_to_cents, BUY_CODE, SELL_CODE
+
+
+class TestOperationBatch(unittest.TestCase):
+    
+    def test_price_to_cents(self):
+        self.assertEqual(price_to_cents(10.5), 1050)
+        self.assertEqual(price_to_cents(Decimal('0.01')), 1)
+        self.assertEqual(price_to_cents(20), 2000)
+    
+    def test_price_to_cents_rejects_fractional_cents(self):
+        self.assertRaises(ValueError, price_to_cents, 10.125)
+    
+    def test_from_dicts_stores_columns(self):
+        batch = OperationBatch.from_dicts([
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 100},
+            {"operation": "sell", "unit-cost": 15.50, "quantity": 50}
+        ])
+        
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.types, bytearray([BUY_CODE, SELL_CODE]))
+        self.assertEqual(batch.prices, array('q', [1000, 1550]))
+        self.assertEqual(batch.quantities, array('q', [100, 50]))
+    
+    def test_iteration_materializes_operations(self):
+        batch = OperationBatch.from_operations([Operation("sell", 15.50, 50)])
+        
+        operation = list(batch)[0]
+        
+        self.assertEqual(operation.operation_type, OperationType.SELL)
+        self.assertEqual(operation.unit_cost, Decimal('15.50'))
+        self.assertEqual(operation.quantity, 50)
+    
+    def test_columns_must_have_same_length(self):
+        self.assertRaises(ValueError, OperationBatch, bytearray([BUY_CODE]), array('q'), array('q'))
+    
+    def test_operation_has_no_instance_dict(self):
+        self.assertFalse(hasattr(Operation("buy", 10.00, 1), "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation import Operation
+from src.services.portfolio_calculator import PortfolioTaxCalculator, shard_of
+from src.services.tax_calculator import TaxCalculator
+from src.utils.json_utils import format_results
+from tests.helpers import random_operations
+
+
+def random_portfolio(rng, tickers, length):
+    """Interleaves independent random simulations of several tickers."""
+    streams = {ticker: random_operations(rng, length) for ticker in tickers}
+    operations = []
+    while any(streams.values()):
+        ticker = rng.choice([ticker for ticker, stream in streams.items() if stream])
+        operation = streams[ticker].pop(0)
+        operation.ticker = ticker
+        operations.append(operation)
+    return operations
+
+
+class TestPortfolioTaxCalculator(unittest.TestCase):
+
+    def test_single_asset_matches_tax_calculator(self):
+        rng = random.Random(17)
+        for engine in ("decimal", "cents"):
+            calculator = PortfolioTaxCalculator(engine)
+            for _ in range(100):
+                operations = random_operations(rng, rng.randint(1, 30))
+                with self.subTest(engine=engine):
+                    self.assertEqual(
+                        format_results(calculator.calculate_taxes(operations)),
+                        format_results(TaxCalculator(engine).calculate_taxes(operations))
+                    )
+    
+    def test_per_asset_pools_treat_tickers_independently(self):
+        rng = random.Random(5)
+        calculator = PortfolioTaxCalculator(loss_pool="per-asset")
+        for _ in range(50):
+            operations = random_portfolio(rng, ["AAA", "BBB", "CCC"], rng.randint(1, 20))
+            results = calculator.calculate_taxes(operations)
+            
+            for ticker in ("AAA", "BBB", "CCC"):
+                positions = [index for index, operation in enumerate(operations) if operation.ticker == ticker]
+                expected = TaxCalculator().calculate_taxes([operations[index] for index in positions])
+                self.assertEqual([results[index].tax for index in positions], [result.tax for result in expected])
+    
+    def test_shared_pool_deducts_losses_across_tickers(self):
+        operations = [
+            Operation("buy", 10.00, 10000, "AAA"),
+            Operation("buy", 20.00, 10000, "BBB"),
+            Operation("sell", 5.00, 10000, "AAA"),
+            Operation("sell", 30.00, 10000, "BBB")
+        ]
+        
+        shared = PortfolioTaxCalculator(loss_pool="shared").calculate_taxes(operations)
+        per_asset = PortfolioTaxCalculator(loss_pool="per-asset").calculate_taxes(operations)
+        
+        self.assertEqual(format_results(shared), '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 0.0}, {"tax": 10000.0}]')
+        self.assertEqual(format_results(per_asset), '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 0.0}, {"tax": 20000.0}]')
+    
+    def test_sharded_results_keep_the_original_order(self):
+        rng = random.Random(9)
+        operations = random_portfolio(rng, [f"T{index}" for index in range(12)], 40)
+        expected = PortfolioTaxCalculator(loss_pool="per-asset").calculate_taxes(operations)
+        
+        with PortfolioTaxCalculator(loss_pool="per-asset", shards=3, min_shard_operations=0) as calculator:
+            results = calculator.calculate_taxes(operations)
+        
+        self.assertEqual(format_results(results), format_results(expected))
+    
+    def test_sharding_requires_per_asset_pools(self):
+        with self.assertRaises(ValueError):
+            PortfolioTaxCalculator(loss_pool="shared", shards=2)
+        with self.assertRaises(ValueError):
+            PortfolioTaxCalculator(loss_pool="global")
+    
+    def test_shards_are_stable(self):
+        self.assertEqual(shard_of(None, 4), 0)
+        self.assertEqual(shard_of("PETR4", 4), shard_of("PETR4", 4))
+        self.assertTrue(0 <= shard_of("VALE3", 4) < 4)
+    
+    def test_shards_reach_worker_processes_and_servers(self):
+        from main import cli_options, parse_args
+        
+        cli = CapitalGainsCLI(portfolio="per-asset", shards=3, workers=2)
+        args = parse_args(["--serve", ":0", "--portfolio", "per-asset", "--shards", "3"])
+        
+        self.assertEqual(cli._worker_options["shards"], 3)
+        self.assertEqual(cli_options(args)["shards"], 3)
+        self.assertEqual(CapitalGainsCLI(**cli_options(args)).calculator.shards, 3)
+    
+    def test_cli_reads_tickers(self):
+        cli = CapitalGainsCLI(portfolio="shared")
+        line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000, "ticker": "AAA"},{"operation":"buy", "unit-cost":50.00, "quantity": 100, "ticker": "BBB"},{"operation":"sell", "unit-cost":20.00, "quantity": 5000, "ticker": "AAA"}]'
+        
+        self.assertEqual(cli.process_line(line), '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 10000.0}]')
+        self.assertEqual(CapitalGainsCLI().process_line(line), '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 9600.0}]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import random
+from decimal import Decimal
+
+from src.models.operation import Operation
+from src.services.prefix_cache import PrefixStateCache
+from src.services.tax_calculator import TaxCalculator
+from tests.helpers import random_operations
+
+
+class TestPrefixStateCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.cache = PrefixStateCache(max_nodes=1000)
+        self.calculator = TaxCalculator()
+        self.history = [
+            Operation("buy", 10.00, 10000),
+            Operation("sell", 5.00, 5000),
+            Operation("buy", 20.00, 5000)
+        ]
+    
+    def taxes(self, operations):
+        return [result.tax for result in self.cache.calculate_taxes(self.calculator, operations)]
+    
+    def test_shared_prefix_is_not_recalculated(self):
+        self.taxes(self.history + [Operation("sell", 30.00, 3000)])
+        
+        taxes = self.taxes(self.history + [Operation("sell", 40.00, 3000)])
+        
+        self.assertEqual(taxes, [Decimal('0'), Decimal('0'), Decimal('0'), Decimal('10000.00')])
+        self.assertEqual(self.cache.stats()["hits"], 3)
+        self.assertEqual(self.cache.stats()["misses"], 5)
+    
+    def test_results_match_calculator_for_random_sweeps(self):
+        rng = random.Random(11)
+        base = random_operations(rng, 20)
+        for _ in range(100):
+            operations = base[:rng.randint(0, 20)] + random_operations(rng, 5)
+            expected = [result.tax for result in TaxCalculator().calculate_taxes(operations)]
+            self.assertEqual(self.taxes(operations), expected)
+    
+    def test_least_recently_used_leaves_are_evicted(self):
+        cache = PrefixStateCache(max_nodes=4)
+        cache.calculate_taxes(self.calculator, self.history + [Operation("sell", 30.00, 3000)])
+        
+        cache.calculate_taxes(self.calculator, self.history + [Operation("sell", 40.00, 3000)])
+        
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.evictions, 1)
+        cache.calculate_taxes(self.calculator, self.history + [Operation("sell", 40.00, 3000)])
+        self.assertEqual(cache.stats()["hits"], 3 + 4)
+    
+    def test_non_integer_quantities_are_not_cached(self):
+        operations = [Operation("buy", 10.00, 100), Operation("sell", 20.00, 50.0)]
+        
+        self.assertRaises(TypeError, self.cache.calculate_taxes, self.calculator, operations)
+        self.assertEqual(len(self.cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
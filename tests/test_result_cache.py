@@ -0,0 +1,55 @@
+import unittest
+
+from src.utils.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    
+    def test_key_is_the_same_for_str_and_bytes(self):
+        self.assertEqual(ResultCache.key('[{"a": 1}]'), ResultCache.key(b'[{"a": 1}]'))
+        self.assertNotEqual(ResultCache.key('[1]'), ResultCache.key('[2]'))
+    
+    def test_get_counts_hits_and_misses(self):
+        cache = ResultCache(max_entries=2)
+        key = cache.key('line')
+        
+        self.assertIsNone(cache.get(key))
+        cache.put(key, '[{"tax": 0.0}]')
+        
+        self.assertEqual(cache.get(key), '[{"tax": 0.0}]')
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResultCache(max_entries=2)
+        first, second, third = cache.key('1'), cache.key('2'), cache.key('3')
+        cache.put(first, 'a')
+        cache.put(second, 'b')
+        cache.get(first)
+        
+        cache.put(third, 'c')
+        
+        self.assertEqual(cache.get(first), 'a')
+        self.assertIsNone(cache.get(second))
+        self.assertEqual(cache.evictions, 1)
+    
+    def test_byte_limit_bounds_the_cache(self):
+        cache = ResultCache(max_entries=100, max_bytes=2 * (ResultCache.ENTRY_OVERHEAD + 10))
+        for index in range(5):
+            cache.put(cache.key(str(index)), 'x' * 10)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+        self.assertEqual(cache.evictions, 3)
+    
+    def test_results_larger_than_the_limit_are_not_cached(self):
+        cache = ResultCache(max_bytes=ResultCache.ENTRY_OVERHEAD + 5)
+        key = cache.key('line')
+        
+        cache.put(key, 'x' * 6)
+        
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import random
+from decimal import Decimal
+
+from src.models.operation import Operation
+from src.services.tax_calculator import TaxCalculator
+from src.services.scenario_sweep import ScenarioSweep, np
+from tests.helpers import random_operations
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestScenarioSweep(unittest.TestCase):
+
+    def assertMatchesFullSimulations(self, operations, prices, quantities):
+        taxes = ScenarioSweep(operations).sell_taxes(prices, quantities)
+        
+        self.assertEqual(taxes.shape, (len(prices), len(quantities)))
+        calculator = TaxCalculator()
+        for row, price in enumerate(prices):
+            for column, quantity in enumerate(quantities):
+                expected = calculator.calculate_taxes(operations + [Operation("sell", price, quantity)])[-1].tax
+                self.assertEqual(Decimal(int(taxes[row, column])).scaleb(-2), expected, f"Failed at {price} x {quantity}")
+    
+    def test_grid_matches_full_simulations(self):
+        operations = [
+            Operation("buy", 10.00, 10000),
+            Operation("sell", 5.00, 2000),
+            Operation("buy", 25.00, 5000)
+        ]
+        
+        self.assertMatchesFullSimulations(operations, [1.00, 10.00, 15.99, 16.00, 20.00, 50.00], [1, 100, 1250, 5000, 13000])
+    
+    def test_random_histories_match_full_simulations(self):
+        rng = random.Random(21)
+        for _ in range(20):
+            operations = random_operations(rng, rng.randint(0, 15))
+            prices = [rng.randint(0, 10000) / 100 for _ in range(6)]
+            quantities = [rng.randint(1, 20000) for _ in range(6)]
+            
+            self.assertMatchesFullSimulations(operations, prices, quantities)
+    
+    def test_prices_with_fractions_of_cents_use_the_scalar_engine(self):
+        operations = [Operation("buy", 10.00, 10000)]
+        
+        self.assertMatchesFullSimulations(operations, [Decimal("20.005"), 20.00], [3000, 5000])
+    
+    def test_huge_values_use_the_scalar_engine(self):
+        operations = [Operation("buy", 10.00, 10 ** 15)]
+        
+        self.assertMatchesFullSimulations(operations, [20.00], [10 ** 15])
+    
+    def test_base_history_is_processed_once(self):
+        sweep = ScenarioSweep.from_json('[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]')
+        
+        self.assertEqual([result.tax for result in sweep.base_taxes], [Decimal("0"), Decimal("10000.00")])
+        self.assertEqual(sweep.state.total_shares, 5000)
+        self.assertEqual(sweep.sell_taxes([20.00], [5000]).tolist(), [[1000000]])
+    
+    def test_empty_grid(self):
+        self.assertEqual(ScenarioSweep([]).sell_taxes([], [1, 2]).shape, (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+from benchmarks.startup import ROOT, baseline_budget, check_budget, import_times, main
+
+
+class TestStartup(unittest.TestCase):
+    
+    def test_default_path_stays_within_forbidden_imports(self):
+        with open(os.path.join(ROOT, "benchmarks", "import_budget.json")) as budget_file:
+            budget = json.load(budget_file)
+        budget.pop("max-microseconds")
+        
+        times = import_times()
+        
+        self.assertIn("src.capital_gains_cli", times)
+        self.assertEqual(check_budget(times, budget), [])
+    
+    def test_optional_features_import_their_modules_on_demand(self):
+        times = import_times(["--cache-size", "8", "--prefix-cache", "8"])
+        
+        self.assertIn("argparse", times)
+        self.assertIn("src.utils.result_cache", times)
+        self.assertIn("src.services.prefix_cache", times)
+    
+    def test_check_budget_reports_violations(self):
+        times = {"argparse": 100, "src.capital_gains_cli": 5000}
+        budget = {"measured": ["src.capital_gains_cli"], "max-microseconds": 1000, "forbidden": ["argparse", "gzip"]}
+        
+        violations = check_budget(times, budget)
+        
+        self.assertEqual(len(violations), 2)
+        self.assertIn("argparse", violations[0])
+    
+    def test_baseline_budget_uses_median_with_headroom(self):
+        samples = [{"src.capital_gains_cli": 30000}, {"src.capital_gains_cli": 10000}, {"src.capital_gains_cli": 20000}]
+        budget = {"measured": ["src.capital_gains_cli"], "max-microseconds": 1000, "forbidden": ["argparse"]}
+        
+        updated = baseline_budget(samples, budget, 1.5)
+        
+        self.assertEqual(updated["max-microseconds"], 30000)
+        self.assertEqual(updated["forbidden"], ["argparse"])
+        self.assertEqual(budget["max-microseconds"], 1000)
+    
+    def test_update_baseline_rewrites_budget_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "budget.json")
+        with open(path, "w") as budget_file:
+            json.dump({"measured": ["src.capital_gains_cli"], "max-microseconds": 1, "forbidden": ["argparse"]}, budget_file)
+        
+        with patch("benchmarks.startup.time_to_first_output", return_value={}), \
+                patch("benchmarks.startup.import_times", return_value={"src.capital_gains_cli": 12345}), \
+                redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["--runs", "3", "--budget", path, "--update-baseline", "--headroom", "2"]), 0)
+        
+        with open(path) as budget_file:
+            budget = json.load(budget_file)
+        self.assertEqual(budget, {"measured": ["src.capital_gains_cli"], "max-microseconds": 25000, "forbidden": ["argparse"]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.calculator_state import CalculatorState
+from src.services.state_store import StateStore
+
+
+class TestStateStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "states.db")
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_states_survive_between_runs(self):
+        state = CalculatorState(Decimal("16.67"), 300, Decimal("1234.56"))
+        with StateStore(self.path) as store:
+            store.put("account-1", state)
+            self.assertEqual(store.get("account-1"), state)
+        
+        with StateStore(self.path) as store:
+            self.assertEqual(store.get("account-1"), state)
+            self.assertIsNone(store.get("account-2"))
+    
+    def test_writes_are_batched(self):
+        with StateStore(self.path, batch_size=3) as store:
+            for index in range(7):
+                store.put(f"account-{index}", CalculatorState(Decimal("10"), index, Decimal("0")))
+            
+            self.assertEqual(store.writes, 2)
+            self.assertEqual(len(store), 7)
+    
+    def test_prefetch_loads_many_accounts_with_one_read(self):
+        with StateStore(self.path) as store:
+            for index in range(100):
+                store.put(f"account-{index}", CalculatorState(Decimal("10.50"), index, Decimal("0")))
+        
+        with StateStore(self.path) as store:
+            store.prefetch([f"account-{index}" for index in range(150)] + ["account-1"])
+            states = [store.get(f"account-{index}") for index in range(150)]
+            
+            self.assertEqual(store.reads, 1)
+            self.assertEqual(store.hits, 150)
+            self.assertEqual([state.total_shares for state in states[:100]], list(range(100)))
+            self.assertEqual(states[100:], [None] * 50)
+    
+    def test_evicted_updates_are_written_back(self):
+        with StateStore(self.path, cache_size=2, batch_size=100) as store:
+            for index in range(5):
+                store.put(f"account-{index}", CalculatorState(Decimal("1"), index, Decimal("0")))
+            
+            self.assertEqual(len(store), 5)
+            self.assertEqual(store.get("account-0").total_shares, 0)
+            self.assertEqual(store.get("account-4").total_shares, 4)
+            self.assertLessEqual(store.stats()["entries"], 2)
+
+
+class TestProcessAccounts(unittest.TestCase):
+
+    def run_accounts(self, lines, store, **options):
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            CapitalGainsCLI(**options).process_accounts(lines, store, chunk_lines=2)
+        return stdout.getvalue().splitlines()
+    
+    def test_accounts_resume_from_their_stored_state(self):
+        buy = {"operation": "buy", "unit-cost": 10.00, "quantity": 10000}
+        sell = {"operation": "sell", "unit-cost": 20.00, "quantity": 5000}
+        with StateStore(":memory:") as store:
+            first_day = self.run_accounts([
+                json.dumps({"account": "a", "operations": [buy]}),
+                json.dumps({"account": "b", "operations": [buy, sell]}),
+                "",
+                "invalid json",
+                json.dumps({"account": "c"})
+            ], store)
+            second_day = self.run_accounts([
+                json.dumps({"account": "a", "operations": [sell]}),
+                json.dumps({"account": "b", "operations": [sell]}),
+                json.dumps({"account": "d", "operations": [sell]})
+            ], store, engine="cents")
+            
+            self.assertEqual(first_day, [
+                '[{"tax": 0.0}]',
+                '[{"tax": 0.0}, {"tax": 10000.0}]',
+                'Error: Invalid JSON format',
+                "Error: Account lines must be objects with 'account' and 'operations'"
+            ])
+            self.assertEqual(second_day, ['[{"tax": 10000.0}]', '[{"tax": 10000.0}]', '[{"tax": 20000.0}]'])
+            self.assertEqual(store.get("b").total_shares, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import gzip
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation import Operation
+from src.services.tax_calculator import TaxCalculator
+from src.utils.stream_merge import iter_feed, merge_operations
+
+
+def feed(*timestamps, unit_cost=10.00):
+    return [Operation("buy", unit_cost, 1, timestamp=timestamp) for timestamp in timestamps]
+
+
+class TestMergeOperations(unittest.TestCase):
+    
+    def test_merges_in_timestamp_order(self):
+        rng = random.Random(4)
+        feeds = [sorted(rng.randint(0, 1000) for _ in range(rng.randint(0, 50))) for _ in range(6)]
+        
+        merged = [operation.timestamp for operation in merge_operations(*(feed(*timestamps) for timestamps in feeds))]
+        
+        self.assertEqual(merged, sorted(timestamp for timestamps in feeds for timestamp in timestamps))
+    
+    def test_ties_are_broken_by_feed_then_position(self):
+        first = feed(1, 1, 2, unit_cost=1)
+        second = feed(1, 2, unit_cost=2)
+        
+        merged = list(merge_operations(first, second))
+        
+        self.assertEqual(merged, [first[0], first[1], second[0], first[2], second[1]])
+    
+    def test_feeds_are_consumed_lazily(self):
+        consumed = []
+        
+        def endless(unit_cost):
+            timestamp = 0
+            while True:
+                consumed.append(unit_cost)
+                yield Operation("buy", unit_cost, 1, timestamp=timestamp)
+                timestamp += 1
+        
+        merged = merge_operations(endless(1), endless(2))
+        [next(merged) for _ in range(10)]
+        
+        self.assertLessEqual(len(consumed), 12)
+    
+    def test_unsorted_feed_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(merge_operations(feed(1, 3, 2)))
+    
+    def test_missing_timestamp_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(merge_operations([Operation("buy", 10.00, 1)]))
+    
+    def test_merged_stream_feeds_the_calculator(self):
+        broker_a = [Operation("buy", 10.00, 10000, timestamp=1), Operation("sell", 20.00, 5000, timestamp=4)]
+        broker_b = [Operation("buy", 30.00, 10000, timestamp=2)]
+        
+        results = TaxCalculator().calculate_taxes(list(merge_operations(broker_a, broker_b)))
+        
+        self.assertEqual([result.tax for result in results], [0, 0, 0])
+
+
+class TestFeedFiles(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.first = os.path.join(self.directory.name, "a.jsonl")
+        self.second = os.path.join(self.directory.name, "b.jsonl.gz")
+        with open(self.first, "w") as feed_file:
+            feed_file.write('{"operation":"buy", "unit-cost":10.00, "quantity": 10000, "timestamp": "2024-01-02T10:00:00"}\n\n')
+            feed_file.write('{"operation":"sell", "unit-cost":20.00, "quantity": 5000, "timestamp": "2024-01-03T10:00:00"}\n')
+        with gzip.open(self.second, "wt") as feed_file:
+            feed_file.write('{"operation":"buy", "unit-cost":10.00, "quantity": 10000, "timestamp": "2024-01-02T12:00:00"}\n')
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_iter_feed_reads_plain_and_gzip_files(self):
+        self.assertEqual([operation.quantity for operation in iter_feed(self.first)], [10000, 5000])
+        self.assertEqual([operation.timestamp for operation in iter_feed(self.second)], ["2024-01-02T12:00:00"])
+    
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_cli_merges_feed_files(self, mock_stdout):
+        CapitalGainsCLI().process_feeds([self.first, self.second])
+        
+        self.assertEqual(mock_stdout.getvalue(), '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 10000.0}]\n')
+    
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_cli_reports_unsorted_feeds(self, mock_stdout):
+        unsorted = os.path.join(self.directory.name, "c.jsonl")
+        with open(unsorted, "w") as feed_file:
+            feed_file.write('{"operation":"buy", "unit-cost":10.00, "quantity": 10, "timestamp": "2024-01-04T10:00:00"}\n')
+            feed_file.write('{"operation":"buy", "unit-cost":10.00, "quantity": 10, "timestamp": "2024-01-01T10:00:00"}\n')
+        
+        CapitalGainsCLI().process_feeds([self.first, unsorted])
+        
+        self.assertEqual(mock_stdout.getvalue(), 'Error: Feed 1 is not sorted by timestamp at operation 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 from decimal import Decimal
 
+from src.models.calculator_state import CalculatorState
 from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
 from src.models.tax_result import TaxResult
 from src.services.tax_calculator import TaxCalculator
 
@@ -103,6 +105,55 @@ class TestTaxCalculator(unittest.TestCase):
         for i, (result, expected_result) in enumerate(zip(results, expected)):
             self.assertEqual(result.tax, expected_result.tax, f"Failed at item {i}")
     
+    def test_iter_taxes_yields_results_lazily(self):
+        def operations():
+            yield Operation("buy", 10.00, 10000)
+            yield Operation("sell", 20.00, 5000)
+            raise RuntimeError("stream exhausted")
+        
+        results = self.calculator.iter_taxes(operations())
+        
+        self.assertEqual(next(results).tax, Decimal('0'))
+        self.assertEqual(next(results).tax, Decimal('10000'))
+        self.assertRaises(RuntimeError, next, results)
+    
+    def test_calculate_batch_matches_calculate_taxes(self):
+        operations = [
+            Operation("buy", 10.00, 10000),
+            Operation("sell", 2.00, 5000),
+            Operation("sell", 20.00, 2000),
+            Operation("sell", 20.00, 2000),
+            Operation("buy", 20.00, 10000),
+            Operation("sell", 50.00, 1000)
+        ]
+        
+        taxes = self.calculator.calculate_batch(OperationBatch.from_operations(operations))
+        expected = self.calculator.calculate_taxes(operations)
+        
+        self.assertEqual([Decimal(tax).scaleb(-2) for tax in taxes], [result.tax for result in expected])
+    
+    def test_append_operations_continues_from_snapshot(self):
+        history = [
+            Operation("buy", 10.00, 10000),
+            Operation("sell", 5.00, 5000),
+            Operation("buy", 20.00, 5000)
+        ]
+        new_operations = [Operation("sell", 30.00, 3000), Operation("sell", 30.00, 4000)]
+        
+        full = self.calculator.calculate_taxes(history + new_operations)
+        self.calculator.calculate_taxes(history)
+        snapshot = self.calculator.export_state()
+        
+        for engine in ("decimal", "cents"):
+            calculator = TaxCalculator(engine=engine)
+            appended = calculator.append_operations(new_operations, snapshot)
+            
+            self.assertEqual([result.tax for result in appended], [result.tax for result in full[3:]], engine)
+            self.assertEqual(calculator.export_state(), CalculatorState(Decimal('15.00'), 3000, Decimal('0')))
+    
+    def test_unknown_engine_is_rejected(self):
+        self.assertRaises(ValueError, TaxCalculator, engine="float")
+    
     def test_weighted_average_calculation_with_multiple_buys(self):
         self.calculator._update_weighted_average(Decimal('10'), 10)
         self.assertEqual(self.calculator.weighted_average_price, Decimal('10'))
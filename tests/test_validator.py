@@ -0,0 +1,152 @@
+import io
+import random
+import unittest
+from array import array
+from decimal import Decimal
+from unittest.mock import patch
+
+from src.capital_gains_cli import CapitalGainsCLI
+from src.models.operation_batch import OperationBatch, BUY_CODE, SELL_CODE
+from src.services.validator import (
+    OperationIssue, SimulationValidationError, _validate_columns, validate_batch, validate_records
+)
+
+
+class TestValidateRecords(unittest.TestCase):
+
+    def test_valid_simulation_has_no_issues(self):
+        records = [
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 100},
+            {"operation": "sell", "unit-cost": Decimal("15.00"), "quantity": 100},
+            {"operation": "buy", "unit-cost": 0, "quantity": 1}
+        ]
+        
+        self.assertEqual(validate_records(records), [])
+    
+    def test_every_bad_operation_is_reported(self):
+        records = [
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 100},
+            {"operation": "hold", "unit-cost": 10.00, "quantity": 100},
+            {"operation": "sell", "unit-cost": -1, "quantity": 10},
+            {"operation": "sell", "unit-cost": float("nan"), "quantity": 10},
+            {"operation": "buy", "unit-cost": "10", "quantity": 10},
+            {"operation": "buy", "unit-cost": 10.00, "quantity": -5},
+            {"operation": "buy", "unit-cost": 10.00, "quantity": "5"},
+            {"operation": "buy", "unit-cost": 10.00, "quantity": True},
+            {"operation": "sell", "unit-cost": 10.00},
+            {"operation": "sell", "unit-cost": 10.00, "quantity": 101},
+            {"operation": "sell", "unit-cost": 10.00, "quantity": 100},
+            [1, 2]
+        ]
+        
+        issues = validate_records(records)
+        
+        self.assertEqual([issue.index for issue in issues], [1, 2, 3, 4, 5, 6, 7, 8, 9, 11])
+        self.assertEqual(issues[0], OperationIssue(1, "unknown operation 'hold'"))
+        self.assertEqual(issues[7].reason, "missing field 'quantity'")
+        self.assertEqual(issues[8].reason, "sell of 101 exceeds 100 shares held")
+        self.assertEqual(issues[9].reason, "operation must be an object")
+    
+    def test_quantities_the_calculator_accepts_are_valid(self):
+        records = [
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 0},
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 100.0},
+            {"operation": "buy", "unit-cost": Decimal("10.00"), "quantity": Decimal("5")}
+        ]
+        
+        self.assertEqual(validate_records(records), [])
+        self.assertEqual(validate_records([{"operation": "buy", "unit-cost": 10.00, "quantity": -0.5}])[0].reason, "quantity must be a finite non-negative number")
+        line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 0},{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'
+        self.assertEqual(CapitalGainsCLI(validation="strict").process_line(line), CapitalGainsCLI().process_line(line))
+    
+    def test_shares_are_held_per_ticker(self):
+        records = [
+            {"operation": "buy", "unit-cost": 10.00, "quantity": 100, "ticker": "AAA"},
+            {"operation": "sell", "unit-cost": 10.00, "quantity": 50, "ticker": "BBB"}
+        ]
+        
+        self.assertEqual(validate_records(records), [])
+        self.assertEqual(validate_records(records, per_ticker=True), [OperationIssue(1, "sell of 50 exceeds 0 shares held")])
+    
+    def test_non_array_simulation_is_rejected(self):
+        with self.assertRaises(SimulationValidationError):
+            validate_records({"operation": "buy"})
+
+
+class TestValidateBatch(unittest.TestCase):
+
+    def random_batch(self, rng, length):
+        batch = OperationBatch()
+        for _ in range(length):
+            batch.types.append(rng.choice([BUY_CODE, BUY_CODE, SELL_CODE, 7]))
+            batch.prices.append(rng.randint(-10, 5000))
+            batch.quantities.append(rng.randint(-5, 300))
+        return batch
+    
+    def test_vectorized_check_matches_row_scan(self):
+        rng = random.Random(1)
+        for length in (0, 10, 300, 2000):
+            for _ in range(20):
+                batch = self.random_batch(rng, length)
+                self.assertEqual(validate_batch(batch), _validate_columns(batch.types, batch.prices, batch.quantities))
+    
+    def test_valid_long_batch(self):
+        batch = OperationBatch(bytearray([BUY_CODE, SELL_CODE] * 500), array('q', [1000] * 1000), array('q', [10] * 1000))
+        
+        self.assertEqual(validate_batch(batch), [])
+
+
+class TestCliValidation(unittest.TestCase):
+
+    LINE = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 20000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+    
+    def test_strict_mode_rejects_the_simulation(self):
+        cli = CapitalGainsCLI(validation="strict")
+        
+        self.assertEqual(cli.process_line(self.LINE), "Error: Invalid simulation: operation 1: sell of 20000 exceeds 10000 shares held")
+    
+    def test_lenient_mode_skips_bad_operations(self):
+        cli = CapitalGainsCLI(validation="lenient")
+        
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            output = cli.process_line(self.LINE)
+        
+        self.assertEqual(output, '[{"tax": 0.0}, {"tax": 0.0}, {"tax": 10000.0}]')
+        self.assertIn("operation 1", stderr.getvalue())
+    
+    def test_lenient_warnings_are_repeated_with_the_result_cache(self):
+        cli = CapitalGainsCLI(validation="lenient", cache_size=10)
+        
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            outputs = [cli.process_line(self.LINE) for _ in range(2)]
+        
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(stderr.getvalue().count("Warning: skipped operation 1"), 2)
+        
+        valid = '[{"operation":"buy", "unit-cost":10.00, "quantity": 100}]'
+        cli.process_line(valid)
+        cli.process_line(valid)
+        self.assertEqual(cli.cache.stats()["hits"], 1)
+    
+    def test_lenient_mode_skips_bad_batch_rows(self):
+        batch = OperationBatch(bytearray([BUY_CODE, SELL_CODE, SELL_CODE]), array('q', [1000, 2000, 2000]), array('q', [10000, 20000, 5000]))
+        
+        with patch('sys.stderr', new_callable=io.StringIO):
+            taxes = CapitalGainsCLI(validation="lenient")._calculate_batch(batch)
+        
+        self.assertEqual(list(taxes), [0, 0, 1000000])
+        self.assertIn("exceeds", CapitalGainsCLI(validation="strict")._calculate_batch(batch))
+    
+    def test_valid_simulations_are_unchanged(self):
+        line = '[{"operation":"buy", "unit-cost":10.00, "quantity": 10000},{"operation":"sell", "unit-cost":20.00, "quantity": 5000}]'
+        
+        for mode in ("strict", "lenient"):
+            self.assertEqual(CapitalGainsCLI(validation=mode).process_line(line), CapitalGainsCLI().process_line(line))
+    
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CapitalGainsCLI(validation="paranoid")
+
+
+if __name__ == '__main__':
+    unittest.main()
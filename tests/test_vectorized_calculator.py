@@ -0,0 +1,57 @@
+import unittest
+import random
+
+from src.models.operation import Operation
+from src.models.operation_batch import OperationBatch
+from src.services.tax_calculator import TaxCalculator
+from src.services.vectorized_calculator import VectorizedTaxCalculator, pad_batches, PAD_CODE, np
+from tests.helpers import random_operations
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestVectorizedTaxCalculator(unittest.TestCase):
+    
+    def setUp(self):
+        self.calculator = VectorizedTaxCalculator()
+        self.reference = TaxCalculator()
+    
+    def assertMatchesReference(self, batches):
+        taxes = self.calculator.calculate_batches(batches)
+        
+        for row, batch in enumerate(batches):
+            expected = list(self.reference.calculate_batch(batch))
+            self.assertEqual(taxes[row, :len(batch)].tolist(), expected, f"Failed at simulation {row}")
+            self.assertFalse(taxes[row, len(batch):].any())
+    
+    def test_random_simulations_match_tax_calculator(self):
+        rng = random.Random(42)
+        batches = [OperationBatch.from_operations(random_operations(rng, rng.randint(0, 30))) for _ in range(300)]
+        
+        self.assertMatchesReference(batches)
+    
+    def test_oversold_and_negative_simulations_fall_back_to_scalar_engine(self):
+        batches = [
+            OperationBatch.from_operations([Operation("buy", 10.00, 100), Operation("sell", 500.00, 1000), Operation("buy", 20.00, 1000)]),
+            OperationBatch.from_operations([Operation("buy", 10.00, 100), Operation("buy", 12.00, -50)]),
+            OperationBatch.from_operations([Operation("buy", 10.00, 10000), Operation("sell", 20.00, 5000)]),
+            OperationBatch.from_operations([Operation("buy", 10.00, 10 ** 15), Operation("sell", 20.00, 10 ** 15)])
+        ]
+        
+        self.assertMatchesReference(batches)
+    
+    def test_pad_batches_marks_padding(self):
+        types, prices, quantities = pad_batches([
+            OperationBatch.from_operations([Operation("buy", 10.00, 100)]),
+            OperationBatch.from_operations([Operation("buy", 10.00, 100), Operation("sell", 15.00, 50)])
+        ])
+        
+        self.assertEqual(types.tolist(), [[0, PAD_CODE], [0, 1]])
+        self.assertEqual(prices.tolist(), [[1000, 0], [1000, 1500]])
+        self.assertEqual(quantities.tolist(), [[100, 0], [100, 50]])
+    
+    def test_rejects_unknown_type_codes(self):
+        self.assertRaises(ValueError, self.calculator.calculate, [[7]], [[1000]], [[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import json
+import random
+
+from benchmarks.workload import generate_operations, generate_workload
+from benchmarks.run_benchmarks import count_allocations, find_regressions, run_benchmarks
+from src.services.tax_calculator import TaxCalculator
+from src.utils.json_utils import parse_operations
+
+
+class TestWorkload(unittest.TestCase):
+
+    def test_workload_is_reproducible(self):
+        self.assertEqual(generate_workload(3, 20, seed=5), generate_workload(3, 20, seed=5))
+        self.assertEqual(len(generate_workload(3, 20)), 3)
+    
+    def test_sells_never_exceed_shares_held(self):
+        shares = 0
+        for item in generate_operations(random.Random(1), 500, sell_ratio=0.7):
+            shares += item["quantity"] if item["operation"] == "buy" else -item["quantity"]
+            self.assertGreaterEqual(shares, 0)
+    
+    def test_threshold_ratio_controls_taxable_sells(self):
+        for ratio, check in ((1.0, lambda value: value > 20000), (0.0, lambda value: value <= 20000)):
+            operations = generate_operations(random.Random(2), 300, threshold_ratio=ratio)
+            sells = [item for item in operations if item["operation"] == "sell"]
+            self.assertTrue(sells)
+            for item in sells:
+                self.assertTrue(check(round(item["unit-cost"] * 100) * item["quantity"] / 100), item)
+    
+    def test_exempt_sells_stay_exempt_with_large_positions(self):
+        operations = generate_operations(random.Random(1), 2000, sell_ratio=0.002, threshold_ratio=0.0)
+        sells = [item for item in operations if item["operation"] == "sell"]
+        
+        self.assertTrue(any(item["quantity"] == 2000000 for item in sells))
+        for item in sells:
+            self.assertLessEqual(round(item["unit-cost"] * 100) * item["quantity"], 2000000 * 100, item)
+    
+    def test_lines_are_valid_json_arrays(self):
+        for line in generate_workload(2, 10):
+            self.assertIsInstance(json.loads(line), list)
+    
+    def test_find_regressions_flags_slower_stages(self):
+        baseline = {"parse": {"ops_per_sec": 1000.0}, "format": {"ops_per_sec": 1000.0}}
+        stages = {"parse": {"ops_per_sec": 850.0}, "format": {"ops_per_sec": 950.0}, "cli": {"ops_per_sec": 1.0}}
+        
+        regressions = find_regressions(stages, baseline, tolerance=0.1)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("parse"))
+    
+    def test_find_regressions_flags_extra_allocations(self):
+        baseline = {"calculate": {"ops_per_sec": 1000.0, "allocations_per_op": 7.0}}
+        
+        self.assertEqual(find_regressions({"calculate": {"ops_per_sec": 1000.0, "allocations_per_op": 7.2}}, baseline, 0.1), [])
+        regressions = find_regressions({"calculate": {"ops_per_sec": 1000.0, "allocations_per_op": 8.0}}, baseline, 0.1)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("allocations per operation", regressions[0])
+    
+    def test_count_allocations_sees_temporaries(self):
+        parsed = [parse_operations(line) for line in generate_workload(5, 100, seed=4)]
+        operations = sum(len(line) for line in parsed)
+        calculator = TaxCalculator()
+        
+        def calculate_with_temporary(line):
+            results = calculator.calculate_taxes(line)
+            for operation in line:
+                operation.unit_cost + 1
+            return results
+        
+        def calculate():
+            return [calculator.calculate_taxes(line) for line in parsed]
+        
+        calculate()
+        plain = count_allocations(calculate)
+        with_temporary = count_allocations(lambda: [calculate_with_temporary(line) for line in parsed])
+        
+        self.assertGreaterEqual((with_temporary - plain) / operations, 0.99)
+    
+    def test_calculate_stage_allocates_no_extra_object_per_operation(self):
+        stages = run_benchmarks(generate_workload(10, 50, seed=3), repeat=1)
+        
+        # 7.4 with the decimal engine on CPython 3.11: the Decimals of the
+        # calculation and one TaxResult per operation; an audit hook building
+        # any object per operation crosses the limit
+        self.assertLess(stages["calculate"]["allocations_per_op"], 8)
+
+if __name__ == "__main__":
+    unittest.main()